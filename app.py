@@ -1,25 +1,43 @@
 # TODO: FIX NSE DATA FETCHING ISSUES - Blocked for ticker tape and top gainers and losrers
+# yfinance, plotly, NewsAPI and the LLM stack are imported inside the tabs that use them: importing
+# them here would add seconds to every cold start (see benchmarks/bench_startup.py)
 import streamlit as st
-import yfinance as yf
-import plotly.graph_objs as go
 from datetime import datetime, timedelta
 import pandas as pd
-from news_api_handler import fetch_query_news, fetch_today_news
-from llm_handler import summarize_stock_articles, summarize_stock_articles_structured, ask_stocky_bhai_qa
-import pandas as pd
-import requests
-from nsepython import nse_get_top_gainers, nse_get_top_losers, nse_get_index_quote, nse_index, nsefetch
-from components import TickerTape
+import uuid
+from components import TickerTape, LiveQuotes, IndicesHeatmap, FnoTreemap
+from market_poller import get_market_poller
+from quote_hub import get_live_feed
+from nse_handler import SNAPSHOT_INDICES, indices_summary, top_gainers_losers
+from market_data_handler import fetch_ohlcv_history, fetch_recent_closes, get_symbol_history
+from portfolio_engine import value_portfolio, summarize_portfolio, latest_prices, portfolio_nav, nav_change
+from symbol_master import get_symbol_master
+from portfolio_store import get_portfolio_store
 
 # Page config
 st.set_page_config(page_title="Stockzy", page_icon="📈", layout="wide")
 
+# Watchlist and portfolio live in the local SQLite store, keyed by the ?user= id in the URL.
+# A browser without one gets a random id written back into its URL, so each visitor starts with a
+# private ledger that survives reloads and bookmarks. The id is not authentication: anyone who has
+# the link can open that ledger, so share it only to share the portfolio.
+portfolio_store = get_portfolio_store()
+
+if 'user_id' not in st.session_state:
+    if not st.query_params.get('user'):
+        st.query_params['user'] = uuid.uuid4().hex
+    st.session_state.user_id = portfolio_store.ensure_user(st.query_params['user'])
+
 # Initialize session states
 if 'tracked_stocks' not in st.session_state:
-    st.session_state.tracked_stocks = []
+    st.session_state.tracked_stocks = portfolio_store.load_watchlist(st.session_state.user_id)
 
 if 'portfolio' not in st.session_state:
-    st.session_state.portfolio = {}
+    # One aggregate query over the trade ledger, once per session
+    st.session_state.portfolio = portfolio_store.load_portfolio(st.session_state.user_id)
+
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 if 'nse_positions-data' not in st.session_state:
     st.session_state.nse_positions_data = {}
@@ -34,63 +52,50 @@ period_options = {
     "3 Years": ("3y", "1wk")
 }
 
+# Chart indicators: label -> (indicator name, parameters)
+indicator_options = {
+    "SMA 20": ("sma", {"window": 20}),
+    "SMA 50": ("sma", {"window": 50}),
+    "EMA 20": ("ema", {"span": 20}),
+    "Bollinger Bands (20, 2)": ("bollinger", {"window": 20, "num_std": 2}),
+    "VWAP": ("vwap", {}),
+    "RSI 14": ("rsi", {"period": 14}),
+    "MACD (12, 26, 9)": ("macd", {"fast": 12, "slow": 26, "signal": 9}),
+    "ATR 14": ("atr", {"period": 14}),
+}
+
+
+# Market data is refreshed by a background poller; reruns only read its latest snapshot
+market_poller = get_market_poller()
+
+# The poller also feeds a websocket hub, so the ticker tape and index cards update live between reruns
+live_feed = get_live_feed()
+
 
-@st.cache_data(ttl=300)
 def get_nse_positions_data():
-    try:
-        positions = nsefetch('https://www.nseindia.com/api/equity-stockIndices?index=SECURITIES%20IN%20F%26O')
-        df = pd.DataFrame(positions['data'])
-    except Exception as e:
-        print(f"Error fetching NSE positions: {e}")
-        df = pd.DataFrame()  # return empty DataFrame on failure
-    return df
+    return market_poller.snapshot('fno_positions', pd.DataFrame())
 
 st.session_state.nse_positions_data = get_nse_positions_data()
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes = 300 seconds
+
+def get_all_indices():
+    return market_poller.snapshot('all_indices', pd.DataFrame())
+
+
 def get_indices_summary(index_names):
-    summaries = []
-    for name in index_names:
-        try:
-            data = nse_get_index_quote(name)
-            summaries.append({
-                "Index": data["indexName"],
-                "Value": data["last"],
-                "% Change": data["percChange"]
-            })
-        except Exception as e:
-            summaries.append({
-                "Index": name,
-                "Value": "Error",
-                "% Change": str(e)
-            })
-    return pd.DataFrame(summaries)
-
-
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+    all_indices = get_all_indices()
+    if all_indices.empty:
+        return pd.DataFrame([{"Index": name, "Value": "Loading", "% Change": "-"} for name in index_names])
+    return indices_summary(all_indices, index_names)
+
+
 def get_top_nse_gainers_losers(top_k=5):
     """
     Returns:
         tuple: (top_k_gainers, top_k_losers)
-        Each is a list of dicts with fields like 'symbol', 'ltp', 'pChange', etc.
+        DataFrames with 'symbol', 'open', 'lastPrice' and 'pChange', derived from the F&O snapshot.
     """
-    try:
-        top_gainers = nse_get_top_gainers()
-        if not isinstance(top_gainers, list):
-            top_gainers = []
-    except Exception as e:
-        #st.warning(f"Error fetching top gainers: {e}")
-        top_gainers = []
-
-    try:
-        top_losers = nse_get_top_losers()
-        if not isinstance(top_losers, list):
-            top_losers = []
-    except Exception as e:
-        #st.warning(f"Error fetching top losers: {e}")
-        top_losers = []
-
-    return top_gainers[:top_k], top_losers[:top_k]
+    return top_gainers_losers(get_nse_positions_data(), top_k)
 
 
 @st.cache_data(ttl=300)
@@ -103,6 +108,8 @@ def get_commodity_prices():
         "Natural Gas": "NG=F"
     }
 
+    import yfinance as yf
+
     # USD → INR exchange rate ticker
     fx = yf.Ticker("INR=X")
     fx_price = fx.info.get("regularMarketPrice", None)
@@ -134,89 +141,140 @@ def get_commodity_prices():
     return pd.DataFrame(data)
 
 
-
-def get_stock_price(symbol):
-    """Get current stock price"""
-    try:
-        stock = yf.Ticker(symbol)
-        data = stock.history(period="1d")
-        if not data.empty:
-            return data['Close'].iloc[-1]
-        return None
-    except:
-        return None
+@st.cache_data(ttl=300)
+def get_stocks_history(symbols: tuple, period: str, interval: str):
+    """Batched OHLCV for a set of symbols, cached by (symbol set, period, interval)"""
+    return fetch_ohlcv_history(symbols, period, interval)
 
 
-def validate_stock(symbol):
-    """Validate if stock exists"""
-    try:
-        stock = yf.Ticker(symbol)
-        info = stock.info
-        return info and 'symbol' in info
-    except:
-        return False
+@st.cache_data(ttl=60)
+def get_recent_closes(symbols: tuple):
+    """Get the last few daily closes for several stocks in one batched call"""
+    return fetch_recent_closes(symbols)
 
 
-def add_stock_to_portfolio(symbol, quantity, avg_price, test=False):
-    if test or (portfolio_stock and quantity > 0 and avg_price > 0):
-        full_symbol = symbol + ".NS"
-        if validate_stock(full_symbol):
-            if full_symbol in st.session_state.portfolio:
-                # Update existing holding
-                existing = st.session_state.portfolio[full_symbol]
-                total_qty = existing['quantity'] + quantity
-                total_investment = (existing['quantity'] * existing['avg_price']) + (quantity * avg_price)
-                new_avg_price = total_investment / total_qty
-
-                st.session_state.portfolio[full_symbol] = {
-                    'quantity': total_qty,
-                    'avg_price': new_avg_price
-                }
-                st.success(f"Updated {symbol}: {total_qty} shares at avg ₹{new_avg_price:.2f}")
+def build_price_chart(data, symbol, interval, selected_indicators, line_color, line_name, title):
+    """
+    Close price chart with the selected indicators: overlays share the price panel, oscillators
+    (RSI, MACD, ATR) get a panel each below it. Indicator values are memoized per symbol and
+    interval, so reruns only compute bars that are new since the last render.
+    """
+    import plotly.graph_objs as go
+    from plotly.subplots import make_subplots
+    from indicators import indicator_engine, OSCILLATORS
+
+    chosen = [(label, *indicator_options[label]) for label in selected_indicators]
+    oscillators = [item for item in chosen if item[1] in OSCILLATORS]
+    fig = make_subplots(rows=1 + len(oscillators), cols=1, shared_xaxes=True, vertical_spacing=0.05,
+                        row_heights=[3] + [1] * len(oscillators))
+
+    fig.add_trace(go.Scatter(x=data.index, y=data['Close'], mode='lines', name=line_name,
+                             line=dict(color=line_color, width=2)), row=1, col=1)
+
+    for label, name, params in chosen:
+        values = indicator_engine.compute(data, symbol, interval, name, **params)
+        row = 2 + oscillators.index((label, name, params)) if name in OSCILLATORS else 1
+
+        for column in values.columns:
+            trace_name = label if len(values.columns) == 1 else f"{label} {column}"
+            if column == 'histogram':
+                fig.add_trace(go.Bar(x=values.index, y=values[column], name=trace_name, opacity=0.5),
+                              row=row, col=1)
             else:
-                # Add new holding
-                st.session_state.portfolio[full_symbol] = {
-                    'quantity': quantity,
-                    'avg_price': avg_price
-                }
-                st.success(f"Added {symbol}: {quantity} shares at ₹{avg_price}")
-            st.rerun()
-        else:
-            st.error(f"Stock {symbol} not found on NSE")
+                dash = 'dot' if column in ('upper', 'lower') else None
+                fig.add_trace(go.Scatter(x=values.index, y=values[column], mode='lines', name=trace_name,
+                                         line=dict(width=1, dash=dash)), row=row, col=1)
 
+        if name == 'rsi':
+            fig.add_hline(y=70, line_dash="dot", line_color="grey", row=row, col=1)
+            fig.add_hline(y=30, line_dash="dot", line_color="grey", row=row, col=1)
 
-# TEST STOCK ADDITION - TODO: REMOVE AFTER DB INTEGRATION
-# Add TCS stock only if it's not already in the portfolio
-# if "TCS.NS" not in st.session_state.portfolio:
-#     add_stock_to_portfolio("TCS", quantity=1, avg_price=3000, test=True)
+    fig.update_layout(title=title, height=400 + 150 * len(oscillators), showlegend=bool(chosen))
+    fig.update_yaxes(title_text="Price (₹)", row=1, col=1)
+    fig.update_xaxes(title_text="Date/Time", row=1 + len(oscillators), col=1)
+    return fig
 
-@st.cache_data(ttl=300)
-def get_nse_indices_data(top_k=20):
-    """
-    Returns the top 20 NSE indices by current value (`last`) with relevant details:
-    indexName, indexOrder, indexType, last, percChange.
 
-    Ensures all rows are complete (no NaN values).
+def validate_stock(symbol):
     """
-    df = nse_index()
+    Validate if stock exists, against the local NSE symbol master (no network call). While only
+    the bundled seed list is available, symbols missing from it are checked on Yahoo Finance instead.
+    """
+    master = get_symbol_master()
+    if master.is_valid(symbol):
+        return True
+    if master.is_complete:
+        return False
+
+    import yfinance as yf
+
+    try:
+        info = yf.Ticker(symbol).info
+        return bool(info) and 'symbol' in info
+    except Exception as e:
+        print(f"[ERROR] Couldn't validate {symbol}: {e}")
+        return False
+
+
+def set_symbol_input(input_key, symbol):
+    st.session_state[input_key] = symbol
 
-    # Select only required columns
-    df_cleaned = df[['indexName', 'indexOrder', 'indexType', 'last', 'percChange']].copy()
 
-    # Remove commas and convert to numeric
-    df_cleaned['last'] = pd.to_numeric(df_cleaned['last'].astype(str).str.replace(',', ''), errors='coerce')
-    df_cleaned['percChange'] = pd.to_numeric(df_cleaned['percChange'].astype(str).str.replace(',', ''), errors='coerce')
+def symbol_suggestions(input_key):
+    """Company name for a valid symbol in the input, otherwise prefix / fuzzy matches to pick from."""
+    query = st.session_state.get(input_key, '').strip()
+    if not query:
+        return
+    master = get_symbol_master()
+    if master.is_valid(query):
+        st.caption(master.company_name(query))
+        return
+    matches = master.suggest(query, limit=5)
+    if matches:
+        st.caption("Did you mean:")
+        for symbol in matches:
+            st.button(f"{symbol} · {master.company_name(symbol)}", key=f"{input_key}_suggest_{symbol}",
+                      on_click=set_symbol_input, args=(input_key, symbol), use_container_width=True)
 
-    # Drop any rows with NaNs in any column
-    df_cleaned.dropna(inplace=True)
 
-    # Sort by 'last' in descending order and return top 20
-    df_cleaned = df_cleaned.sort_values(by='last', ascending=False).head(top_k)
+def add_stock_to_portfolio(symbol, quantity, avg_price):
+    if portfolio_stock and quantity > 0 and avg_price > 0:
+        full_symbol = symbol + ".NS"
+        if validate_stock(full_symbol):
+            # Recorded as a buy in the trade ledger; the holding is re-aggregated from it
+            portfolio_store.add_trade(st.session_state.user_id, full_symbol, 'BUY', quantity, avg_price)
+            st.session_state.portfolio = portfolio_store.load_portfolio(st.session_state.user_id)
+            holding = st.session_state.portfolio.get(full_symbol)
+            if holding is None:
+                # The ledger still sells at least as many shares as it buys (e.g. a tradebook that
+                # starts after the original purchase), so there is no open holding to show
+                st.warning(f"Recorded the buy, but {symbol} is still net short or closed in your trade history")
+                return
+            st.success(f"Updated {symbol}: {holding['quantity']:g} shares at avg ₹{holding['avg_price']:.2f}")
+            st.rerun()
+        else:
+            st.error(f"Stock {symbol} not found on NSE")
 
-    return df_cleaned.reset_index(drop=True)
 
-# Only render ticker tape if positions data has been fetched sucessfully
-if len(st.session_state.nse_positions_data)>0:
+def import_tradebook(uploaded_file):
+    try:
+        result = portfolio_store.import_tradebook(st.session_state.user_id, uploaded_file,
+                                                  source_name=uploaded_file.name)
+    except ValueError as e:
+        st.error(f"Couldn't import {uploaded_file.name}: {e}")
+        return
+    st.session_state.portfolio = portfolio_store.load_portfolio(st.session_state.user_id)
+    st.success(f"Imported {result['imported']} of {result['rows']} trades "
+               f"({result['duplicates']} already imported, {result['skipped']} skipped)")
+    if result['net_short']:
+        st.warning(f"{result['net_short']} symbols sell more shares than they buy in your trade history "
+                   "and are left out of the portfolio; import the tradebook that covers their buys")
+
+
+# Live tape when the feed is up; otherwise only render it if positions data has been fetched sucessfully
+if live_feed is not None:
+    LiveQuotes.live_ticker_tape(live_feed.port, live_feed.hub.snapshot('ticker')['rows'], url=live_feed.url)
+elif len(st.session_state.nse_positions_data)>0:
     TickerTape.ticker_tape_component(st.session_state.nse_positions_data)
 
 # App title
@@ -247,9 +305,17 @@ with right:
             question = st.text_input("Ask Stocky Bhai Something...", key="stocky_input")
 
             if question:
-                with st.spinner("Stocky Bhai is thinking..."):
-                    response = ask_stocky_bhai_qa(question)
-                    st.markdown(f"**🧠 Stocky Bhai Says:**\n\n{response.answer}")
+                st.markdown("**🧠 Stocky Bhai Says:**")
+                # Stream a new question once; later reruns just re-show the stored answer
+                if st.session_state.get('stocky_question') != question:
+                    from llm_handler import stream_stocky_bhai_answer
+
+                    answer_stream = stream_stocky_bhai_answer(question, st.session_state.session_id)
+                    st.write_stream(answer_stream)
+                    st.session_state.stocky_question = question
+                    st.session_state.stocky_answer = answer_stream.result
+                else:
+                    st.markdown(st.session_state.stocky_answer.answer)
 
     # Close the div tag
     st.markdown("</div>", unsafe_allow_html=True)
@@ -300,38 +366,42 @@ with st.sidebar:
     if st.session_state.active_tab == 'feed':
         # INDICES SUMMARY
         st.subheader('📊 Indices Snapshot')
-        indices = ['NIFTY 50', 'NIFTY IT', 'INDIA VIX']
-        indices_summary = get_indices_summary(indices)
-
-        # Create columns dynamically based on the number of indices
-        cols = st.columns(len(indices))
-
-        # Iterate through each index and corresponding column
-        for idx, (i, row) in enumerate(indices_summary.iterrows()):
-            with cols[idx]:
-                with st.container(border=True):
-                    # Smaller font for index name
-                    st.markdown(f"<div style='font-size: 12px; font-weight: 600'>{row['Index']}</div>",
-                                unsafe_allow_html=True)
-
-                    # Determine color based on % change value
-                    try:
-                        change_value = float(row['% Change'])
-                        value_color = 'green' if change_value >= 0 else 'red'
-                    except:
-                        value_color = 'black'  # fallback if % Change is not a number
-
-                    # Smaller font for value with color
-                    st.markdown(
-                        f"<div style='font-size: 16px; font-weight: bold; color: {value_color}'>{row['Value']}</div>",
-                        unsafe_allow_html=True
-                    )
+        indices = SNAPSHOT_INDICES
+        if live_feed is not None:
+            LiveQuotes.live_index_cards(live_feed.port, indices, live_feed.hub.snapshot('indices')['rows'],
+                                        url=live_feed.url)
+        else:
+            indices_summary = get_indices_summary(indices)
+
+            # Create columns dynamically based on the number of indices
+            cols = st.columns(len(indices))
+
+            # Iterate through each index and corresponding column
+            for idx, (i, row) in enumerate(indices_summary.iterrows()):
+                with cols[idx]:
+                    with st.container(border=True):
+                        # Smaller font for index name
+                        st.markdown(f"<div style='font-size: 12px; font-weight: 600'>{row['Index']}</div>",
+                                    unsafe_allow_html=True)
+
+                        # Determine color based on % change value
+                        try:
+                            change_value = float(row['% Change'])
+                            value_color = 'green' if change_value >= 0 else 'red'
+                        except:
+                            value_color = 'black'  # fallback if % Change is not a number
+
+                        # Smaller font for value with color
+                        st.markdown(
+                            f"<div style='font-size: 16px; font-weight: bold; color: {value_color}'>{row['Value']}</div>",
+                            unsafe_allow_html=True
+                        )
 
-                    # Smaller font for % change
-                    st.markdown(
-                        f"<div style='color: grey; font-size: 12px'>{row['% Change']}%</div>",
-                        unsafe_allow_html=True
-                    )
+                        # Smaller font for % change
+                        st.markdown(
+                            f"<div style='color: grey; font-size: 12px'>{row['% Change']}%</div>",
+                            unsafe_allow_html=True
+                        )
 
 
         # TOP GAINERS AND LOSERS
@@ -408,6 +478,7 @@ with st.sidebar:
         # Add stock section
         st.subheader("Add Indian Stock")
         new_stock = st.text_input("Enter NSE Symbol (e.g., TCS, RELIANCE)", key="tracker_input")
+        symbol_suggestions("tracker_input")
         if st.button("➕ Add to Tracker", type="primary", key="add_tracker"):
             if new_stock:
                 symbol = new_stock.upper().strip()
@@ -415,6 +486,7 @@ with st.sidebar:
                     full_symbol = symbol + ".NS"
                     if full_symbol not in st.session_state.tracked_stocks:
                         if validate_stock(full_symbol):
+                            portfolio_store.add_to_watchlist(st.session_state.user_id, full_symbol)
                             st.session_state.tracked_stocks.append(full_symbol)
                             st.success(f"Added {symbol}")
                             st.rerun()
@@ -429,6 +501,8 @@ with st.sidebar:
         st.subheader("⏰ Time Period")
         selected_period = st.radio("Select duration", list(period_options.keys()), index=2, key="tracker_period")
 
+        st.multiselect("📐 Indicators", list(indicator_options.keys()), key="tracker_indicators")
+
         st.divider()
 
         # Remove stocks section
@@ -442,6 +516,7 @@ with st.sidebar:
                     st.write(display_name)
                 with col2:
                     if st.button("❌", key=f"remove_tracker_{i}", help=f"Remove {display_name}"):
+                        portfolio_store.remove_from_watchlist(st.session_state.user_id, full_symbol)
                         st.session_state.tracked_stocks.remove(full_symbol)
                         st.rerun()
 
@@ -451,18 +526,27 @@ with st.sidebar:
         # Add stock to portfolio
         st.subheader("Add Stock to Portfolio")
         portfolio_stock = st.text_input("Enter NSE Symbol", key="portfolio_input")
+        symbol_suggestions("portfolio_input")
         quantity = st.number_input("Quantity", min_value=1, value=1, key="quantity")
         avg_price = st.number_input("Average Buy Price (₹)", min_value=0.01, value=100.0, step=0.01, key="avg_price")
 
         if st.button("➕ Add to Portfolio", type="primary", key="add_portfolio"):
             add_stock_to_portfolio(portfolio_stock.upper().strip(), quantity, avg_price)
 
+        # Bulk import from a broker tradebook / contract-note export
+        st.subheader("Import Tradebook")
+        tradebook = st.file_uploader("Broker tradebook CSV", type="csv", key="tradebook_file")
+        if tradebook is not None and st.button("📥 Import Trades", key="import_tradebook"):
+            import_tradebook(tradebook)
+
         st.divider()
 
         # Portfolio time period
         st.subheader("⏰ Time Period")
         portfolio_period = st.radio("Select duration", list(period_options.keys()), index=2, key="portfolio_period")
 
+        st.multiselect("📐 Indicators", list(indicator_options.keys()), key="portfolio_indicators")
+
         st.divider()
 
         # Remove from portfolio
@@ -471,8 +555,9 @@ with st.sidebar:
             for i, (symbol, holding) in enumerate(st.session_state.portfolio.items()):
                 stock_name = symbol.replace('.NS', '')
                 st.write(f"**{stock_name}**")
-                st.write(f"Qty: {holding['quantity']} @ ₹{holding['avg_price']:.2f}")
+                st.write(f"Qty: {holding['quantity']:g} @ ₹{holding['avg_price']:.2f}")
                 if st.button("❌ Remove", key=f"remove_portfolio_{i}"):
+                    portfolio_store.delete_holding(st.session_state.user_id, symbol)
                     del st.session_state.portfolio[symbol]
                     st.rerun()
                 st.write("---")
@@ -481,6 +566,8 @@ with st.sidebar:
 if st.session_state.active_tab == "feed":
     st.subheader("📢 Today’s Top Stock News")
 
+    from news_api_handler import fetch_today_news
+
     news_items = fetch_today_news()
     fallback_image = "res/images/stocky_bhai_news.png"
 
@@ -532,6 +619,9 @@ if st.session_state.active_tab == "feed":
                 """, unsafe_allow_html=True)
 
 if st.session_state.active_tab == "research":
+    from news_api_handler import fetch_query_news
+    from llm_handler import stream_stock_analysis
+
     st.subheader("🔍 Stock Analyzer")
 
     col1, col2 = st.columns([4, 1])  # Wider input, smaller button
@@ -543,6 +633,8 @@ if st.session_state.active_tab == "research":
     with col2:
         if st.button("Summarize", type='primary'):
             summarize_triggered = True
+        fast_summary = st.toggle("⚡ Fast mode", key="fast_summary",
+                                 help="Analyze a capped amount of article text in one call for quicker results")
 
     if query:
         news_results = fetch_query_news(query, page_size=16)
@@ -575,11 +667,13 @@ if st.session_state.active_tab == "research":
                     """, unsafe_allow_html=True)
 
             if summarize_triggered and urls:
-                summary = summarize_stock_articles_structured(query, urls)
+                with st.spinner("Reading the articles..."):
+                    analysis_stream = stream_stock_analysis(query, urls, fast=fast_summary)
 
-                # Summary
+                # Summary, rendered as it is generated
                 st.markdown("#### 📝 Summary")
-                st.markdown(summary.summary)
+                st.write_stream(analysis_stream)
+                summary = analysis_stream.result
 
                 # Key Events
                 st.markdown("### 📌 Key Events")
@@ -630,6 +724,9 @@ if st.session_state.active_tab == "research":
                 )
                 st.markdown(f"**Reason:** {summary.suggestion.reason}")
 
+if st.session_state.active_tab in ("tracker", "portfolio"):
+    import plotly.graph_objs as go
+
 if st.session_state.active_tab == "tracker":
     # Tracker content
     if not st.session_state.tracked_stocks:
@@ -651,6 +748,10 @@ if st.session_state.active_tab == "tracker":
 
         st.subheader(f"📈 Tracking {len(st.session_state.tracked_stocks)} Stock(s) - {selected_period}")
 
+        # Fetch every tracked symbol in one batched download
+        period, interval = period_options[selected_period]
+        tracked_history = get_stocks_history(tuple(sorted(st.session_state.tracked_stocks)), period, interval)
+
         # Display tracker charts
         cols = st.columns(2) if len(st.session_state.tracked_stocks) > 1 else [st.container()]
 
@@ -661,9 +762,7 @@ if st.session_state.active_tab == "tracker":
                 stock_name = stock_symbol.replace('.NS', '')
 
                 try:
-                    period, interval = period_options[selected_period]
-                    stock = yf.Ticker(stock_symbol)
-                    data = stock.history(period=period, interval=interval)
+                    data = get_symbol_history(tracked_history, stock_symbol)
 
                     if data.empty:
                         st.warning(f"📊 No data available for {stock_name}")
@@ -684,24 +783,11 @@ if st.session_state.active_tab == "tracker":
                         st.metric("Change", f"₹{price_change:.2f}", f"{price_change_pct:.2f}%")
 
                     # Create chart
-                    fig = go.Figure()
-                    fig.add_trace(go.Scatter(
-                        x=data.index,
-                        y=data['Close'],
-                        mode='lines',
-                        name=f'{stock_name} Price',
-                        line=dict(
-                            color='#1f77b4' if price_change >= 0 else '#d62728',
-                            width=2
-                        )
-                    ))
-
-                    fig.update_layout(
+                    fig = build_price_chart(
+                        data, stock_symbol, interval, st.session_state.get('tracker_indicators', []),
+                        line_color='#1f77b4' if price_change >= 0 else '#d62728',
+                        line_name=f'{stock_name} Price',
                         title=f"{stock_name} - {selected_period} Performance",
-                        xaxis_title="Date/Time",
-                        yaxis_title="Price (₹)",
-                        height=400,
-                        showlegend=False
                     )
 
                     st.plotly_chart(fig, use_container_width=True)
@@ -723,39 +809,18 @@ elif st.session_state.active_tab == "portfolio":
     else:
         st.subheader(f"💼 My Portfolio - {len(st.session_state.portfolio)} Holdings")
 
-        # Collect current prices and calculate metrics
-        portfolio_data = []
-        total_invested = 0
-        total_current_value = 0
+        # One batched quote call for every holding, then value the whole book at once
+        holding_symbols = tuple(sorted(st.session_state.portfolio))
+        recent_closes = get_recent_closes(holding_symbols)
+        valuation = value_portfolio(st.session_state.portfolio, latest_prices(recent_closes))
 
-        for symbol, holding in st.session_state.portfolio.items():
-            current_price = get_stock_price(symbol)
-            if current_price:
-                stock_name = symbol.replace('.NS', '')
-                invested = holding['quantity'] * holding['avg_price']
-                current_value = holding['quantity'] * current_price
-                pnl = current_value - invested
-                pnl_pct = (pnl / invested) * 100
-
-                portfolio_data.append({
-                    'Stock': stock_name,
-                    'Quantity': holding['quantity'],
-                    'Avg Price': holding['avg_price'],
-                    'Current Price': current_price,
-                    'Invested': invested,
-                    'Current Value': current_value,
-                    'P&L': pnl,
-                    'P&L %': pnl_pct,
-                    'Symbol': symbol
-                })
-
-                total_invested += invested
-                total_current_value += current_value
-
-        if portfolio_data:
+        if not valuation.empty:
             # Portfolio Summary Cards
-            total_pnl = total_current_value - total_invested
-            total_pnl_pct = (total_pnl / total_invested) * 100 if total_invested > 0 else 0
+            totals = summarize_portfolio(valuation)
+            total_invested = totals['total_invested']
+            total_current_value = totals['total_current_value']
+            total_pnl = totals['total_pnl']
+            total_pnl_pct = totals['total_pnl_pct']
 
             col1, col2, col3, col4 = st.columns(4)
             with col1:
@@ -765,17 +830,54 @@ elif st.session_state.active_tab == "portfolio":
             with col3:
                 st.metric("💵 Total P&L", f"₹{total_pnl:,.2f}", f"{total_pnl_pct:.2f}%")
             with col4:
-                daily_return = 0  # Calculate daily return if needed
-                st.metric("📊 Daily Return", f"₹{daily_return:,.2f}")
+                # Day-over-day change of the NAV built from the same closes used for pricing
+                daily_return, daily_return_pct = nav_change(portfolio_nav(recent_closes, st.session_state.portfolio))
+                st.metric("📊 Daily Return", f"₹{daily_return:,.2f}", f"{daily_return_pct:.2f}%")
 
             st.divider()
 
+            # Chart histories for every holding in one batched download
+            period, interval = period_options[portfolio_period]
+            portfolio_history = get_stocks_history(holding_symbols, period, interval)
+
+            # Combined portfolio value chart
+            nav = portfolio_nav(portfolio_history, st.session_state.portfolio)
+            if not nav.empty:
+                st.subheader(f"📈 Portfolio Value - {portfolio_period}")
+
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(
+                    x=nav.index,
+                    y=nav,
+                    mode='lines',
+                    name='Portfolio Value',
+                    line=dict(color='#1f77b4' if nav.iloc[-1] >= nav.iloc[0] else '#d62728', width=2)
+                ))
+
+                fig.add_hline(
+                    y=total_invested,
+                    line_dash="dash",
+                    line_color="red",
+                    annotation_text=f"Invested: ₹{total_invested:,.2f}"
+                )
+
+                fig.update_layout(
+                    xaxis_title="Date/Time",
+                    yaxis_title="Value (₹)",
+                    height=400,
+                    showlegend=False
+                )
+
+                st.plotly_chart(fig, use_container_width=True)
+
+                st.divider()
+
             # Individual Stock Performance
             st.subheader("📊 Individual Stock Performance")
 
-            cols = st.columns(2) if len(portfolio_data) > 1 else [st.container()]
+            cols = st.columns(2) if len(valuation) > 1 else [st.container()]
 
-            for idx, stock_data in enumerate(portfolio_data):
+            for idx, stock_data in enumerate(valuation.to_dict('records')):
                 container = cols[idx % 2] if len(cols) > 1 else cols[0]
 
                 with container:
@@ -784,7 +886,7 @@ elif st.session_state.active_tab == "portfolio":
 
                     metric_col1, metric_col2, metric_col3 = st.columns(3)
                     with metric_col1:
-                        st.metric("Holdings", f"{stock_data['Quantity']} shares")
+                        st.metric("Holdings", f"{stock_data['Quantity']:g} shares")
                     with metric_col2:
                         st.metric("Current Price", f"₹{stock_data['Current Price']:.2f}")
                     with metric_col3:
@@ -792,36 +894,23 @@ elif st.session_state.active_tab == "portfolio":
 
                     # Stock chart
                     try:
-                        period, interval = period_options[portfolio_period]
-                        stock = yf.Ticker(stock_data['Symbol'])
-                        data = stock.history(period=period, interval=interval)
+                        data = get_symbol_history(portfolio_history, stock_data['Symbol'])
 
                         if not data.empty:
-                            fig = go.Figure()
-
-                            # Add price line
-                            fig.add_trace(go.Scatter(
-                                x=data.index,
-                                y=data['Close'],
-                                mode='lines',
-                                name='Price',
-                                line=dict(color='#1f77b4', width=2)
-                            ))
+                            fig = build_price_chart(
+                                data, stock_data['Symbol'], interval,
+                                st.session_state.get('portfolio_indicators', []),
+                                line_color='#1f77b4', line_name='Price',
+                                title=f"{stock_data['Stock']} vs Your Average Price",
+                            )
 
                             # Add average price line
                             fig.add_hline(
                                 y=stock_data['Avg Price'],
                                 line_dash="dash",
                                 line_color="red",
-                                annotation_text=f"Avg Buy: ₹{stock_data['Avg Price']:.2f}"
-                            )
-
-                            fig.update_layout(
-                                title=f"{stock_data['Stock']} vs Your Average Price",
-                                xaxis_title="Date/Time",
-                                yaxis_title="Price (₹)",
-                                height=400,
-                                showlegend=False
+                                annotation_text=f"Avg Buy: ₹{stock_data['Avg Price']:.2f}",
+                                row=1, col=1
                             )
 
                             st.plotly_chart(fig, use_container_width=True)
@@ -834,19 +923,25 @@ elif st.session_state.active_tab == "portfolio":
             # Portfolio Summary Table
             st.subheader("📋 Portfolio Summary Table")
 
-            df = pd.DataFrame(portfolio_data)
-            df_display = df[
-                ['Stock', 'Quantity', 'Avg Price', 'Current Price', 'Invested', 'Current Value', 'P&L', 'P&L %']].copy()
-
-            # Format currency columns
-            df_display['Avg Price'] = df_display['Avg Price'].apply(lambda x: f"₹{x:.2f}")
-            df_display['Current Price'] = df_display['Current Price'].apply(lambda x: f"₹{x:.2f}")
-            df_display['Invested'] = df_display['Invested'].apply(lambda x: f"₹{x:,.2f}")
-            df_display['Current Value'] = df_display['Current Value'].apply(lambda x: f"₹{x:,.2f}")
-            df_display['P&L'] = df_display['P&L'].apply(lambda x: f"₹{x:,.2f}")
-            df_display['P&L %'] = df_display['P&L %'].apply(lambda x: f"{x:.2f}%")
-
-            st.dataframe(df_display, use_container_width=True, hide_index=True)
+            df_display = valuation[
+                ['Stock', 'Quantity', 'Avg Price', 'Current Price', 'Invested', 'Current Value', 'P&L', 'P&L %',
+                 'Weight %']]
+
+            # Format whole columns at render time instead of converting every cell to a string
+            st.dataframe(
+                df_display.style.format({
+                    'Quantity': '{:g}',
+                    'Avg Price': '₹{:.2f}',
+                    'Current Price': '₹{:.2f}',
+                    'Invested': '₹{:,.2f}',
+                    'Current Value': '₹{:,.2f}',
+                    'P&L': '₹{:,.2f}',
+                    'P&L %': '{:.2f}%',
+                    'Weight %': '{:.2f}%',
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
 
             # Overall Portfolio Stats
             st.subheader("📊 Overall Portfolio Statistics")
@@ -855,7 +950,7 @@ elif st.session_state.active_tab == "portfolio":
 
             with stats_col1:
                 st.markdown("**Investment Summary:**")
-                st.write(f"• Total Stocks: {len(portfolio_data)}")
+                st.write(f"• Total Stocks: {len(valuation)}")
                 st.write(f"• Total Invested: ₹{total_invested:,.2f}")
                 st.write(f"• Current Portfolio Value: ₹{total_current_value:,.2f}")
 
@@ -863,41 +958,26 @@ elif st.session_state.active_tab == "portfolio":
                 st.markdown("**Performance Summary:**")
                 st.write(f"• Total P&L: ₹{total_pnl:,.2f}")
                 st.write(f"• Total Return: {total_pnl_pct:.2f}%")
-                best_performer = max(portfolio_data, key=lambda x: x['P&L %'])
-                worst_performer = min(portfolio_data, key=lambda x: x['P&L %'])
+                best_performer = totals['best_performer']
+                worst_performer = totals['worst_performer']
                 st.write(f"• Best Performer: {best_performer['Stock']} ({best_performer['P&L %']:.2f}%)")
                 st.write(f"• Worst Performer: {worst_performer['Stock']} ({worst_performer['P&L %']:.2f}%)")
 
 if st.session_state.active_tab == "market":
-    def get_gradient_color(perc):
-        clamp = 5
-        perc = max(-clamp, min(clamp, perc))  # Clamp between -5% and +5%
-        if perc >= 0:
-            green_intensity = int(255 * min(1, perc / clamp))
-            return f"rgb({255 - green_intensity}, 255, {255 - green_intensity})"
-        else:
-            red_intensity = int(255 * min(1, -perc / clamp))
-            return f"rgb(255, {255 - red_intensity}, {255 - red_intensity})"
-
     st.title('📊 Indices Heatmap')
-    df = get_nse_indices_data()
-
-    INDEX_CARDS_PER_ROW = 5
-    # Display grid
-    cols = st.columns(INDEX_CARDS_PER_ROW)  # 3 cards per row
-    for i, row in df.iterrows():
-        with cols[i % INDEX_CARDS_PER_ROW]:
-            bg_color = get_gradient_color(row['percChange'])
-            st.markdown(f"""
-                <div style="border: 1px solid #ccc; border-radius: 10px; padding: 10px; margin: 5px;
-                            background: {bg_color}; color: #000;">
-                    <h5 style="margin-bottom: 2px;">{row['indexName']}</h5>
-                    <div style="display: flex; justify-content: space-between; align-items: center;">
-                        <div style="font-size: 18px;"><b>{row['last']}</b></div>
-                        <div style="font-size: 18px;"><b>{row['percChange']}%</b></div>
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
+    all_indices = get_all_indices()
+    if all_indices.empty:
+        st.info("Loading indices...")
+    else:
+        # Every index in one component; sorting and filtering happen in the browser
+        IndicesHeatmap.indices_heatmap(all_indices, port=live_feed.port if live_feed is not None else None,
+                                       url=live_feed.url if live_feed is not None else '')
+
+    st.title('🗺️ F&O Sector Map')
+    treemap_size = st.radio("Size tiles by", list(FnoTreemap.SIZE_OPTIONS.keys()), horizontal=True,
+                            key="treemap_size")
+    # Drawn from the poller's positions snapshot: no request of its own
+    FnoTreemap.fno_treemap(st.session_state.nse_positions_data, treemap_size)
 
 
 # Footer
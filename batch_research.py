@@ -0,0 +1,225 @@
+"""
+Headless batch research: StockAnalysis reports for a whole watchlist in one run.
+
+Each symbol flows through three stages, each with its own bounded worker pool:
+
+    news (fetch_news_for_queries) -> scrape (scrape_multiple_articles) -> analyze (analyze_articles_text)
+
+Reports are appended to a JSONL file as they complete, so an interrupted run resumes where it
+stopped: symbols already in the output file are skipped. Symbols that fail are not written and get
+retried by the next run.
+
+Usage:
+    python batch_research.py --out reports/fno_research.jsonl
+    python batch_research.py --symbols TCS,INFY --fast --out reports/it.jsonl --parquet reports/it.parquet
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from tqdm import tqdm
+from news_api_handler import fetch_news_for_queries
+from scrapper import scrape_multiple_articles
+from llm_handler import analyze_articles_text, has_enough_content, no_content_analysis
+import nse_handler
+
+STAGES = ('news', 'scrape', 'analyze')
+NEWS_GROUP_SIZE = 10  # Symbols per combined NewsAPI query
+
+
+class StageStats:
+    """Thread-safe per-stage counters for the throughput report."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.completed = {stage: 0 for stage in STAGES}
+        self.failed = {stage: 0 for stage in STAGES}
+        self.busy_seconds = {stage: 0.0 for stage in STAGES}
+
+    def record(self, stage: str, seconds: float, ok: bool):
+        with self._lock:
+            self.busy_seconds[stage] += seconds
+            if ok:
+                self.completed[stage] += 1
+            else:
+                self.failed[stage] += 1
+
+    def report(self, wall_seconds: float) -> str:
+        lines = [f"{'stage':<10}{'done':>6}{'failed':>8}{'avg latency (s)':>18}{'throughput (/min)':>20}"]
+        for stage in STAGES:
+            done = self.completed[stage]
+            avg = self.busy_seconds[stage] / max(1, done + self.failed[stage])
+            rate = done / wall_seconds * 60 if wall_seconds else 0
+            lines.append(f"{stage:<10}{done:>6}{self.failed[stage]:>8}{avg:>18.2f}{rate:>20.1f}")
+        return "\n".join(lines)
+
+
+def load_fno_watchlist() -> dict:
+    """{symbol: news query} for every F&O stock, using the company name as the query when available."""
+    df = nse_handler.fetch_nse_positions_data()
+    if 'priority' in df.columns:
+        df = df[df['priority'] == 0]  # Drop the index summary row
+
+    watchlist = {}
+    for _, row in df.iterrows():
+        meta = row.get('meta') if isinstance(row.get('meta'), dict) else {}
+        watchlist[row['symbol']] = meta.get('companyName') or row['symbol']
+    return watchlist
+
+
+def completed_symbols(path: str) -> set:
+    """Symbols that already have a report in the output file (a torn last line is ignored)."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['symbol'])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def run_batch(watchlist: dict, out_path: str, fast: bool = False,
+              news_workers: int = 2, scrape_workers: int = 8, analyze_workers: int = 2,
+              articles_per_symbol: int = 5) -> StageStats:
+    """Run the research pipeline for every symbol in `watchlist` not yet present in `out_path`."""
+    done = completed_symbols(out_path)
+    pending = {symbol: query for symbol, query in watchlist.items() if symbol not in done}
+    stats = StageStats()
+    results = queue.Queue()
+
+    if done:
+        print(f"Resuming: {len(done)} symbols already done, {len(pending)} to go.")
+    if not pending:
+        return stats
+
+    pools = {
+        'news': ThreadPoolExecutor(news_workers, thread_name_prefix='news'),
+        'scrape': ThreadPoolExecutor(scrape_workers, thread_name_prefix='scrape'),
+        'analyze': ThreadPoolExecutor(analyze_workers, thread_name_prefix='analyze'),
+    }
+
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        try:
+            value = func(*args)
+        except Exception:
+            stats.record(stage, time.perf_counter() - start, ok=False)
+            raise
+        stats.record(stage, time.perf_counter() - start, ok=True)
+        return value
+
+    def analyze_stage(symbol, query, urls, articles_text):
+        try:
+            if has_enough_content(articles_text):
+                analysis = timed('analyze', analyze_articles_text, symbol, articles_text, fast)
+            else:
+                # Articles were scraped but say too little to analyze: a final report, not a failure
+                analysis = no_content_analysis(symbol)
+            results.put((symbol, {'symbol': symbol, 'query': query, 'urls': urls,
+                                  'generated_at': datetime.now().isoformat(timespec='seconds'),
+                                  'analysis': analysis.model_dump()}))
+        except Exception as e:
+            results.put((symbol, e))
+
+    def scrape_stage(symbol, query, urls):
+        # No URLs or no scraped text is usually a transient NewsAPI or site failure rather than a
+        # quiet stock, so the symbol is reported as failed and retried by the next run
+        if not urls:
+            results.put((symbol, RuntimeError("no article URLs")))
+            return
+        try:
+            articles_text = timed('scrape', scrape_multiple_articles, urls)
+            if not articles_text.strip():
+                results.put((symbol, RuntimeError("no article text could be scraped")))
+                return
+            pools['analyze'].submit(analyze_stage, symbol, query, urls, articles_text)
+        except Exception as e:
+            results.put((symbol, e))
+
+    def news_stage(group):
+        try:
+            news = timed('news', fetch_news_for_queries, [query for _, query in group], articles_per_symbol)
+        except Exception as e:
+            for symbol, _ in group:
+                results.put((symbol, e))
+            return
+        for symbol, query in group:
+            if query not in news:
+                results.put((symbol, RuntimeError("news request failed")))
+                continue
+            urls = [article['url'] for article in news[query] if article.get('url')]
+            pools['scrape'].submit(scrape_stage, symbol, query, urls)
+
+    start = time.perf_counter()
+    # Several symbols share one combined NewsAPI request, which keeps a full run within the daily quota
+    items = list(pending.items())
+    for i in range(0, len(items), NEWS_GROUP_SIZE):
+        pools['news'].submit(news_stage, items[i:i + NEWS_GROUP_SIZE])
+
+    # Single writer: reports are appended and flushed one by one so a crash loses at most one line
+    with open(out_path, 'a', encoding='utf-8') as out, tqdm(total=len(pending), unit='symbol') as progress:
+        for _ in range(len(pending)):
+            symbol, result = results.get()
+            if isinstance(result, Exception):
+                tqdm.write(f"[ERROR] {symbol}: {result}")
+            else:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+            progress.update(1)
+
+    for pool in pools.values():
+        pool.shutdown(wait=True)
+
+    print(stats.report(time.perf_counter() - start))
+    return stats
+
+
+def export_parquet(jsonl_path: str, parquet_path: str):
+    """Flatten the JSONL reports into a Parquet table (one row per symbol)."""
+    import pandas as pd
+
+    with open(jsonl_path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    df = pd.json_normalize(records)
+    # Nested lists (urls, key events) are kept as JSON strings
+    for column in df.columns:
+        if df[column].map(lambda value: isinstance(value, (list, dict))).any():
+            df[column] = df[column].map(json.dumps)
+    df.to_parquet(parquet_path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch StockAnalysis reports for a watchlist.")
+    parser.add_argument('--out', default=os.path.join('reports', 'fno_research.jsonl'), help="JSONL output path")
+    parser.add_argument('--symbols', help="Comma separated NSE symbols (default: the whole F&O universe)")
+    parser.add_argument('--fast', action='store_true', help="Use fast mode analysis (capped input, single call)")
+    parser.add_argument('--news-workers', type=int, default=2)
+    parser.add_argument('--scrape-workers', type=int, default=8)
+    parser.add_argument('--analyze-workers', type=int, default=2)
+    parser.add_argument('--parquet', help="Also export all reports to this Parquet file at the end")
+    args = parser.parse_args(argv)
+
+    if args.symbols:
+        watchlist = {symbol.strip().upper(): symbol.strip().upper() for symbol in args.symbols.split(',') if symbol.strip()}
+    else:
+        watchlist = load_fno_watchlist()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    run_batch(watchlist, args.out, fast=args.fast, news_workers=args.news_workers,
+              scrape_workers=args.scrape_workers, analyze_workers=args.analyze_workers)
+
+    if args.parquet:
+        export_parquet(args.out, args.parquet)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Compare the single-pass `scrapper.extract_main_text` against the old per-candidate scan.
+
+Usage (from the repo root):
+    python benchmarks/bench_extractor.py [saved_page.html ...]
+
+Pages saved from news sites (browser "Save Page As... HTML only") can be passed on the command
+line or dropped into benchmarks/fixtures/. The fixtures committed there are hand-written pages in
+the layouts of common Indian markets sites (article, results brief, nested app layout, live blog);
+tests/test_extractor.py checks both extractors agree on every one of them. A synthetic deeply
+nested page is always included, since that is the shape that made the old scan quadratic.
+"""
+import glob
+import os
+import sys
+import time
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from scrapper import extract_main_text, HTML_PARSER  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def legacy_extract(soup: BeautifulSoup, min_length: int = 1000) -> str:
+    """The extractor as it was before the single-pass rewrite, kept for comparison."""
+    candidates = soup.find_all(['article', 'main', 'div'], recursive=True)
+
+    best_text = ''
+    max_len = 0
+
+    for candidate in candidates:
+        paragraphs = candidate.find_all('p')
+        content = ' '.join(p.get_text(strip=True) for p in paragraphs)
+        if len(content) > max_len:
+            best_text = content
+            max_len = len(content)
+
+        if max_len > 10000:
+            break
+
+    if len(best_text.strip()) < min_length:
+        paragraphs = soup.find_all('p')
+        best_text = ' '.join(p.get_text(strip=True) for p in paragraphs)
+
+    return best_text.strip()
+
+
+def synthetic_page(depth: int = 400, paragraphs_per_level: int = 1) -> str:
+    """
+    A news-like page whose paragraphs sit inside `depth` nested wrapper divs.
+
+    The total text stays under the early-exit threshold, so the old scan has to visit every div.
+    """
+    sentence = "Shares rose today."
+    body = []
+    for level in range(depth):
+        body.append(f'<div class="wrapper-{level}">')
+        body.extend(f"<p>{sentence}</p>" for _ in range(paragraphs_per_level))
+    body.extend("</div>" for _ in range(depth))
+    return f"<html><head><title>Synthetic</title></head><body>{''.join(body)}</body></html>"
+
+
+def time_call(func, soup, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(soup)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    pages = {'synthetic (depth 400)': synthetic_page()}
+    for path in sys.argv[1:] + sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html'))):
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            pages[os.path.basename(path)] = f.read()
+
+    print(f"{'page':<40}{'legacy (s)':>12}{'single-pass (s)':>18}{'speedup':>10}")
+    for name, html in pages.items():
+        soup = BeautifulSoup(html, HTML_PARSER)
+        if legacy_extract(soup) != extract_main_text(soup):
+            print(f"[WARN] {name}: extractors disagree")
+
+        legacy = time_call(legacy_extract, soup)
+        single_pass = time_call(extract_main_text, soup)
+        print(f"{name[:39]:<40}{legacy:>12.4f}{single_pass:>18.4f}{legacy / single_pass:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
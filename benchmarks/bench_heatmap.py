@@ -0,0 +1,81 @@
+"""
+Time building the Market tab heatmap for growing numbers of indices.
+
+Usage (from the repo root):
+    python benchmarks/bench_heatmap.py [--sizes 20 100 500 2000]
+
+Compares the old per-card path (iterrows + a Python color function + one HTML string per card,
+each sent as its own st.markdown message) with the single-payload component (vectorized colors,
+one page for the whole grid).
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from components.IndicesHeatmap import heatmap_colors, _render_page  # noqa: E402
+
+
+def synthetic_indices(count: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'indexName': [f'NIFTY INDEX {i}' for i in range(count)],
+        'indexType': rng.choice(['Broad Market', 'Sectoral', 'Thematic', 'Strategy'], count),
+        'indexOrder': np.arange(count),
+        'last': rng.uniform(100, 60000, count).round(2),
+        'percChange': rng.normal(0, 1.5, count).round(2),
+    })
+
+
+def gradient_color(perc):
+    """The per-row color function the Market tab used before."""
+    clamp = 5
+    perc = max(-clamp, min(clamp, perc))
+    if perc >= 0:
+        green_intensity = int(255 * min(1, perc / clamp))
+        return f"rgb({255 - green_intensity}, 255, {255 - green_intensity})"
+    red_intensity = int(255 * min(1, -perc / clamp))
+    return f"rgb(255, {255 - red_intensity}, {255 - red_intensity})"
+
+
+def per_card_markdown(df: pd.DataFrame) -> list:
+    cards = []
+    for _, row in df.iterrows():
+        cards.append(f"""
+            <div style="background: {gradient_color(row['percChange'])};">
+                <h5>{row['indexName']}</h5><b>{row['last']}</b><b>{row['percChange']}%</b>
+            </div>""")
+    return cards
+
+
+def best_of(function, *args, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 100, 500, 2000])
+    args = parser.parse_args()
+
+    check = synthetic_indices(1000)
+    if list(heatmap_colors(check['percChange'])) != [gradient_color(p) for p in check['percChange']]:
+        print("[WARN] vectorized colors disagree with the per-row color function")
+
+    print(f"{'indices':>8}{'per-card (ms)':>16}{'messages':>10}{'payload (ms)':>15}{'messages':>10}")
+    for size in args.sizes:
+        df = synthetic_indices(size)
+        old = best_of(per_card_markdown, df)
+        new = best_of(_render_page, df, None)
+        print(f"{size:>8}{old * 1000:>16.2f}{size:>10}{new * 1000:>15.2f}{1:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Time the indicator engine over a large synthetic universe of daily bars.
+
+Usage (from the repo root):
+    python benchmarks/bench_indicators.py [--symbols 2000] [--years 10]
+
+Every indicator is computed for all symbols at once on a (symbols x bars) block, then extended by
+one appended bar from the saved state (the incremental path used when a chart gains a new bar).
+SMA and EMA are spot-checked against pandas on one symbol; tests/test_indicators.py checks every
+indicator, and the chunked path, against pandas.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from indicators import INDICATORS  # noqa: E402
+
+TRADING_DAYS_PER_YEAR = 252
+
+PARAMS = {
+    'sma': {'window': 50},
+    'ema': {'span': 20},
+    'rsi': {'period': 14},
+    'macd': {'fast': 12, 'slow': 26, 'signal': 9},
+    'bollinger': {'window': 20, 'num_std': 2},
+    'vwap': {},
+    'atr': {'period': 14},
+}
+
+
+def synthetic_bars(symbols: int, bars: int, seed: int = 0) -> dict:
+    """Random-walk OHLCV arrays of shape (symbols, bars)."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, (symbols, bars)), axis=1))
+    spread = np.abs(rng.normal(0, 0.01, (symbols, bars)))
+    return {
+        'close': close,
+        'high': close * (1 + spread),
+        'low': close * (1 - spread),
+        'volume': rng.integers(10_000, 1_000_000, (symbols, bars)).astype(float),
+    }
+
+
+def split(bars: dict, at: int):
+    return ({field: values[:, :at] for field, values in bars.items()},
+            {field: values[:, at:] for field, values in bars.items()})
+
+
+def check_against_pandas(bars: dict):
+    close = pd.Series(bars['close'][0])
+    checks = {
+        'sma': (INDICATORS['sma']({'close': bars['close'][:1]}, window=50)[0]['sma'][0], close.rolling(50).mean()),
+        'ema': (INDICATORS['ema']({'close': bars['close'][:1]}, span=20)[0]['ema'][0],
+                close.ewm(span=20, adjust=False).mean()),
+    }
+    for name, (ours, reference) in checks.items():
+        if not np.allclose(ours, reference, equal_nan=True):
+            print(f"[WARN] {name} disagrees with pandas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--years', type=int, default=10)
+    args = parser.parse_args()
+
+    length = args.years * TRADING_DAYS_PER_YEAR
+    bars = synthetic_bars(args.symbols, length + 1)
+    history, appended = split(bars, length)
+    check_against_pandas(history)
+
+    print(f"{args.symbols} symbols x {length} daily bars ({args.symbols * length / 1e6:.1f}M bars)\n")
+    print(f"{'indicator':<12}{'full (ms)':>12}{'+1 bar (ms)':>14}")
+    total_full = total_incremental = 0.0
+    for name, function in INDICATORS.items():
+        start = time.perf_counter()
+        _, state = function(history, None, **PARAMS[name])
+        full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        function(appended, state, **PARAMS[name])
+        incremental = time.perf_counter() - start
+
+        total_full += full
+        total_incremental += incremental
+        print(f"{name:<12}{full * 1000:>12.1f}{incremental * 1000:>14.2f}")
+
+    print(f"{'total':<12}{total_full * 1000:>12.1f}{total_incremental * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
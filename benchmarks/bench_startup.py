@@ -0,0 +1,108 @@
+"""
+Measure the cold-start import cost of the app's modules with `python -X importtime`.
+
+Usage (from the repo root):
+    python benchmarks/bench_startup.py [--repeat 3] [--top 15]
+
+Each module is imported in a fresh interpreter, the way a new Streamlit worker does. The "startup"
+group is what app.py imports on every run; the "deferred" group is only imported when a tab that
+needs it is opened. For each module the best self + cumulative time over the repeats is reported,
+followed by the slowest individual imports of the whole startup path.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+STARTUP_MODULES = [
+    'streamlit',
+    'components.TickerTape',
+    'market_poller',
+    'nse_handler',
+    'market_data_handler',
+    'portfolio_engine',
+]
+
+DEFERRED_MODULES = [
+    'news_api_handler',
+    'llm_handler',
+    'yfinance',
+    'plotly.graph_objs',
+    'nsepython',
+]
+
+# import time: self [us] | cumulative | imported package
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_times(modules: str) -> dict:
+    """{imported module: (self us, cumulative us, depth)} for one cold `import <modules>`."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modules}'],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'
+        raise RuntimeError(last_line)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            times[name] = (int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+    return times
+
+
+def best_of(modules: str, repeat: int) -> dict:
+    """Keep the fastest cumulative time seen for every imported module across `repeat` runs."""
+    best = {}
+    for _ in range(repeat):
+        for name, timing in import_times(modules).items():
+            if name not in best or timing[1] < best[name][1]:
+                best[name] = timing
+    return best
+
+
+def report(title: str, modules: list, repeat: int):
+    """Cold import time of each module on its own (shared dependencies are counted in each)."""
+    print(f"\n{title}")
+    print(f"{'module':<28}{'cumulative (ms)':>18}")
+    for module in modules:
+        try:
+            times = best_of(module, repeat)
+        except RuntimeError as e:
+            print(f"{module:<28}{'failed':>18}  ({e})")
+            continue
+        print(f"{module:<28}{times[module][1] / 1000:>18.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help="Cold imports per module (best is kept)")
+    parser.add_argument('--top', type=int, default=15, help="Slowest startup imports to list")
+    args = parser.parse_args()
+
+    report("Startup path (imported by app.py on every run)", STARTUP_MODULES, args.repeat)
+    report("Deferred (imported by the tab that needs it)", DEFERRED_MODULES, args.repeat)
+
+    # The whole startup path in one interpreter, so shared dependencies are only paid once
+    try:
+        startup = best_of(", ".join(STARTUP_MODULES), args.repeat)
+    except RuntimeError as e:
+        print(f"\nStartup path failed to import: {e}")
+        return
+    # Top-level entries only: nested ones are already included in their importer's cumulative time
+    total_us = sum(cumulative_us for _, cumulative_us, depth in startup.values() if depth == 0)
+    print(f"\nStartup path total: {total_us / 1000:.1f} ms")
+
+    print("\nSlowest startup imports (self time):")
+    for name, (self_us, cumulative_us, _) in sorted(startup.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"{name:<50}{self_us / 1000:>10.1f} ms self{cumulative_us / 1000:>10.1f} ms cumulative")
+
+
+if __name__ == "__main__":
+    main()
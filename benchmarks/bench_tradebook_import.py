@@ -0,0 +1,66 @@
+"""
+Time a bulk tradebook import and the session-start portfolio query against a scratch database.
+
+Usage (from the repo root):
+    python benchmarks/bench_tradebook_import.py [--trades 50000] [--symbols 300]
+
+Generates a Zerodha-style tradebook CSV, imports it twice (the second import must add nothing),
+then rebuilds the holdings with the single ordered query the Portfolio tab runs at session start.
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from portfolio_store import PortfolioStore  # noqa: E402
+
+
+def synthetic_tradebook(trades: int, symbols: int, seed: int = 0) -> str:
+    rng = np.random.default_rng(seed)
+    traded_at = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 5 * 365 * 24 * 60, trades), 'min')
+    return pd.DataFrame({
+        'symbol': rng.choice([f'STOCK{i}' for i in range(symbols)], trades),
+        'isin': 'INE000000000',
+        'trade_date': traded_at.strftime('%Y-%m-%d'),
+        'exchange': 'NSE',
+        'segment': 'EQ',
+        'series': 'EQ',
+        'trade_type': rng.choice(['buy', 'buy', 'sell'], trades),
+        'auction': 'false',
+        'quantity': rng.integers(1, 200, trades),
+        'price': rng.uniform(10, 5000, trades).round(2),
+        'trade_id': np.arange(1_000_000, 1_000_000 + trades),
+        'order_id': rng.integers(10**15, 10**16, trades),
+        'order_execution_time': traded_at.strftime('%Y-%m-%dT%H:%M:%S'),
+    }).to_csv(index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trades', type=int, default=50_000)
+    parser.add_argument('--symbols', type=int, default=300)
+    args = parser.parse_args()
+
+    csv_text = synthetic_tradebook(args.trades, args.symbols)
+    with tempfile.TemporaryDirectory() as root:
+        store = PortfolioStore(os.path.join(root, "bench.db"))
+        user_id = store.ensure_user("bench")
+
+        for label in ("import", "re-import"):
+            start = time.perf_counter()
+            result = store.import_tradebook(user_id, io.StringIO(csv_text))
+            print(f"{label:<12}{(time.perf_counter() - start) * 1000:>10.0f} ms   {result}")
+
+        start = time.perf_counter()
+        portfolio = store.load_portfolio(user_id)
+        print(f"{'portfolio':<12}{(time.perf_counter() - start) * 1000:>10.1f} ms   {len(portfolio)} holdings")
+        store.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
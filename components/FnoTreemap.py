@@ -0,0 +1,116 @@
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sector_map import sector_rollup
+
+# Label -> positions column that sizes each tile
+SIZE_OPTIONS = {
+    'Traded value': 'totalTradedValue',
+    'Free-float market cap': 'ffmc',
+}
+COLOR_CLAMP = 3          # % change at which a tile reaches full red / green
+TREEMAP_HEIGHT = 640
+MAX_CACHED_FIGURES = 8
+
+# content hash -> figure, shared by every session (they all read the same poller snapshot)
+_figure_cache = {}
+_figure_cache_lock = threading.Lock()
+
+
+def treemap_nodes(stocks: pd.DataFrame, sector_totals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sector and stock tiles as one flat table (id, parent, label, value, size, pChange, detail),
+    sectors first, built column-wise from the `sector_rollup` frames.
+
+    Sectors carry a `value` of 0 and are drawn as the sum of their stocks ('remainder' branch
+    values), so float rounding in the sector sums can never make a sector smaller than its tiles.
+    """
+    sector_ids = 'sector:' + sector_totals.index.to_numpy(dtype=object)
+    sectors = pd.DataFrame({
+        'id': sector_ids,
+        'parent': '',
+        'label': sector_totals.index.to_numpy(dtype=object),
+        'value': 0.0,
+        'size': sector_totals['size'].to_numpy(dtype=float),
+        'pChange': sector_totals['pChange'].to_numpy(dtype=float),
+        'detail': (sector_totals['advances'].astype(int).astype(str) + ' of '
+                   + sector_totals['stocks'].astype(str) + ' advancing').to_numpy(),
+    })
+    tiles = pd.DataFrame({
+        'id': stocks['symbol'].to_numpy(dtype=object),
+        'parent': 'sector:' + stocks['sector'].to_numpy(dtype=object),
+        'label': stocks['symbol'].to_numpy(dtype=object),
+        'value': stocks['size'].to_numpy(dtype=float),
+        'size': stocks['size'].to_numpy(dtype=float),
+        'pChange': stocks['pChange'].to_numpy(dtype=float),
+        'detail': '₹' + np.char.mod('%.2f', stocks['lastPrice'].to_numpy(dtype=float)).astype(object),
+    })
+    return pd.concat([sectors, tiles], ignore_index=True)
+
+
+def _content_hash(stocks: pd.DataFrame, size_by: str) -> str:
+    row_hashes = pd.util.hash_pandas_object(stocks, index=False)
+    return hashlib.sha1(row_hashes.to_numpy().tobytes() + size_by.encode()).hexdigest()
+
+
+def _build_figure(stocks: pd.DataFrame, sector_totals: pd.DataFrame, size_label: str):
+    import plotly.graph_objs as go
+
+    nodes = treemap_nodes(stocks, sector_totals)
+    fig = go.Figure(go.Treemap(
+        ids=nodes['id'],
+        parents=nodes['parent'],
+        labels=nodes['label'],
+        values=nodes['value'],
+        branchvalues='remainder',
+        customdata=np.column_stack([nodes['pChange'].round(2), nodes['detail'], nodes['size']]),
+        texttemplate='<b>%{label}</b><br>%{customdata[0]:+.2f}%',
+        hovertemplate=f'<b>%{{label}}</b><br>%{{customdata[1]}}<br>%{{customdata[0]:+.2f}}%<br>'
+                      f'{size_label}: %{{customdata[2]:,.0f}}<extra></extra>',
+        marker=dict(
+            colors=nodes['pChange'],
+            colorscale=[[0, '#d62728'], [0.5, '#f2f2f2'], [1, '#2ca02c']],
+            cmin=-COLOR_CLAMP, cmid=0, cmax=COLOR_CLAMP,
+            showscale=True,
+            colorbar=dict(title='% Change', ticksuffix='%'),
+        ),
+        tiling=dict(pad=2),
+    ))
+    fig.update_layout(height=TREEMAP_HEIGHT, margin=dict(t=10, l=0, r=0, b=0))
+    return fig
+
+
+def fno_treemap_figure(positions: pd.DataFrame, size_label: str = 'Traded value'):
+    """
+    Treemap of the F&O universe grouped by sector: tiles sized by `size_label` (one of
+    SIZE_OPTIONS) and colored by % change. Memoized by a content hash of the rolled-up stocks.
+
+    Returns:
+    - A plotly Figure, or None if the positions frame has nothing to draw.
+    """
+    size_by = SIZE_OPTIONS[size_label]
+    stocks, sector_totals = sector_rollup(positions, size_by)
+    if stocks.empty:
+        return None
+
+    key = _content_hash(stocks, size_by)
+    with _figure_cache_lock:
+        fig = _figure_cache.get(key)
+    if fig is None:
+        fig = _build_figure(stocks, sector_totals, size_label)
+        with _figure_cache_lock:
+            if len(_figure_cache) >= MAX_CACHED_FIGURES:
+                _figure_cache.clear()
+            _figure_cache[key] = fig
+    return fig
+
+
+def fno_treemap(positions: pd.DataFrame, size_label: str = 'Traded value'):
+    """Renders the F&O sector treemap for the latest positions snapshot."""
+    fig = fno_treemap_figure(positions, size_label)
+    if fig is None:
+        st.info("Loading F&O stocks...")
+        return
+    st.plotly_chart(fig, use_container_width=True)
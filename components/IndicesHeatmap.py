@@ -0,0 +1,230 @@
+import hashlib
+import json
+import threading
+import numpy as np
+import pandas as pd
+import streamlit.components.v1 as components
+from components.LiveQuotes import FEED_URL_JS
+
+HEATMAP_COLUMNS = ['indexName', 'indexType', 'indexOrder', 'last', 'percChange']
+CARDS_PER_ROW = 5
+COLOR_CLAMP = 5          # % change at which a card reaches full red / green
+CARD_ROW_HEIGHT = 92     # px per row of cards, used to size the iframe
+CONTROLS_HEIGHT = 56
+MAX_HEIGHT = 900         # Taller grids scroll inside the component
+MAX_CACHED_PAGES = 16
+
+# content hash -> rendered page, shared by every session (they all read the same poller snapshot)
+_page_cache = {}
+_page_cache_lock = threading.Lock()
+
+
+def heatmap_colors(perc_change, clamp: float = COLOR_CLAMP) -> np.ndarray:
+    """
+    Background color of every card at once: white at 0%, fading to pure green at +clamp% and pure
+    red at -clamp%.
+
+    Parameters:
+    - perc_change (array-like): % change per index.
+    - clamp (float): % change that maps to the full color.
+
+    Returns:
+    - np.ndarray of 'rgb(r, g, b)' strings.
+    """
+    perc = np.clip(np.asarray(perc_change, dtype=float), -clamp, clamp)
+    fade = (255 - (255 * np.abs(perc) / clamp).astype(int)).astype(str).astype(object)
+    rising = perc >= 0
+    red = np.where(rising, fade, '255')
+    green = np.where(rising, '255', fade)
+    return 'rgb(' + red + ', ' + green + ', ' + fade + ')'
+
+
+def heatmap_payload(df: pd.DataFrame) -> list:
+    """
+    Rows of the `fetch_all_indices` table as compact records for the browser:
+    name, type, order, last, change and precomputed color.
+    """
+    return pd.DataFrame({
+        'name': df['indexName'].astype(str),
+        'type': df['indexType'].astype(str),
+        'order': df['indexOrder'].to_numpy(dtype=float),
+        'last': df['last'].to_numpy(dtype=float).round(2),
+        'change': df['percChange'].to_numpy(dtype=float).round(2),
+        'color': heatmap_colors(df['percChange']),
+    }).to_dict('records')
+
+
+def _content_hash(df: pd.DataFrame, port, url: str = '') -> str:
+    row_hashes = pd.util.hash_pandas_object(df[HEATMAP_COLUMNS], index=False)
+    return hashlib.sha1(row_hashes.to_numpy().tobytes() + f"{port}|{url}".encode()).hexdigest()
+
+
+# Browser side: renders the grid from the embedded payload and re-sorts / filters it locally, so
+# changing the view never reruns the script. With a live feed port it also subscribes to the
+# 'market_indices' topic and patches values and colors as they change.
+_HEATMAP_JS = """
+<script>
+(function () {
+    const config = __CONFIG__;
+    const rows = config.rows;
+    const byName = {};
+    for (const row of rows) { byName[row.name] = row; }
+
+    const grid = document.getElementById('grid');
+    const search = document.getElementById('search');
+    const typeFilter = document.getElementById('type');
+    const sortBy = document.getElementById('sort');
+    const count = document.getElementById('count');
+    let delay = 1000;
+
+    for (const type of [...new Set(rows.map(row => row.type))].sort()) {
+        typeFilter.add(new Option(type, type));
+    }
+
+    const sorters = {
+        value: (a, b) => b.last - a.last,
+        gainers: (a, b) => b.change - a.change,
+        losers: (a, b) => a.change - b.change,
+        name: (a, b) => a.name.localeCompare(b.name),
+        nse: (a, b) => a.order - b.order,
+    };
+
+    function color(change) {
+        const perc = Math.max(-config.clamp, Math.min(config.clamp, change));
+        const fade = 255 - Math.trunc(255 * Math.abs(perc) / config.clamp);
+        return perc >= 0 ? `rgb(${fade}, 255, ${fade})` : `rgb(255, ${fade}, ${fade})`;
+    }
+
+    function format(value) {
+        return value.toLocaleString('en-IN', {minimumFractionDigits: 2, maximumFractionDigits: 2});
+    }
+
+    function card(row) {
+        const div = document.createElement('div');
+        div.className = 'card';
+        div.style.background = row.color;
+        const name = document.createElement('div');
+        name.className = 'name';
+        name.textContent = row.name;
+        name.title = row.name;
+        const values = document.createElement('div');
+        values.className = 'values';
+        values.innerHTML = '<b class="last"></b><b class="change"></b>';
+        values.querySelector('.last').textContent = format(row.last);
+        values.querySelector('.change').textContent = row.change.toFixed(2) + '%';
+        div.append(name, values);
+        row.element = div;
+        return div;
+    }
+
+    function render() {
+        const text = search.value.trim().toUpperCase();
+        const type = typeFilter.value;
+        const shown = rows.filter(row => (!type || row.type === type) && row.name.toUpperCase().includes(text))
+                          .sort(sorters[sortBy.value]);
+        grid.replaceChildren(...shown.map(row => row.element || card(row)));
+        count.textContent = shown.length + ' of ' + rows.length + ' indices';
+    }
+
+    function update(name, quote) {
+        const row = byName[name];
+        if (!row) { return; }
+        row.last = quote.price;
+        row.change = quote.change;
+        row.color = color(quote.change);
+        if (row.element) {
+            row.element.style.background = row.color;
+            row.element.querySelector('.last').textContent = format(row.last);
+            row.element.querySelector('.change').textContent = row.change.toFixed(2) + '%';
+        }
+    }
+
+__FEED_URL__
+    function connect() {
+        const socket = new WebSocket(feedUrl(config));
+        socket.onopen = function () { delay = 1000; socket.send(JSON.stringify({subscribe: ['market_indices']})); };
+        socket.onmessage = function (event) {
+            const message = JSON.parse(event.data);
+            const quotes = message.type === 'snapshot' ? message.rows : message.changed;
+            for (const name in quotes) { update(name, quotes[name]); }
+            // Name and NSE order don't depend on quotes; every other sort may reorder the cards
+            if (sortBy.value !== 'name' && sortBy.value !== 'nse') { render(); }
+        };
+        socket.onclose = function () { setTimeout(connect, delay); delay = Math.min(delay * 2, 30000); };
+    }
+
+    search.addEventListener('input', render);
+    typeFilter.addEventListener('change', render);
+    sortBy.addEventListener('change', render);
+    render();
+    if (config.port || config.url) { connect(); }
+})();
+</script>
+"""
+
+_STYLE = """
+<style>
+    body { margin: 0; font-family: 'Arial', sans-serif; }
+    #controls { display: flex; gap: 8px; align-items: center; margin-bottom: 12px; }
+    #controls input, #controls select { padding: 6px 8px; border: 1px solid #ccc; border-radius: 6px; font-size: 14px; }
+    #search { flex: 1; }
+    #count { color: #808080; font-size: 12px; white-space: nowrap; }
+    #grid { display: grid; grid-template-columns: repeat(__COLUMNS__, minmax(0, 1fr)); gap: 10px; }
+    .card { border: 1px solid #ccc; border-radius: 10px; padding: 10px; color: #000; }
+    .name { font-size: 14px; font-weight: 600; margin-bottom: 6px; white-space: nowrap; overflow: hidden;
+            text-overflow: ellipsis; }
+    .values { display: flex; justify-content: space-between; font-size: 18px; }
+</style>
+"""
+
+_CONTROLS = """
+<div id="controls">
+    <input id="search" type="search" placeholder="Filter indices…">
+    <select id="type"><option value="">All types</option></select>
+    <select id="sort">
+        <option value="value">Sort: Value</option>
+        <option value="gainers">Sort: Top gainers</option>
+        <option value="losers">Sort: Top losers</option>
+        <option value="name">Sort: Name</option>
+        <option value="nse">Sort: NSE order</option>
+    </select>
+    <span id="count"></span>
+</div>
+<div id="grid"></div>
+"""
+
+
+def _render_page(df: pd.DataFrame, port, url: str = '') -> str:
+    config = {'rows': heatmap_payload(df), 'clamp': COLOR_CLAMP, 'port': port, 'url': url}
+    # Escape '</' so index names can never close the script tag
+    script = (_HEATMAP_JS.replace('__CONFIG__', json.dumps(config).replace('</', '<\\/'))
+              .replace('__FEED_URL__', FEED_URL_JS))
+    return _STYLE.replace('__COLUMNS__', str(CARDS_PER_ROW)) + _CONTROLS + script
+
+
+def indices_heatmap_html(df: pd.DataFrame, port: int = None, url: str = '') -> str:
+    """Heatmap page for the `fetch_all_indices` table, memoized by a content hash of its rows."""
+    key = _content_hash(df, port, url)
+    with _page_cache_lock:
+        page = _page_cache.get(key)
+    if page is None:
+        page = _render_page(df, port, url)
+        with _page_cache_lock:
+            if len(_page_cache) >= MAX_CACHED_PAGES:
+                _page_cache.clear()
+            _page_cache[key] = page
+    return page
+
+
+def indices_heatmap(df: pd.DataFrame, port: int = None, url: str = ''):
+    """
+    Renders every index as one heatmap component, with client-side filtering and sorting.
+
+    Parameters:
+    - df (pd.DataFrame): The `fetch_all_indices` table (indexName, indexType, indexOrder, last, percChange).
+    - port (int): Live feed websocket port; when given, cards update in place as quotes change.
+    - url (str): Live feed websocket URL (or path on the page's host) to use instead of the port.
+    """
+    rows = -(-len(df) // CARDS_PER_ROW)
+    height = min(MAX_HEIGHT, CONTROLS_HEIGHT + rows * CARD_ROW_HEIGHT)
+    components.html(indices_heatmap_html(df, port, url), height=height, scrolling=True)
@@ -0,0 +1,185 @@
+import functools
+import json
+import streamlit.components.v1 as components
+
+MAX_FAILED_CONNECTS = 3  # Failed websocket connects before the page falls back to its embedded snapshot
+
+# Websocket URL of the live feed: config.url as given (a path such as '/live' is resolved against
+# the page's host), else the page's host on config.port; wss whenever the page is served over https
+FEED_URL_JS = """
+    function feedUrl(config) {
+        let host = 'localhost', origin = 'localhost', scheme = 'ws';
+        try {
+            host = window.parent.location.hostname || host;
+            origin = window.parent.location.host || origin;
+            scheme = window.parent.location.protocol === 'https:' ? 'wss' : 'ws';
+        } catch (e) {}
+        if (config.url) {
+            return config.url.startsWith('/') ? scheme + '://' + origin + config.url : config.url;
+        }
+        return scheme + '://' + host + ':' + config.port;
+    }
+"""
+
+# Browser side of the live feed: connects to the quote hub's websocket, applies the snapshot and
+# then patches only the quotes named in each diff. Reconnects with backoff if the socket drops, and
+# shows the snapshot embedded in the page if it has no quotes after MAX_FAILED_CONNECTS attempts.
+_CLIENT_JS = """
+<script>
+(function () {
+    const config = __CONFIG__;
+    const rows = {};
+    let delay = 1000;
+    let failures = 0;
+
+    function format(value) {
+        return value.toLocaleString('en-IN', {minimumFractionDigits: 2, maximumFractionDigits: 2});
+    }
+""" + FEED_URL_JS + """
+    function connect() {
+        const socket = new WebSocket(feedUrl(config));
+        let opened = false;
+
+        socket.onopen = function () {
+            opened = true;
+            delay = 1000;
+            failures = 0;
+            socket.send(JSON.stringify({subscribe: [config.topic]}));
+        };
+        socket.onmessage = function (event) {
+            const message = JSON.parse(event.data);
+            if (message.type === 'snapshot') {
+                for (const key of Object.keys(rows)) { delete rows[key]; }
+                Object.assign(rows, message.rows);
+                render(rows, null);
+            } else {
+                Object.assign(rows, message.changed);
+                for (const key of message.removed) { delete rows[key]; }
+                render(rows, message.changed);
+            }
+        };
+        socket.onclose = function () {
+            if (!opened) { failures += 1; }
+            // Quotes already received stay on screen; only a page that never got any falls back
+            if (failures === config.maxFailures && Object.keys(rows).length === 0) {
+                Object.assign(rows, config.fallback);
+                render(rows, null);
+            }
+            setTimeout(connect, delay);
+            delay = Math.min(delay * 2, 30000);
+        };
+    }
+
+    __RENDER__
+
+    connect();
+})();
+</script>
+"""
+
+_TICKER_RENDER = """
+    const content = document.getElementById('ticker-content');
+    const spans = {};
+
+    function render(rows, changed) {
+        const keys = changed ? Object.keys(changed) : Object.keys(rows);
+        if (!changed) { content.innerHTML = ''; for (const key in spans) { delete spans[key]; } }
+        for (const key of keys) {
+            let span = spans[key];
+            if (!span) {
+                span = spans[key] = document.createElement('span');
+                content.appendChild(span);
+            }
+            const row = rows[key];
+            if (!row) { span.remove(); delete spans[key]; continue; }
+            span.className = row.change >= 0 ? 'green' : 'red';
+            span.textContent = key + ' ₹' + format(row.price) + ' ' + (row.change >= 0 ? '+' : '') + row.change.toFixed(2) + '% • ';
+        }
+        for (const key of Object.keys(spans)) {
+            if (!(key in rows)) { spans[key].remove(); delete spans[key]; }
+        }
+    }
+"""
+
+_CARDS_RENDER = """
+    function render(rows, changed) {
+        for (const name of config.keys) {
+            if (changed && !(name in changed)) { continue; }
+            const card = document.getElementById('card-' + config.keys.indexOf(name));
+            const row = rows[name];
+            if (!row) { continue; }
+            card.querySelector('.value').textContent = format(row.price);
+            card.querySelector('.value').style.color = row.change >= 0 ? 'green' : 'red';
+            card.querySelector('.change').textContent = row.change.toFixed(2) + '%';
+        }
+    }
+"""
+
+
+def _page(body: str, style: str, render_js: str, config: dict) -> str:
+    config = {**config, 'maxFailures': MAX_FAILED_CONNECTS}
+    # Escape '</' so quote keys can never close the script tag
+    script = (_CLIENT_JS.replace('__CONFIG__', json.dumps(config).replace('</', '<\\/'))
+              .replace('__RENDER__', render_js))
+    return f"<style>body {{ margin: 0; font-family: 'Arial', sans-serif; }} {style}</style>{body}{script}"
+
+
+@functools.lru_cache(maxsize=16)
+def _ticker_page(port: int, url: str, seconds: int, fallback_json: str) -> str:
+    style = f"""
+        .ticker-tape {{ width: 100%; height: 40px; background: #000000; border-top: 2px solid #FFD700;
+                        border-bottom: 2px solid #FFD700; overflow: hidden; display: flex; align-items: center; }}
+        .red {{ color: #FF4C4C; }}
+        .green {{ color: #00FF00; }}
+        #ticker-content {{ display: inline-block; padding-left: 100%; white-space: nowrap;
+                           animation: scroll-left {seconds}s linear infinite; font-size: 14px; font-weight: bold;
+                           color: #FFD700; letter-spacing: 1px; line-height: 40px; }}
+        @keyframes scroll-left {{ 0% {{ transform: translateX(0%); }} 100% {{ transform: translateX(-100%); }} }}
+        .ticker-tape:hover #ticker-content {{ animation-play-state: paused; }}
+    """
+    body = '<div class="ticker-tape"><div id="ticker-content">Connecting to live quotes…</div></div>'
+    return _page(body, style, _TICKER_RENDER,
+                 {'port': port, 'url': url, 'topic': 'ticker', 'fallback': json.loads(fallback_json)})
+
+
+@functools.lru_cache(maxsize=16)
+def _cards_page(port: int, url: str, index_names: tuple, fallback_json: str) -> str:
+    style = """
+        #index-cards { display: flex; gap: 8px; }
+        .card { flex: 1; border: 1px solid rgba(128, 128, 128, 0.3); border-radius: 8px; padding: 8px; }
+        .name { font-size: 12px; font-weight: 600; color: #808080; }
+        .value { font-size: 16px; font-weight: bold; }
+        .change { color: grey; font-size: 12px; }
+    """
+    cards = "".join(
+        f'<div class="card" id="card-{i}"><div class="name">{name}</div>'
+        f'<div class="value">Loading</div><div class="change">-</div></div>'
+        for i, name in enumerate(index_names)
+    )
+    body = f'<div id="index-cards">{cards}</div>'
+    return _page(body, style, _CARDS_RENDER, {'port': port, 'url': url, 'topic': 'indices',
+                                              'keys': list(index_names), 'fallback': json.loads(fallback_json)})
+
+
+def _fallback_json(rows) -> str:
+    return json.dumps(rows or {}, sort_keys=True)
+
+
+def live_ticker_tape(port: int, fallback: dict = None, url: str = '', seconds: int = 300):
+    """
+    Ticker tape fed by the live quote websocket. Its HTML only changes between reruns when the
+    fallback snapshot does, so the browser mostly keeps the same iframe and socket; only changed
+    quotes travel over the wire.
+
+    Parameters:
+    - port (int): Live feed websocket port on the page's host.
+    - fallback (dict): Hub rows ({symbol: {'price', 'change'}}) shown if the socket can't be reached.
+    - url (str): Websocket URL (or path on the page's host) to use instead of the port, e.g. behind a proxy.
+    - seconds (int): Duration of one scroll of the tape.
+    """
+    components.html(_ticker_page(port, url, seconds, _fallback_json(fallback)), height=48)
+
+
+def live_index_cards(port: int, index_names, fallback: dict = None, url: str = ''):
+    """Index snapshot cards fed by the live quote websocket; see `live_ticker_tape` for the parameters."""
+    components.html(_cards_page(port, url, tuple(index_names), _fallback_json(fallback)), height=90)
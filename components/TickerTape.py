@@ -1,26 +1,58 @@
+import hashlib
+import threading
+import numpy as np
 import streamlit as st
 import pandas as pd
 
+TAPE_COLUMNS = ['symbol', 'lastPrice', 'pChange']
+SECONDS_PER_ITEM = 1.7   # Scroll speed: the tape takes this long per stock to pass by
+MAX_CACHED_TAPES = 16
 
-def ticker_tape_component(df: pd.DataFrame):
+# content hash -> rendered HTML, shared by every session (they all read the same poller snapshot)
+_html_cache = {}
+_html_cache_lock = threading.Lock()
+
+
+def _to_number(column: pd.Series) -> np.ndarray:
+    return pd.to_numeric(column.astype(str).str.replace(',', ''), errors='coerce').to_numpy(dtype=float)
+
+
+def format_ticker_items(df: pd.DataFrame) -> np.ndarray:
     """
-    Renders a ticker tape in Streamlit from a DataFrame with columns: 'symbol', 'lastPrice', 'pChange'
+    Vectorized formatting of every row into a colored '<SYMBOL> ₹<price> <±change>%' span.
+
+    Rows with a missing or non-numeric price / change are skipped.
     """
-    ticker_items = []
-    print(df[:10])
-    for _, stock in df.iterrows():
-        price = f"₹{float(stock['lastPrice']):.2f}"
-        pchange = f"{'+' if stock['pChange'] >= 0 else ''}{stock['pChange']:.2f}%"
-        color_class = "green" if stock['pChange'] >= 0 else "red"
+    price = _to_number(df['lastPrice'])
+    change = _to_number(df['pChange'])
+    valid = ~(np.isnan(price) | np.isnan(change))
+    price, change = price[valid], change[valid]
+
+    symbols = (df.loc[valid, 'symbol'].astype(str)
+               .str.replace('&', '&amp;', regex=False)
+               .str.replace('<', '&lt;', regex=False))
+    rising = change >= 0
+    color = np.where(rising, 'green', 'red')
+    sign = np.where(rising, '+', '')
+
+    return ('<span class="' + color + '">' + symbols.to_numpy() + ' ₹' + np.char.mod('%.2f', price)
+            + ' ' + sign + np.char.mod('%.2f', change) + '%</span>')
 
-        ticker_items.append(
-            f'<span class="{color_class}">{stock["symbol"]} {price} {pchange}</span>'
-        )
 
-    ticker_text = " • ".join(ticker_items)
-    full_ticker = (ticker_text + " • ") * 4  # Duplicate for infinite feel
+def _content_hash(df: pd.DataFrame) -> str:
+    """Hash of the (symbol, lastPrice, pChange) content; unchanged quotes give the same hash."""
+    row_hashes = pd.util.hash_pandas_object(df[TAPE_COLUMNS], index=False)
+    return hashlib.sha1(row_hashes.to_numpy().tobytes()).hexdigest()
 
-    html = f"""
+
+def _render_html(df: pd.DataFrame) -> str:
+    items = format_ticker_items(df)
+    ticker_text = " • ".join(items)
+    duration = max(60, round(len(items) * SECONDS_PER_ITEM))
+
+    # A single copy of the text scrolls from the right edge until it has fully left on the left
+    # (padding-left: 100% of the tape), so the text doesn't need to be repeated for a seamless loop
+    return f"""
     <style>
         .ticker-tape {{
             width: 100%;
@@ -43,8 +75,10 @@ def ticker_tape_component(df: pd.DataFrame):
         }}
 
         .ticker-content {{
+            display: inline-block;
+            padding-left: 100%;
             white-space: nowrap;
-            animation: scroll-left 1200s linear infinite;
+            animation: scroll-left {duration}s linear infinite;
             font-family: 'Arial', sans-serif;
             font-size: 14px;
             font-weight: bold;
@@ -65,12 +99,31 @@ def ticker_tape_component(df: pd.DataFrame):
 
     <div class="ticker-tape">
         <div class="ticker-content">
-            {full_ticker}
+            {ticker_text}
         </div>
     </div>
     """
 
-    st.markdown(html, unsafe_allow_html=True)
+
+def ticker_tape_html(df: pd.DataFrame) -> str:
+    """Ticker tape HTML for the frame, memoized by a content hash of (symbol, lastPrice, pChange)."""
+    key = _content_hash(df)
+    with _html_cache_lock:
+        html = _html_cache.get(key)
+    if html is None:
+        html = _render_html(df)
+        with _html_cache_lock:
+            if len(_html_cache) >= MAX_CACHED_TAPES:
+                _html_cache.clear()
+            _html_cache[key] = html
+    return html
+
+
+def ticker_tape_component(df: pd.DataFrame):
+    """
+    Renders a ticker tape in Streamlit from a DataFrame with columns: 'symbol', 'lastPrice', 'pChange'
+    """
+    st.markdown(ticker_tape_html(df), unsafe_allow_html=True)
 
 
 # Sample usage
@@ -0,0 +1,96 @@
+# content_cache.py
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+DEFAULT_CACHE_DIR = os.path.join("data", "cache")
+
+
+class ContentCache:
+    """
+    Persistent, size-bounded JSON cache addressed by content hash.
+
+    Each entry is stored as <root>/<sha256>.json. Reads refresh an entry's mtime, and once the
+    directory grows past `max_bytes` the least recently used entries are deleted.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None  # Lazily measured on first write
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Stable sha256 key for any sequence of strings."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key: str):
+        """Return the cached dict for `key`, or None."""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)  # Mark as recently used
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Unreadable cache entry {path}: {e}")
+            return None
+
+    def put(self, key: str, value: dict):
+        """Store a JSON-serializable dict under `key`, evicting old entries if over budget."""
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(key)
+        payload = json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.root) if entry.is_file())
+
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+
+            self._total_bytes += len(payload) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache is back under 90% of its budget."""
+        entries = sorted(
+            (entry for entry in os.scandir(self.root) if entry.is_file() and entry.name.endswith('.json')),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if self._total_bytes <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._total_bytes -= size
+            except OSError:
+                continue
+
+
+# URL -> extracted article text (with the validators needed for conditional re-fetches)
+article_cache = ContentCache(os.path.join(DEFAULT_CACHE_DIR, "articles"), max_bytes=50 * 1024 * 1024)
+
+# (model, prompt hash) -> StockAnalysis JSON
+analysis_cache = ContentCache(os.path.join(DEFAULT_CACHE_DIR, "analyses"), max_bytes=10 * 1024 * 1024)
+
+# Normalized NewsAPI query -> article list (shared by every session, survives restarts)
+news_cache = ContentCache(os.path.join(DEFAULT_CACHE_DIR, "news"), max_bytes=5 * 1024 * 1024)
@@ -0,0 +1,92 @@
+# dedup.py
+import re
+import zlib
+import numpy as np
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16               # 16 bands x 4 rows: pairs above ~0.5 Jaccard almost always collide
+SHINGLE_SIZE = 5             # Character shingles, robust to small rewordings of a headline
+DUPLICATE_THRESHOLD = 0.5    # Estimated Jaccard similarity above which two articles are the same story
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240601)  # Fixed seed: signatures are comparable across calls
+_PERM_A = _rng.integers(1, int(_MERSENNE_PRIME), NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, int(_MERSENNE_PRIME), NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def _shingles(text: str) -> np.ndarray:
+    """Hashes of the distinct character shingles of the normalized text."""
+    normalized = " ".join(re.findall(r"\w+", text.lower()))
+    if len(normalized) <= SHINGLE_SIZE:
+        pieces = {normalized}
+    else:
+        pieces = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(piece.encode('utf-8')) for piece in pieces), dtype=np.uint64, count=len(pieces))
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """MinHash signature (NUM_PERMUTATIONS values) of the text's character shingles."""
+    hashes = _shingles(text) % _MERSENNE_PRIME
+    # (a * x + b) mod p for every permutation and shingle at once; values stay below 2^62
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+
+def cluster_near_duplicates(texts: list, threshold: float = DUPLICATE_THRESHOLD) -> list:
+    """
+    Group near-duplicate texts using MinHash and an in-memory LSH index.
+
+    Each text is compared only with texts sharing at least one LSH band, so the work grows
+    roughly linearly with the number of texts.
+
+    Parameters:
+    - texts (list): Strings to cluster.
+    - threshold (float): Minimum estimated Jaccard similarity for two texts to be merged.
+
+    Returns:
+    - List of cluster labels, one per text. A label is the index of the cluster's first text.
+    """
+    if not texts:
+        return []
+
+    signatures = np.vstack([minhash_signature(text) for text in texts])
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(LSH_BANDS):
+        buckets = {}
+        band_values = signatures[:, band * rows:(band + 1) * rows]
+        for i, values in enumerate(map(bytes, band_values)):
+            first = buckets.setdefault(values, i)
+            if first == i:
+                continue
+            root_first, root_i = find(first), find(i)
+            if root_first == root_i:
+                continue
+            if np.mean(signatures[first] == signatures[i]) >= threshold:
+                # The earlier text stays the representative, so callers' ranking order is kept
+                parent[max(root_first, root_i)] = min(root_first, root_i)
+
+    return [find(i) for i in range(len(texts))]
+
+
+def dedupe_articles(articles: list, threshold: float = DUPLICATE_THRESHOLD) -> list:
+    """
+    Keep one article per cluster of near-duplicates (similar title + description).
+
+    Parameters:
+    - articles (list): Article dictionaries with 'title' and 'description', in ranking order.
+    - threshold (float): Minimum estimated Jaccard similarity for two articles to be merged.
+
+    Returns:
+    - The first article of every cluster, in the original order.
+    """
+    texts = [f"{article.get('title') or ''} {article.get('description') or ''}" for article in articles]
+    labels = cluster_near_duplicates(texts, threshold)
+    return [article for i, article in enumerate(articles) if labels[i] == i]
@@ -0,0 +1,274 @@
+# indicators.py
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from market_data_handler import INTRADAY_INTERVALS
+
+MAX_CACHED_SERIES = 256
+
+# Indicators drawn in their own panel below the price chart rather than on top of it
+OSCILLATORS = {'rsi', 'macd', 'atr'}
+
+# Every indicator is a function (bars, state, **params) -> (outputs, state):
+# - bars: dict of float arrays ('high', 'low', 'close', 'volume', 'session') with time on the last
+#   axis, so a 2-D (symbols x bars) block is computed in one call.
+# - state: None to compute from scratch, or the state returned by the previous call, in which case
+#   `bars` holds only the newly appended bars and only those are computed.
+# - outputs: dict of arrays aligned with `bars`.
+
+
+def _ema(values: np.ndarray, alpha: float, zi=None):
+    """
+    y[t] = alpha * x[t] + (1 - alpha) * y[t-1] along the last axis, as one IIR filter (lfilter).
+
+    Seeded with the first value, like pandas' ewm(adjust=False). Returns (y, final filter state).
+    """
+    if values.shape[-1] == 0:
+        return values.copy(), zi
+    if zi is None:
+        zi = (1 - alpha) * values[..., :1]
+    return lfilter([alpha], [1.0, alpha - 1.0], values, axis=-1, zi=zi)
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling mean over the last axis from cumulative sums; NaN until a full window is available."""
+    out = np.empty(values.shape)
+    out[..., :window - 1] = np.nan
+    if values.shape[-1] >= window:
+        sums = np.cumsum(values, axis=-1)
+        out[..., window - 1] = sums[..., window - 1]
+        np.subtract(sums[..., window:], sums[..., :-window], out=out[..., window:])
+        out[..., window - 1:] /= window
+    return out
+
+
+def _with_history(bars: dict, state, fields):
+    """Prepend the bars kept in `state` so windows spanning the previous tail are complete."""
+    if state is None:
+        return {field: bars[field] for field in fields}, 0
+    history = state['tail']
+    joined = {field: np.concatenate([history[field], bars[field]], axis=-1) for field in fields}
+    return joined, history[fields[0]].shape[-1]
+
+
+def _keep_tail(arrays: dict, length: int) -> dict:
+    return {field: values[..., values.shape[-1] - min(length, values.shape[-1]):] for field, values in arrays.items()}
+
+
+def _previous_close(close: np.ndarray, state) -> np.ndarray:
+    """Close of the bar before each bar; the first bar uses itself when there is no history."""
+    first = state['last_close'] if state is not None else close[..., :1]
+    return np.concatenate([first, close[..., :-1]], axis=-1)
+
+
+def sma(bars: dict, state=None, window: int = 20):
+    joined, skip = _with_history(bars, state, ['close'])
+    mean = _rolling_mean(joined['close'], window)
+    return {'sma': mean[..., skip:]}, {'tail': _keep_tail(joined, window - 1)}
+
+
+def ema(bars: dict, state=None, span: int = 20):
+    values, zi = _ema(bars['close'], 2 / (span + 1), state and state['zi'])
+    return {'ema': values}, {'zi': zi}
+
+
+def rsi(bars: dict, state=None, period: int = 14):
+    """
+    Relative Strength Index with Wilder smoothing (alpha = 1 / period), like pandas'
+    ewm(alpha=1 / period, adjust=False) over close.diff(): the first bar has no change, so its RSI
+    is NaN and both averages are seeded with the first real change.
+    """
+    close = bars['close']
+    if state is None:
+        delta = np.diff(close, axis=-1)
+        lead = np.full(close.shape[:-1] + (min(1, close.shape[-1]),), np.nan)
+        gain_zi = loss_zi = None
+    else:
+        delta = close - _previous_close(close, state)
+        lead = np.empty(close.shape[:-1] + (0,))
+        # Still None if every earlier call saw a single bar, so the first change seeds the averages
+        gain_zi, loss_zi = state['gain_zi'], state['loss_zi']
+
+    alpha = 1 / period
+    avg_gain, gain_zi = _ema(np.maximum(delta, 0), alpha, gain_zi)
+    avg_loss, loss_zi = _ema(np.maximum(-delta, 0), alpha, loss_zi)
+
+    # No losses gives RS = inf and an RSI of 100; a flat stretch (0 / 0) gives NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 - 100 / (1 + avg_gain / avg_loss)
+    last_close = close[..., -1:] if close.shape[-1] else state['last_close']
+    return ({'rsi': np.concatenate([lead, values], axis=-1)},
+            {'last_close': last_close, 'gain_zi': gain_zi, 'loss_zi': loss_zi})
+
+
+def macd(bars: dict, state=None, fast: int = 12, slow: int = 26, signal: int = 9):
+    close = bars['close']
+    fast_ema, fast_zi = _ema(close, 2 / (fast + 1), state and state['fast_zi'])
+    slow_ema, slow_zi = _ema(close, 2 / (slow + 1), state and state['slow_zi'])
+    line = fast_ema - slow_ema
+    signal_line, signal_zi = _ema(line, 2 / (signal + 1), state and state['signal_zi'])
+    outputs = {'macd': line, 'signal': signal_line, 'histogram': line - signal_line}
+    return outputs, {'fast_zi': fast_zi, 'slow_zi': slow_zi, 'signal_zi': signal_zi}
+
+
+def bollinger(bars: dict, state=None, window: int = 20, num_std: float = 2):
+    joined, skip = _with_history(bars, state, ['close'])
+    close = joined['close']
+    mean = _rolling_mean(close, window)
+    variance = np.clip(_rolling_mean(close * close, window) - mean * mean, 0, None)
+    band = num_std * np.sqrt(variance)
+    outputs = {'middle': mean, 'upper': mean + band, 'lower': mean - band}
+    return {name: values[..., skip:] for name, values in outputs.items()}, {'tail': _keep_tail(joined, window - 1)}
+
+
+def vwap(bars: dict, state=None):
+    """
+    Volume-weighted average price, reset whenever bars['session'] changes (e.g. each trading day
+    for intraday bars). Without a 'session' array the whole series is one session.
+    """
+    close = bars['close']
+    length = close.shape[-1]
+    session = bars.get('session', np.zeros(length))
+    typical = (bars['high'] + bars['low'] + close) / 3
+    volume = bars['volume']
+
+    new_session = np.empty(length, dtype=bool)
+    new_session[1:] = session[1:] != session[:-1]
+    if length:
+        new_session[0] = state is None or session[0] != state['session']
+
+    cum_pv = np.cumsum(typical * volume, axis=-1)
+    cum_v = np.cumsum(volume, axis=-1)
+    if length and not new_session[0]:
+        cum_pv += state['cum_pv']
+        cum_v += state['cum_v']
+
+    if new_session[1:].any():
+        # Subtract the cumulative sums just before each bar's session started
+        starts = np.maximum.accumulate(np.where(new_session, np.arange(length), 0))
+        session_pv = cum_pv - np.where(starts > 0, cum_pv[..., starts - 1], 0)
+        session_v = cum_v - np.where(starts > 0, cum_v[..., starts - 1], 0)
+    else:
+        session_pv, session_v = cum_pv, cum_v
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = session_pv / session_v
+
+    if not length:
+        return {'vwap': values}, state
+    return {'vwap': values}, {'cum_pv': session_pv[..., -1:], 'cum_v': session_v[..., -1:], 'session': session[-1]}
+
+
+def atr(bars: dict, state=None, period: int = 14):
+    """Average True Range with Wilder smoothing."""
+    high, low, close = bars['high'], bars['low'], bars['close']
+    previous = _previous_close(close, state)
+    # max(high - low, |high - prev|, |low - prev|) == max(high, prev) - min(low, prev)
+    true_range = np.maximum(high, previous) - np.minimum(low, previous)
+    values, zi = _ema(true_range, 1 / period, state and state['zi'])
+    return {'atr': values}, {'last_close': close[..., -1:], 'zi': zi}
+
+
+INDICATORS = {
+    'sma': sma,
+    'ema': ema,
+    'rsi': rsi,
+    'macd': macd,
+    'bollinger': bollinger,
+    'vwap': vwap,
+    'atr': atr,
+}
+
+
+def frame_to_bars(frame: pd.DataFrame, interval: str = '1d') -> dict:
+    """Arrays for the indicator functions from an OHLCV frame (as returned by get_symbol_history)."""
+    bars = {
+        'high': frame['High'].to_numpy(dtype=float),
+        'low': frame['Low'].to_numpy(dtype=float),
+        'close': frame['Close'].to_numpy(dtype=float),
+        'volume': frame['Volume'].to_numpy(dtype=float) if 'Volume' in frame else np.zeros(len(frame)),
+    }
+    if interval in INTRADAY_INTERVALS:
+        # One VWAP session per trading day
+        bars['session'] = frame.index.normalize().asi8.astype(float)
+    return bars
+
+
+class _Series:
+    def __init__(self, index: pd.Index, outputs: dict, state, last_close: float):
+        self.index = index
+        self.outputs = outputs
+        self.state = state
+        self.last_close = last_close
+
+
+class IndicatorEngine:
+    """
+    Memoized, incremental indicator computation for chart overlays.
+
+    Results are kept per (symbol, interval, first bar, indicator, params). When the same symbol's
+    history comes back with new bars appended, only those bars are computed from the saved state;
+    an unchanged history is served straight from memory. Anything else (a revised last bar, a
+    different window) is recomputed from scratch.
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_SERIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compute(self, frame: pd.DataFrame, symbol: str, interval: str, name: str, **params) -> pd.DataFrame:
+        """
+        Indicator outputs for one symbol's OHLCV frame.
+
+        Parameters:
+        - frame (pd.DataFrame): OHLCV bars with 'High', 'Low', 'Close' (and 'Volume' for VWAP).
+        - symbol (str): Symbol the bars belong to (part of the cache key).
+        - interval (str): Bar interval, e.g. '1d' or '5m' (part of the cache key).
+        - name (str): One of INDICATORS.
+        - **params: Indicator parameters, e.g. window=20.
+
+        Returns:
+        - DataFrame of the indicator's outputs (e.g. 'macd', 'signal', 'histogram') indexed like the bars.
+        """
+        function = INDICATORS[name]
+        frame = frame.dropna(subset=['High', 'Low', 'Close'])
+        if frame.empty:
+            return pd.DataFrame(index=frame.index)
+
+        key = (symbol, interval, frame.index[0], name, tuple(sorted(params.items())))
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+
+        done = 0
+        if cached is not None and len(cached.index) <= len(frame):
+            last = len(cached.index) - 1
+            if frame.index[last] == cached.index[-1] and frame['Close'].iloc[last] == cached.last_close:
+                done = len(cached.index)
+
+        if done == len(frame):
+            series = cached
+        elif done:
+            outputs, state = function(frame_to_bars(frame.iloc[done:], interval), cached.state, **params)
+            outputs = {column: np.concatenate([cached.outputs[column], values]) for column, values in outputs.items()}
+            series = _Series(frame.index, outputs, state, frame['Close'].iloc[-1])
+        else:
+            outputs, state = function(frame_to_bars(frame, interval), None, **params)
+            series = _Series(frame.index, outputs, state, frame['Close'].iloc[-1])
+
+        if series is not cached:
+            with self._lock:
+                self._entries[key] = series
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return pd.DataFrame(series.outputs, index=series.index)
+
+
+# Shared by every session: indicator results depend only on the bars
+indicator_engine = IndicatorEngine()
@@ -0,0 +1,227 @@
+# llm_gateway.py
+import asyncio
+import hashlib
+import threading
+import time
+from collections import defaultdict, deque
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+
+def is_retryable(error: Exception) -> bool:
+    """Errors worth retrying: throttling, transient network failures and Groq-side 5xx."""
+    # groq is imported here rather than at module load, like the clients in llm_handler
+    from groq import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+    return isinstance(error, (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError))
+
+
+class TokenBucket:
+    """Async token bucket refilling `per_minute` units per minute, allowing bursts up to `capacity`."""
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1):
+        """Wait until `amount` units are available and take them."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._available >= amount:
+                    self._available -= amount
+                    return
+                await asyncio.sleep((amount - self._available) / self.rate)
+
+
+class LLMGateway:
+    """
+    Single entry point for every Groq call made by the app.
+
+    - Requests and prompt tokens are paced by token buckets sized to the account quota, so bursts
+      queue up instead of being rejected.
+    - Throttling and transient errors are retried with jittered exponential backoff (tenacity).
+    - Identical in-flight calls (same name and messages) are coalesced into one request.
+    - Latency, retries, errors and token usage are recorded per call name (see `stats()`).
+
+    The gateway runs on its own event loop thread; `invoke` / `batch` / `stream` are blocking
+    wrappers for Streamlit's synchronous script threads.
+    """
+
+    def __init__(self, requests_per_minute: float = 30, tokens_per_minute: float = 30000,
+                 max_attempts: int = 4, token_counter=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_attempts = max_attempts
+        self._token_counter = token_counter or (lambda messages: 0)
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._request_bucket = None
+        self._token_bucket = None
+        self._inflight = {}
+        self._metrics = defaultdict(lambda: {
+            'calls': 0, 'coalesced': 0, 'retries': 0, 'errors': 0,
+            'input_tokens': 0, 'output_tokens': 0, 'latencies': deque(maxlen=500),
+        })
+        self._metrics_lock = threading.Lock()
+
+    # ----- event loop plumbing -----
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-gateway", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop()).result()
+
+    def _buckets(self):
+        # Created lazily so they bind to the gateway's own loop
+        if self._request_bucket is None:
+            self._request_bucket = TokenBucket(self.requests_per_minute)
+            self._token_bucket = TokenBucket(self.tokens_per_minute)
+        return self._request_bucket, self._token_bucket
+
+    async def _acquire(self, messages):
+        request_bucket, token_bucket = self._buckets()
+        await request_bucket.acquire(1)
+        await token_bucket.acquire(self._token_counter(messages))
+
+    # ----- metrics -----
+
+    def _record(self, name: str, **values):
+        with self._metrics_lock:
+            metrics = self._metrics[name]
+            for field, value in values.items():
+                if field == 'latency':
+                    metrics['latencies'].append(value)
+                else:
+                    metrics[field] += value
+
+    def _record_usage(self, name: str, result):
+        # Structured output with include_raw=True returns {'raw': AIMessage, 'parsed': ...}
+        message = result.get('raw') if isinstance(result, dict) else result
+        usage = getattr(message, 'usage_metadata', None) or {}
+        self._record(name, input_tokens=usage.get('input_tokens', 0), output_tokens=usage.get('output_tokens', 0))
+
+    def stats(self) -> dict:
+        """Per call name: call / coalesced / retry / error counts, token totals and p50 / p95 latency."""
+        with self._metrics_lock:
+            snapshot = {name: dict(metrics, latencies=sorted(metrics['latencies']))
+                        for name, metrics in self._metrics.items()}
+
+        for metrics in snapshot.values():
+            latencies = metrics.pop('latencies')
+            metrics['p50_latency'] = round(latencies[len(latencies) // 2], 3) if latencies else None
+            metrics['p95_latency'] = round(latencies[int(len(latencies) * 0.95)], 3) if latencies else None
+        return snapshot
+
+    # ----- calls -----
+
+    @staticmethod
+    def _key(name: str, messages) -> str:
+        digest = hashlib.sha256(name.encode('utf-8'))
+        for message in messages:
+            digest.update(b'\0' + message.type.encode('utf-8') + b'\0' + str(message.content).encode('utf-8'))
+        return digest.hexdigest()
+
+    async def ainvoke(self, name: str, runnable, messages):
+        """
+        Rate-limited, retried, coalesced `runnable.ainvoke(messages)`.
+
+        Parameters:
+        - name (str): Call name used for coalescing and metrics, e.g. 'analysis'. Calls sharing a
+          name must use equivalent runnables.
+        - runnable: LangChain chat model or runnable to call.
+        - messages: List of LangChain messages.
+        """
+        key = self._key(name, messages)
+        if key in self._inflight:
+            self._record(name, coalesced=1)
+            return await asyncio.shield(self._inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._call(name, runnable, messages)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved when nobody else was waiting on it
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            del self._inflight[key]
+
+    async def _call(self, name: str, runnable, messages):
+        self._record(name, calls=1)
+        start = time.perf_counter()
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(self.max_attempts),
+                wait=wait_exponential_jitter(initial=1, max=20),
+                retry=retry_if_exception(is_retryable),
+                reraise=True,
+            ):
+                with attempt:
+                    if attempt.retry_state.attempt_number > 1:
+                        self._record(name, retries=1)
+                    await self._acquire(messages)
+                    result = await runnable.ainvoke(messages)
+        except Exception:
+            self._record(name, errors=1)
+            raise
+
+        self._record(name, latency=time.perf_counter() - start)
+        self._record_usage(name, result)
+        return result
+
+    def invoke(self, name: str, runnable, messages):
+        """Blocking wrapper around `ainvoke`."""
+        return self._run(self.ainvoke(name, runnable, messages))
+
+    def batch(self, name: str, runnable, messages_list, max_concurrency: int = 4) -> list:
+        """Run several calls concurrently (at most `max_concurrency` at a time), preserving order."""
+
+        async def run_all():
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def run_one(messages):
+                async with semaphore:
+                    return await self.ainvoke(name, runnable, messages)
+
+            return await asyncio.gather(*(run_one(messages) for messages in messages_list))
+
+        return self._run(run_all())
+
+    def stream(self, name: str, llm, messages):
+        """
+        Rate-limited `llm.stream(messages)`, yielding chunks.
+
+        Streams are not retried or coalesced once started, since chunks may already have been shown.
+        """
+        self._run(self._acquire(messages))
+        self._record(name, calls=1)
+        start = time.perf_counter()
+        last_chunk = None
+        try:
+            for chunk in llm.stream(messages):
+                last_chunk = chunk
+                yield chunk
+        except Exception:
+            self._record(name, errors=1)
+            raise
+
+        self._record(name, latency=time.perf_counter() - start)
+        if last_chunk is not None:
+            self._record_usage(name, last_chunk)
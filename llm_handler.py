@@ -1,28 +1,157 @@
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage
+import functools
+import threading
+import time
+from collections import OrderedDict
+from langchain_core.messages import HumanMessage, AIMessage, trim_messages
+from langchain_core.utils.json import parse_partial_json
 from scrapper import scrape_multiple_articles
 from typing import List, Generator, Optional
 from pydantic import BaseModel, Field, HttpUrl, ValidationError
 import os
 from dotenv import load_dotenv
 import json
-from langchain.chains import ConversationChain
-from langchain.memory import ConversationBufferMemory
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from content_cache import ContentCache, analysis_cache
+from llm_gateway import LLMGateway
 
 
 load_dotenv()
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 
-chat = ChatGroq(api_key=GROQ_API_KEY, model_name="meta-llama/llama-4-scout-17b-16e-instruct")
-chat_streaming = ChatGroq(api_key=GROQ_API_KEY, model_name="meta-llama/llama-4-scout-17b-16e-instruct", streaming=True)
-memory = ConversationBufferMemory(return_messages=True)
+MODEL_NAME = "meta-llama/llama-4-scout-17b-16e-instruct"
 
-qa_chain = ConversationChain(
-    llm=chat,
-    memory=memory,
-    verbose=True,
+
+@functools.lru_cache(maxsize=None)
+def get_chat(streaming: bool = False):
+    """
+    Shared Groq chat client, created on first use so importing this module stays cheap.
+
+    Retries are owned by the gateway, so the clients themselves don't retry.
+    """
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(api_key=GROQ_API_KEY, model_name=MODEL_NAME, streaming=streaming, max_retries=0)
+
+# Token budgeting for article text. Tokens are estimated from characters (~4 per token for
+# English news text), which is close enough for budgeting without loading a tokenizer.
+CHARS_PER_TOKEN = 4
+MAX_ARTICLE_TOKENS = 6000   # Article text sent to a single analysis call
+CHUNK_TOKENS = 2000         # Size of each map-step chunk
+MAX_CHUNKS = 12             # Anything beyond this many chunks is dropped to keep latency bounded
+CHUNK_NOTES_TOKENS = 400    # Completion cap for each map-step summary
+MAP_CONCURRENCY = 4
+FAST_MODE_TOKENS = 3000     # Fast mode: hard cap on article text, single call, no map step
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _estimate_messages_tokens(messages) -> int:
+    return sum(_estimate_tokens(str(message.content)) for message in messages)
+
+
+# Every Groq call goes through this gateway; defaults match the model's free-tier quota
+gateway = LLMGateway(
+    requests_per_minute=float(os.getenv('GROQ_REQUESTS_PER_MINUTE', 30)),
+    tokens_per_minute=float(os.getenv('GROQ_TOKENS_PER_MINUTE', 30000)),
+    token_counter=_estimate_messages_tokens,
 )
 
+
+_article_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=CHUNK_TOKENS,
+    chunk_overlap=100,
+    length_function=_estimate_tokens,
+)
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    return text[:max_tokens * CHARS_PER_TOKEN]
+
+
+def _condense_articles(stock_name: str, articles_text: str) -> str:
+    """
+    Fit article text into MAX_ARTICLE_TOKENS.
+
+    Text already within budget is returned as is. Longer text is split into chunks whose
+    stock-relevant facts are extracted concurrently (map step), and the joined notes are
+    returned for the final analysis (reduce step).
+    """
+    if _estimate_tokens(articles_text) <= MAX_ARTICLE_TOKENS:
+        return articles_text
+
+    chunks = _article_splitter.split_text(articles_text)[:MAX_CHUNKS]
+    map_prompts = [
+        [HumanMessage(content=(
+            f"Extract every fact from this news excerpt that matters for the stock **{stock_name}**: "
+            f"events with their dates, entities involved, figures, guidance and market sentiment. "
+            f"Reply with terse bullet points only.\n\n{chunk}"
+        ))]
+        for chunk in chunks
+    ]
+
+    notes = gateway.batch("condense", get_chat().bind(max_tokens=CHUNK_NOTES_TOKENS), map_prompts,
+                          max_concurrency=MAP_CONCURRENCY)
+    condensed = "\n\n".join(note.content.strip() for note in notes)
+    return _truncate_to_tokens(condensed, MAX_ARTICLE_TOKENS)
+
+
+
+class SessionMemoryStore:
+    """
+    Stocky Bhai conversation history, kept separately for every Streamlit session.
+
+    Each history is trimmed to its most recent `max_tokens` worth of messages after every
+    exchange, so prompt size per call stays bounded. Sessions idle for longer than `idle_ttl`
+    seconds are dropped, and at most `max_sessions` are kept (least recently used go first),
+    so process memory does not grow with total traffic.
+    """
+
+    def __init__(self, max_tokens: int = 1500, idle_ttl: float = 30 * 60, max_sessions: int = 500):
+        self.max_tokens = max_tokens
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # session_id -> (messages, last_used)
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - last_used < self.idle_ttl:
+                break
+            del self._sessions[session_id]
+
+    def history(self, session_id: str) -> list:
+        """Messages of a session, oldest first."""
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            messages, _ = self._sessions.get(session_id, ([], now))
+            self._sessions[session_id] = (messages, now)
+            self._sessions.move_to_end(session_id)
+            return list(messages)
+
+    def add_exchange(self, session_id: str, question: str, answer: str):
+        """Append a question / answer pair and trim the session back to its token window."""
+        now = time.time()
+        with self._lock:
+            messages, _ = self._sessions.get(session_id, ([], now))
+            messages = trim_messages(
+                messages + [HumanMessage(content=question), AIMessage(content=answer)],
+                max_tokens=self.max_tokens,
+                token_counter=lambda msgs: sum(_estimate_tokens(m.content) for m in msgs),
+                strategy="last",
+                start_on="human",
+            )
+            self._sessions[session_id] = (messages, now)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+
+session_memory = SessionMemoryStore()
+
+
 class InvestmentSuggestion(BaseModel):
     """Investment recommendation with structured level and justification."""
     suggestion: str = Field(
@@ -48,25 +177,40 @@ class StockAnalysis(BaseModel):
     suggestion: InvestmentSuggestion
 
 
-def summarize_stock_articles_structured(stock_name: str, urls: List[str]) -> StockAnalysis:
-    """Scrape and analyze a list of article URLs using Groq, returning enhanced structured output."""
-    articles_text = scrape_multiple_articles(urls)
+@functools.lru_cache(maxsize=None)
+def get_structured_analysis_llm():
+    # include_raw keeps the underlying message so the gateway can record token usage
+    return get_chat().with_structured_output(StockAnalysis, include_raw=True)
 
-    if not articles_text or len(articles_text.strip()) < 100:
-        return StockAnalysis(
-            stock_symbol=stock_name,
-            summary="No valid content found in the provided URLs.",
-            key_events=[],
-            market_impact="Neutral impact due to lack of sufficient information.",
-            suggestion=InvestmentSuggestion(
-                suggestion="Hold",
-                reason="Not enough data to support a confident decision."
-            )
+
+def no_content_analysis(stock_name: str) -> StockAnalysis:
+    return StockAnalysis(
+        stock_symbol=stock_name,
+        summary="No valid content found in the provided URLs.",
+        key_events=[],
+        market_impact="Neutral impact due to lack of sufficient information.",
+        suggestion=InvestmentSuggestion(
+            suggestion="Hold",
+            reason="Not enough data to support a confident decision."
         )
+    )
+
+
+def _failed_analysis(stock_name: str, error) -> StockAnalysis:
+    return StockAnalysis(
+        stock_symbol=stock_name,
+        summary=f"Error occurred during analysis: {str(error)}",
+        key_events=[],
+        market_impact="Neutral due to failure in processing.",
+        suggestion=InvestmentSuggestion(
+            suggestion="Hold",
+            reason="Analysis failed due to internal error."
+        )
+    )
 
-    structured_llm = chat.with_structured_output(StockAnalysis)
 
-    prompt = (
+def _analysis_prompt(stock_name: str, article_content: str) -> str:
+    return (
         f"You are a financial analyst specializing in the stock market. "
         f"Analyze the following news articles related to the stock **{stock_name}**. "
         f"Return a structured response with:\n"
@@ -76,42 +220,207 @@ def summarize_stock_articles_structured(stock_name: str, urls: List[str]) -> Sto
         f"- An **investment suggestion** as a JSON object with:\n"
         f"  - `suggestion`: one of [Strong Buy, Weak Buy, Hold, Weak Sell, Strong Sell]\n"
         f"  - `reason`: justification for this suggestion based on the article content\n\n"
-        f"Article content:\n{articles_text}"
+        f"Article content:\n{article_content}"
     )
 
+
+def _article_content(stock_name: str, articles_text: str, fast: bool) -> str:
+    """Article text fitted to the token budget of the selected mode."""
+    if fast:
+        return _truncate_to_tokens(articles_text, FAST_MODE_TOKENS)
+    return _condense_articles(stock_name, articles_text)
+
+
+def _analysis_cache_key(stock_name: str, articles_text: str, fast: bool) -> str:
+    # Identical inputs (same query, same article text, same mode) reuse the stored analysis instead of re-calling Groq
+    return ContentCache.key(MODEL_NAME, "fast" if fast else "full", stock_name, articles_text)
+
+
+def _cached_analysis(cache_key: str) -> Optional[StockAnalysis]:
+    cached = analysis_cache.get(cache_key)
+    if cached:
+        try:
+            return StockAnalysis.model_validate(cached)
+        except ValidationError:
+            pass
+    return None
+
+
+def analyze_articles_text(stock_name: str, articles_text: str, fast: bool = False) -> StockAnalysis:
+    """
+    Structured analysis of already-scraped article text.
+
+    Long article sets are condensed with a concurrent map step before the structured analysis.
+    With `fast=True` the article text is capped at FAST_MODE_TOKENS and analyzed in a single call,
+    so latency stays predictable however long the articles are.
+
+    Raises:
+    - Whatever the LLM call raises once the gateway's retries are exhausted.
+    """
+    cache_key = _analysis_cache_key(stock_name, articles_text, fast)
+    cached = _cached_analysis(cache_key)
+    if cached:
+        return cached
+
+    prompt = _analysis_prompt(stock_name, _article_content(stock_name, articles_text, fast))
+    result = gateway.invoke("analysis", get_structured_analysis_llm(), [HumanMessage(content=prompt)])
+    response = result['parsed']
+    if response is None:
+        raise result['parsing_error'] or ValueError("Model returned no structured analysis.")
+
+    response.stock_symbol = stock_name
+    analysis_cache.put(cache_key, response.model_dump())
+    return response
+
+
+def has_enough_content(articles_text: str) -> bool:
+    return bool(articles_text) and len(articles_text.strip()) >= 100
+
+
+def summarize_stock_articles_structured(stock_name: str, urls: List[str], fast: bool = False) -> StockAnalysis:
+    """Scrape and analyze a list of article URLs using Groq, returning enhanced structured output."""
+    articles_text = scrape_multiple_articles(urls)
+
+    if not has_enough_content(articles_text):
+        return no_content_analysis(stock_name)
+
     try:
-        response = structured_llm.invoke([HumanMessage(content=prompt)])
-        response.stock_symbol = stock_name
-        return response
+        return analyze_articles_text(stock_name, articles_text, fast)
     except Exception as e:
-        return StockAnalysis(
-            stock_symbol=stock_name,
-            summary=f"Error occurred during analysis: {str(e)}",
-            key_events=[],
-            market_impact="Neutral due to failure in processing.",
-            suggestion=InvestmentSuggestion(
-                suggestion="Hold",
-                reason="Analysis failed due to internal error."
-            )
+        return _failed_analysis(stock_name, e)
+
+
+class JsonFieldStream:
+    """
+    Stream one string field of a JSON completion while it is being generated.
+
+    Iterating yields the newly generated text of `field` (ready for `st.write_stream`); the
+    accumulated completion is re-parsed as partial JSON after every chunk. Once the stream is
+    exhausted, `data` holds the complete JSON object and `result` whatever `parse(data)` returns
+    (`data` is None if the completion could not be parsed or the stream failed).
+    """
+
+    def __init__(self, chunks, field: str, parse=None):
+        self._chunks = chunks
+        self._field = field
+        self._parse = parse or (lambda data: data)
+        self.text = ""
+        self.data = None
+        self.error = None
+        self.result = None
+
+    def __iter__(self):
+        emitted = 0
+        try:
+            for chunk in self._chunks:
+                self.text += chunk
+                value = self._partial().get(self._field)
+                if isinstance(value, str) and len(value) > emitted:
+                    yield value[emitted:]
+                    emitted = len(value)
+        except Exception as e:
+            self.error = e
+            print(f"[ERROR] LLM stream failed: {e}")
+
+        try:
+            start = self.text.find("{")
+            self.data = json.loads(self.text[start:self.text.rfind("}") + 1]) if start >= 0 else None
+        except ValueError:
+            self.data = None
+        self.result = self._parse(self.data)
+
+    def _partial(self) -> dict:
+        start = self.text.find("{")
+        try:
+            partial = parse_partial_json(self.text[start:]) if start >= 0 else None
+        except ValueError:
+            partial = None
+        return partial if isinstance(partial, dict) else {}
+
+
+def _token_stream(name: str, llm, messages):
+    for chunk in gateway.stream(name, llm, messages):
+        if chunk.content:
+            yield chunk.content
+
+
+def stream_stock_analysis(stock_name: str, urls: List[str], fast: bool = False) -> JsonFieldStream:
+    """
+    Streaming variant of `summarize_stock_articles_structured`.
+
+    Scraping and condensing happen up front; the returned stream then yields the `summary` text
+    token by token, and its `result` is the validated StockAnalysis once the stream is consumed.
+    """
+    articles_text = scrape_multiple_articles(urls)
+
+    if not has_enough_content(articles_text):
+        return _finished_stream(no_content_analysis(stock_name))
+
+    cache_key = _analysis_cache_key(stock_name, articles_text, fast)
+    cached = _cached_analysis(cache_key)
+    if cached:
+        return _finished_stream(cached)
+
+    try:
+        prompt = (
+            _analysis_prompt(stock_name, _article_content(stock_name, articles_text, fast))
+            + "\n\nRespond with ONLY a JSON object, starting with the `summary` field, that matches this JSON schema:\n"
+            + json.dumps(StockAnalysis.model_json_schema())
         )
+    except Exception as e:
+        return _finished_stream(_failed_analysis(stock_name, e))
+
+    def parse(data):
+        if data is None:
+            return _failed_analysis(stock_name, "Could not parse the streamed analysis.")
+        try:
+            analysis = StockAnalysis.model_validate({**data, "stock_symbol": stock_name})
+        except ValidationError as e:
+            return _failed_analysis(stock_name, e)
+        analysis_cache.put(cache_key, analysis.model_dump())
+        return analysis
+
+    return JsonFieldStream(_token_stream("analysis", get_chat(streaming=True), [HumanMessage(content=prompt)]), "summary",
+                           parse=parse)
+
+
+def _finished_stream(analysis: StockAnalysis) -> JsonFieldStream:
+    """A stream that replays an already available analysis in one chunk."""
+    return JsonFieldStream(iter([analysis.model_dump_json()]), "summary",
+                           parse=lambda data: analysis)
+
 
 def summarize_stock_articles(stock_name, urls: list[str]) -> str:
     """Scrape and summarize a list of article URLs using Groq + Mixtral."""
     articles_text = scrape_multiple_articles(urls)
 
-    if not articles_text or len(articles_text.strip()) < 100:
+    if not has_enough_content(articles_text):
         return "No valid content found in the provided URLs."
 
-    prompt = (
+    response = gateway.invoke("summary", get_chat(), [HumanMessage(content=_summary_prompt(stock_name, articles_text))])
+    return response.content.strip()
+
+
+def stream_stock_articles_summary(stock_name, urls: list[str]) -> Generator[str, None, None]:
+    """Streaming variant of `summarize_stock_articles`, yielding the summary token by token."""
+    articles_text = scrape_multiple_articles(urls)
+
+    if not has_enough_content(articles_text):
+        yield "No valid content found in the provided URLs."
+        return
+
+    yield from _token_stream("summary", get_chat(streaming=True),
+                             [HumanMessage(content=_summary_prompt(stock_name, articles_text))])
+
+
+def _summary_prompt(stock_name, articles_text: str) -> str:
+    return (
         f"You are a financial analyst specializing in the stock market. "
         f"Analyze the following news articles related to the stock **{stock_name}**. "
         f"Provide a concise summary highlighting how {stock_name} is impacted, including any relevant trends, events, or market sentiment.\n\n"
-        f"{articles_text}"
+        f"{_condense_articles(stock_name, articles_text)}"
     )
 
-    response = chat.invoke([HumanMessage(content=prompt)])
-    return response.content.strip()
-
 
 class StockyBhaiAnswer(BaseModel):
     """Structured response from Stocky Bhai to a finance question."""
@@ -125,8 +434,9 @@ class StockyBhaiAnswer(BaseModel):
         description="Optional list of **relevant and Indian stock market-focused** YouTube video links. Include only if it adds strong value."
     )
 
-def ask_stocky_bhai_qa(query: str) -> StockyBhaiAnswer:
-    prompt = (
+
+def _stocky_bhai_prompt(query: str) -> str:
+    return (
         "You are Stocky Bhai — You are a roleplay version of KGF's Rocky Bhai. You are like his cousin brother with the same personality. "
         "You speak with the weight of experience. Every word matters. No soft talk, no sugarcoating. "
         "You only focus on the Indian stock market: NSE, BSE, SEBI rules, IPOs, Indian mutual funds, and real-world investing.\n\n"
@@ -147,17 +457,47 @@ def ask_stocky_bhai_qa(query: str) -> StockyBhaiAnswer:
         "Output ONLY the JSON. No markdown. No titles. No quotes. No prefix."
     )
 
-    response = qa_chain.run(prompt)
 
+def _parse_stocky_bhai_answer(data) -> StockyBhaiAnswer:
     try:
-        parsed = json.loads(response)
-        return StockyBhaiAnswer(**parsed)
+        return StockyBhaiAnswer(**data)
     except Exception as e:
         return StockyBhaiAnswer(
             answer="Sorry, couldn't parse the response.",
             youtube_links=[]
         )
 
+
+def ask_stocky_bhai_qa(query: str, session_id: str = "default") -> StockyBhaiAnswer:
+    messages = session_memory.history(session_id) + [HumanMessage(content=_stocky_bhai_prompt(query))]
+    response = gateway.invoke("stocky_bhai", get_chat(), messages).content
+    session_memory.add_exchange(session_id, query, response)
+
+    try:
+        parsed = json.loads(response)
+    except Exception as e:
+        parsed = None
+    return _parse_stocky_bhai_answer(parsed)
+
+
+def stream_stocky_bhai_answer(query: str, session_id: str = "default") -> JsonFieldStream:
+    """
+    Streaming variant of `ask_stocky_bhai_qa`.
+
+    The returned stream yields the `answer` text token by token; its `result` is the parsed
+    StockyBhaiAnswer once consumed. The exchange is added to the session's memory at the end.
+    """
+    # Only the raw question is remembered; the persona instructions are re-sent with the latest question
+    messages = session_memory.history(session_id) + [HumanMessage(content=_stocky_bhai_prompt(query))]
+
+    def parse(data):
+        session_memory.add_exchange(session_id, query, stream.text)
+        return _parse_stocky_bhai_answer(data)
+
+    stream = JsonFieldStream(_token_stream("stocky_bhai", get_chat(streaming=True), messages), "answer", parse=parse)
+    return stream
+
+
 # Example usage
 if __name__ == "__main__":
     # stock_name = "Adani Green Energy Ltd"
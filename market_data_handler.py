@@ -0,0 +1,213 @@
+# market_data_handler.py
+import numpy as np
+import pandas as pd
+from ohlcv_store import OHLCVStore
+
+# Upper bound on concurrent Yahoo requests issued by a single batched download
+MAX_DOWNLOAD_THREADS = 8
+
+# Calendar length of each Yahoo period; '1d' is special-cased as "the last trading session"
+PERIOD_OFFSETS = {
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "3y": pd.DateOffset(years=3),
+    "5y": pd.DateOffset(years=5),
+}
+
+# Yahoo only serves intraday bars for roughly the last 60 days
+INTRADAY_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"}
+INTRADAY_LOOKBACK = pd.Timedelta(days=59)
+
+# Prices are split/dividend adjusted, so a corporate action restates every earlier bar. A closed
+# bar whose re-fetched Close moved by more than this fraction means the stored history is on a
+# stale basis and must be downloaded again.
+RESTATEMENT_TOLERANCE = 1e-3
+
+_default_store = OHLCVStore()
+
+
+def fetch_ohlcv_batch(symbols, period, interval: str, start=None) -> pd.DataFrame:
+    """
+    Fetch OHLCV history for several symbols in one batched Yahoo Finance download.
+
+    Parameters:
+    - symbols: Iterable of Yahoo symbols (e.g. 'TCS.NS').
+    - period (str): Yahoo period string, e.g. '3mo'. Ignored when `start` is given.
+    - interval (str): Yahoo bar interval, e.g. '1d'.
+    - start: Optional timestamp to fetch bars from instead of a whole period.
+
+    Returns:
+    - DataFrame with (symbol, field) MultiIndex columns, e.g. frame['TCS.NS']['Close'].
+      Empty DataFrame if nothing could be fetched.
+    """
+    symbols = sorted(set(symbols))
+    if not symbols:
+        return pd.DataFrame()
+
+    import yfinance as yf  # Deferred: slow to import and only needed once a chart is shown
+
+    if start is not None:
+        window = {'start': start.to_pydatetime() if isinstance(start, pd.Timestamp) else start}
+    else:
+        window = {'period': period}
+
+    try:
+        data = yf.download(
+            symbols,
+            interval=interval,
+            **window,
+            group_by='ticker',
+            auto_adjust=True,
+            threads=min(MAX_DOWNLOAD_THREADS, len(symbols)),
+            progress=False,
+        )
+    except Exception as e:
+        print(f"[ERROR] Failed to download OHLCV data: {e}")
+        return pd.DataFrame()
+
+    if data is None or data.empty:
+        return pd.DataFrame()
+
+    # Older yfinance versions return flat columns for a single ticker
+    if not isinstance(data.columns, pd.MultiIndex):
+        data.columns = pd.MultiIndex.from_product([symbols, data.columns])
+
+    return data
+
+
+def get_symbol_history(frame: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """Slice one symbol's OHLCV out of a batched frame, dropping bars it has no data for."""
+    if frame.empty or symbol not in frame.columns.get_level_values(0):
+        return pd.DataFrame()
+    return frame[symbol].dropna(how='all')
+
+
+def fetch_recent_closes(symbols, sessions: str = "5d") -> pd.DataFrame:
+    """
+    Daily closes of the last few sessions for several symbols in one batched download.
+
+    A few sessions (rather than just today) keep symbols that did not trade today priced and
+    give the previous close needed for day-over-day changes.
+
+    Returns:
+    - DataFrame of closes, one column per symbol, indexed by session date.
+    """
+    data = fetch_ohlcv_batch(symbols, sessions, "1d")
+    if data.empty:
+        return pd.DataFrame()
+    return data.xs('Close', axis=1, level=1)
+
+
+def _window_start(period: str, tz=None):
+    """Start of the calendar window covered by `period`, or None for '1d' / unknown periods."""
+    offset = PERIOD_OFFSETS.get(period)
+    if offset is None:
+        return None
+    return pd.Timestamp.now(tz=tz).normalize() - offset
+
+
+def _slice_window(bars: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Cut a stored history down to the bars a Yahoo `period` request would have returned."""
+    if period == "1d":
+        last_session = bars.index[-1].normalize()
+        return bars[bars.index.normalize() == last_session]
+
+    start = _window_start(period, bars.index.tz)
+    return bars[bars.index >= start] if start is not None else bars
+
+
+def _restated(stored: pd.DataFrame, fetched: pd.DataFrame) -> bool:
+    """True if a closed stored bar (any but the newest) comes back with a different Close."""
+    overlap = fetched.index.intersection(stored.index[:-1])
+    if overlap.empty:
+        return False
+    old = stored.loc[overlap, 'Close'].to_numpy(dtype=float)
+    new = fetched.loc[overlap, 'Close'].to_numpy(dtype=float)
+    valid = ~(np.isnan(old) | np.isnan(new))
+    return bool((np.abs(new[valid] - old[valid]) > RESTATEMENT_TOLERANCE * np.abs(old[valid])).any())
+
+
+def _backfill(store: OHLCVStore, symbols, period: str, interval: str, replace: bool = False) -> dict:
+    """
+    Download the whole `period` for `symbols` in one call and store it, merged into the stored
+    history or, with `replace`, overwriting it. Returns {symbol: stored history}.
+    """
+    data = fetch_ohlcv_batch(symbols, period, interval)
+    histories = {}
+    for symbol in symbols:
+        bars = get_symbol_history(data, symbol)
+        if bars.empty:
+            continue
+        start = _window_start(period, bars.index.tz)
+        covered_from = start if start is not None else bars.index[0]
+        write = store.write if replace else store.append
+        histories[symbol] = write(symbol, interval, bars, covered_from=covered_from)
+    return histories
+
+
+def fetch_ohlcv_history(symbols, period: str, interval: str, store: OHLCVStore = None) -> pd.DataFrame:
+    """
+    Store-backed variant of `fetch_ohlcv_batch`.
+
+    Symbols already on disk only download the bars from their last closed stored bar on (one
+    batched call for all of them); symbols without enough stored history are backfilled for the
+    whole period in one more call. If the re-fetched closed bar no longer matches the stored one,
+    Yahoo has restated the adjusted prices (a split or dividend), so that symbol's file is
+    rewritten from a fresh backfill. The requested window is then served from the local Parquet store.
+
+    Returns:
+    - DataFrame with (symbol, field) MultiIndex columns, same shape as `fetch_ohlcv_batch`.
+    """
+    store = store or _default_store
+    symbols = sorted(set(symbols))
+
+    histories = {}
+    backfill = []
+    incremental = {}
+
+    for symbol in symbols:
+        bars, covered_from = store.read(symbol, interval)
+        if bars.empty:
+            backfill.append(symbol)
+            continue
+
+        histories[symbol] = bars
+        last_ts = bars.index[-1]
+        start = _window_start(period, last_ts.tz)
+
+        if start is not None and (covered_from is None or covered_from > start):
+            backfill.append(symbol)
+        elif interval in INTRADAY_INTERVALS and pd.Timestamp.now(tz=last_ts.tz) - last_ts > INTRADAY_LOOKBACK:
+            backfill.append(symbol)
+        else:
+            # The last stored bar may still be forming; the one before it is closed and must not change
+            incremental[symbol] = bars.index[-2] if len(bars) > 1 else last_ts
+
+    if backfill:
+        histories.update(_backfill(store, backfill, period, interval))
+
+    if incremental:
+        # Re-fetch from the oldest overlap bar so every symbol's still-forming bar gets refreshed
+        data = fetch_ohlcv_batch(incremental, period, interval, start=min(incremental.values()))
+        restated = []
+        for symbol in incremental:
+            bars = get_symbol_history(data, symbol)
+            if bars.empty:
+                continue
+            if _restated(histories[symbol], bars):
+                restated.append(symbol)
+            else:
+                histories[symbol] = store.append(symbol, interval, bars)
+
+        if restated:
+            # Until the re-download succeeds the old history is served as is: stale, but on one basis
+            histories.update(_backfill(store, restated, period, interval, replace=True))
+
+    frames = {symbol: _slice_window(bars, period) for symbol, bars in histories.items() if not bars.empty}
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).sort_index()
@@ -0,0 +1,119 @@
+# market_poller.py
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import nse_handler
+from quote_cache import quote_cache
+from sector_map import sector_map
+
+
+class MarketPoller:
+    """
+    Background scheduler refreshing market data on fixed cadences, independent of Streamlit reruns.
+
+    Each job's latest result is written into the shared quote cache, which acts as the in-memory
+    snapshot; the UI only ever reads from it with `snapshot()`, so a rerun does no network I/O.
+    A job still running when it comes due again is skipped rather than started twice.
+    """
+
+    def __init__(self, cache=quote_cache, max_workers: int = 4):
+        self._cache = cache
+        self._jobs = {}
+        self._running = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-poller")
+        self._thread = None
+        self._listeners = []
+
+    def add_job(self, name: str, loader, interval: float):
+        """Register `loader()` to be run every `interval` seconds, storing its result under `name`."""
+        with self._lock:
+            self._jobs[name] = (loader, interval)
+        self._wakeup.set()
+
+    def add_listener(self, callback):
+        """Call `callback(name, value)` on the poller's worker thread after each successful refresh."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def start(self):
+        """Start the scheduler thread; every job runs once immediately. Safe to call repeatedly."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="market-poller", daemon=True)
+            self._thread.start()
+
+    def snapshot(self, name: str, default=None):
+        """Latest result of a job, or `default` if it has not completed successfully yet."""
+        return self._cache.peek(name, default)
+
+    def _run(self):
+        schedule = []
+        scheduled = set()
+
+        while True:
+            with self._lock:
+                for name in self._jobs.keys() - scheduled:
+                    heapq.heappush(schedule, (time.monotonic(), name))
+                    scheduled.add(name)
+
+            due_at, name = schedule[0] if schedule else (time.monotonic() + 1, None)
+            self._wakeup.wait(timeout=max(0.0, due_at - time.monotonic()))
+            self._wakeup.clear()
+
+            if name is None or time.monotonic() < due_at:
+                continue
+
+            heapq.heappop(schedule)
+            loader, interval = self._jobs[name]
+            heapq.heappush(schedule, (due_at + interval, name))
+
+            with self._lock:
+                if name in self._running:
+                    continue
+                self._running.add(name)
+            self._executor.submit(self._refresh, name, loader)
+
+    def _refresh(self, name: str, loader):
+        try:
+            if self._cache.refresh(name, loader):
+                self._notify(name, self._cache.peek(name))
+        finally:
+            with self._lock:
+                self._running.discard(name)
+
+    def _notify(self, name: str, value):
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(name, value)
+            except Exception as e:
+                print(f"[ERROR] Poller listener failed for {name}: {e}")
+
+
+def _update_sector_map(name: str, value):
+    """Poller listener: keep the on-disk sector map in step with the F&O positions payload."""
+    if name == 'fno_positions':
+        sector_map.update_from_positions(value)
+
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_market_poller() -> MarketPoller:
+    """Process-wide poller with the default NSE jobs, started on first use."""
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = MarketPoller()
+            # Two bulk requests; index cards, gainers / losers and the heatmap are derived from them
+            _poller.add_job('fno_positions', nse_handler.fetch_nse_positions_data, interval=60)
+            _poller.add_job('all_indices', nse_handler.fetch_all_indices, interval=30)
+            _poller.add_listener(_update_sector_map)
+            _poller.start()
+        return _poller
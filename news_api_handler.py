@@ -1,25 +1,196 @@
 # news_api_handler.py
+import json
 import os
-from datetime import datetime
+import re
+import threading
+import time
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from newsapi import NewsApiClient
+from dedup import dedupe_articles
+from content_cache import ContentCache, news_cache, DEFAULT_CACHE_DIR
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize the News API client
-_api_key = os.getenv("NEWS_API_KEY")
-if not _api_key:
-    raise EnvironmentError("NEWS_API_KEY not found in .env file")
+TODAY_NEWS_QUERY = "Indian Stock Market OR Sensex OR Bombay Stock Exchange OR BSE OR NSE OR Indian Investments"
+NEWS_FRESH_FOR = 900         # Seconds before a cached query is fetched again
+DAILY_REQUEST_QUOTA = 100    # NewsAPI developer plan: 100 requests per day
+QUOTA_RESERVE = 10           # Below this many requests left, only uncached queries may spend quota
+MAX_QUERY_LENGTH = 500       # NewsAPI limit on the `q` parameter
+MAX_PAGE_SIZE = 100
+_NAME_STOPWORDS = {'limited', 'ltd', 'the', 'and', 'of', 'co', 'company', 'corporation', 'india'}
 
-_news_api = NewsApiClient(api_key=_api_key)
+
+class NewsQuota:
+    """
+    Counts NewsAPI requests per UTC day, persisted to disk so restarts don't reset the count.
+
+    NewsAPI answers over-quota requests with an error, so the app stops spending requests on
+    refreshes once fewer than `reserve` are left and serves cached results instead.
+    """
+
+    def __init__(self, path: str, daily_limit: int = DAILY_REQUEST_QUOTA, reserve: int = QUOTA_RESERVE):
+        self.path = path
+        self.daily_limit = daily_limit
+        self.reserve = reserve
+        self._lock = threading.Lock()
+        self._day, self._used = self._read()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+            return state['day'], int(state['used'])
+        except (OSError, ValueError, KeyError):
+            return self._today(), 0
+
+    def _write(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'day': self._day, 'used': self._used}, f)
+        os.replace(tmp_path, self.path)
+
+    def _roll_over(self):
+        if self._day != self._today():
+            self._day, self._used = self._today(), 0
+
+    def remaining(self) -> int:
+        with self._lock:
+            self._roll_over()
+            return max(0, self.daily_limit - self._used)
+
+    def can_refresh(self) -> bool:
+        """True while refreshing already cached queries is still affordable."""
+        return self.remaining() > self.reserve
+
+    def consume(self, requests: int = 1):
+        with self._lock:
+            self._roll_over()
+            self._used += requests
+            self._write()
+
+    def exhaust(self):
+        """Mark today's quota as used up (NewsAPI reported that we are rate limited)."""
+        with self._lock:
+            self._roll_over()
+            self._used = max(self._used, self.daily_limit)
+            self._write()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._roll_over()
+            return {'day': self._day, 'used': self._used, 'limit': self.daily_limit}
+
+
+news_quota = NewsQuota(os.path.join(DEFAULT_CACHE_DIR, "newsapi_quota.json"))
+
+# The client is created on first use, so importing this module never touches the network or the key
+_news_api = None
+_news_api_lock = threading.Lock()
+
+
+def _get_news_api():
+    """Return the shared NewsAPI client, creating it on first use."""
+    global _news_api
+    with _news_api_lock:
+        if _news_api is None:
+            from newsapi import NewsApiClient
+
+            api_key = os.getenv("NEWS_API_KEY")
+            if not api_key:
+                raise EnvironmentError("NEWS_API_KEY not found in .env file")
+            _news_api = NewsApiClient(api_key=api_key)
+        return _news_api
+
+
+# Concurrent sessions asking for the same news share one request: each normalized query maps to
+# one of a fixed set of locks, so free-text searches can't grow the set in a long-running process.
+# Unrelated queries that share a stripe just wait on each other, which is rare with 64 stripes.
+QUERY_LOCK_STRIPES = 64
+_query_locks = [threading.Lock() for _ in range(QUERY_LOCK_STRIPES)]
+
+
+def _normalize_query(query: str) -> str:
+    """Case and whitespace insensitive form of a query, used as its cache key."""
+    return " ".join(query.split()).lower()
+
+
+def _query_lock(key: str) -> threading.Lock:
+    return _query_locks[hash(key) % QUERY_LOCK_STRIPES]
+
+
+def _unique_articles(articles: list) -> list:
+    """Flatten raw NewsAPI articles and keep one article per cluster of near-duplicate stories."""
+    flattened = [{
+        'title': (article.get('title') or '').strip(),
+        'description': article.get('description') or 'No Description',
+        'url': article.get('url', ''),
+        'publishedAt': article.get('publishedAt', ''),
+        'urlToImage': article.get('urlToImage', ''),
+        'source': (article.get('source') or {}).get('name', 'Unknown'),
+    } for article in articles]
+
+    return dedupe_articles([article for article in flattened if article['title']])
+
+
+def _search(query: str, page_size: int) -> list:
+    """
+    NewsAPI `get_everything` behind the shared cache and the daily quota.
+
+    Cached results younger than NEWS_FRESH_FOR are reused, as are older ones while the quota is
+    running low or when the request fails. Only the first fetch of a query may spend the reserve.
+
+    Raises:
+    - RuntimeError if the query was never fetched and cannot be fetched now.
+    """
+    normalized = _normalize_query(query)
+    key = ContentCache.key(normalized)
+
+    with _query_lock(normalized):
+        cached = news_cache.get(key)
+        usable = cached is not None and cached['page_size'] >= page_size
+        if usable and time.time() - cached['fetched_at'] < NEWS_FRESH_FOR:
+            return cached['articles'][:page_size]
+
+        if usable and not news_quota.can_refresh():
+            return cached['articles'][:page_size]
+        if news_quota.remaining() == 0:
+            if cached is not None:
+                return cached['articles'][:page_size]
+            raise RuntimeError("NewsAPI daily quota exhausted")
+
+        try:
+            news_quota.consume()
+            response = _get_news_api().get_everything(
+                q=query,
+                language='en',
+                sort_by='relevancy',
+                page_size=page_size,
+            )
+        except Exception as e:
+            if 'rateLimited' in str(e):
+                news_quota.exhaust()
+            if cached is not None:
+                print(f"[ERROR] NewsAPI request failed, serving cached results: {e}")
+                return cached['articles'][:page_size]
+            raise
+
+        articles = response.get('articles', [])
+        news_cache.put(key, {'fetched_at': time.time(), 'page_size': page_size, 'articles': articles})
+        return articles
 
 
 def fetch_query_news(query: str, page_size: int = 10) -> list:
     """
     Fetch the most relevant and unique news articles for a given query using NewsAPI.
 
-    Deduplicates based on the first 20 characters of the article title.
+    Near-duplicate stories (e.g. syndicated copies with reworded headlines) are collapsed into one
+    article. Results are cached for NEWS_FRESH_FOR seconds across sessions and restarts.
 
     Parameters:
     - query (str): Search keyword.
@@ -31,43 +202,80 @@ def fetch_query_news(query: str, page_size: int = 10) -> list:
     # Append 'STOCKS' to search handler - TODO: Remove later
     query += ' Stocks'
     try:
-        response = _news_api.get_everything(
-            q=query,
-            language='en',
-            sort_by='relevancy',
-            page_size=page_size,
-        )
-        articles = response.get('articles', [])
+        return _unique_articles(_search(query, page_size))[:5]
 
-        seen_title_prefixes = set()
-        unique_articles = []
+    except Exception as e:
+        print(f"[ERROR] Failed to fetch news: {e}")
+        return []
 
-        for article in articles:
-            title = article.get('title', '').strip()
-            title_key = title[:20].lower()  # First 20 characters, lowercased
 
-            if title and title_key not in seen_title_prefixes:
-                seen_title_prefixes.add(title_key)
-                unique_articles.append({
-                    'title': title,
-                    'description': article.get('description', 'No Description'),
-                    'url': article.get('url', ''),
-                    'publishedAt': article.get('publishedAt', ''),
-                    'urlToImage': article.get('urlToImage', ''),
-                    'source': article.get('source', {}).get('name', 'Unknown'),
-                })
+def _query_terms(query: str) -> list:
+    """Words an article must mention to belong to `query`, ignoring company-name boilerplate."""
+    words = re.findall(r"\w+", query.lower())
+    return [term for term in words if term not in _NAME_STOPWORDS] or words
 
-        return unique_articles[:5]
 
-    except Exception as e:
-        print(f"[ERROR] Failed to fetch news: {e}")
-        return []
+def _mentions(article: dict, terms: list) -> bool:
+    text = " ".join(str(article.get(field) or '') for field in ('title', 'description', 'content')).lower()
+    return all(re.search(rf"\b{re.escape(term)}", text) for term in terms)
+
+
+def _combined_query(queries: list) -> str:
+    return "((" + ") OR (".join(" ".join(_query_terms(query)) for query in queries) + ")) AND stocks"
+
+
+def _combined_query_groups(queries: list) -> list:
+    """Pack queries into OR-queries that fit NewsAPI's query length limit."""
+    groups, current = [], []
+    for query in queries:
+        candidate = current + [query]
+        if current and len(_combined_query(candidate)) > MAX_QUERY_LENGTH:
+            groups.append(current)
+            candidate = [query]
+        current = candidate
+    if current:
+        groups.append(current)
+    return groups
+
+
+def fetch_news_for_queries(queries: list, per_query: int = 5) -> dict:
+    """
+    Fetch news for several queries (e.g. company names) with as few NewsAPI requests as possible.
+
+    Queries are combined into `(q1) OR (q2) OR ...` requests and the returned articles are split
+    back out locally: an article belongs to every query whose words it mentions.
+
+    Parameters:
+    - queries (list): Search keywords.
+    - per_query (int): Maximum number of unique articles to return per query.
+
+    Returns:
+    - Dict of query -> list of article dictionaries (same shape as `fetch_query_news`). Queries
+      whose request failed are left out.
+    """
+    results = {}
+
+    for group in _combined_query_groups(list(dict.fromkeys(queries))):
+        try:
+            articles = _search(_combined_query(group), MAX_PAGE_SIZE)
+        except Exception as e:
+            print(f"[ERROR] Failed to fetch news for {len(group)} queries: {e}")
+            continue
+
+        for query in group:
+            terms = _query_terms(query)
+            matching = [article for article in articles if _mentions(article, terms)]
+            results[query] = _unique_articles(matching)[:per_query]
+
+    return results
+
 
 def fetch_today_news(page_size: int = 8) -> list:
     """
     Fetch today's top Indian stock market news articles using NewsAPI.
 
-    Deduplicates based on the first 20 characters of the article title.
+    Near-duplicate stories (e.g. syndicated copies with reworded headlines) are collapsed into one
+    article. Results are cached for NEWS_FRESH_FOR seconds across sessions and restarts.
 
     Parameters:
     - page_size (int): Number of articles to fetch. Max 100.
@@ -75,41 +283,9 @@ def fetch_today_news(page_size: int = 8) -> list:
     Returns:
     - List of dictionaries containing 'title', 'description', 'url', 'publishedAt', 'urlToImage', and 'source'
     """
-    today = datetime.now().strftime("%Y-%m-%d")
-
     try:
-        response = _news_api.get_everything(
-            q="Indian Stock Market OR Sensex OR Bombay Stock Exchange OR BSE OR NSE OR Indian Investments",
-            language="en",
-            sort_by="relevancy",
-            page_size=page_size,
-        )
-
-        articles = response.get("articles", [])
-
-        seen_title_prefixes = set()
-        unique_articles = []
-
-        for article in articles:
-            title = article.get("title", "").strip()
-            title_key = title[:20].lower()
-
-            if title and title_key not in seen_title_prefixes:
-                seen_title_prefixes.add(title_key)
-                unique_articles.append({
-                    "title": title,
-                    "description": article.get("description", "No Description"),
-                    "url": article.get("url", ""),
-                    "publishedAt": article.get("publishedAt", ""),
-                    "urlToImage": article.get("urlToImage", ""),
-                    "source": article.get("source", {}).get("name", "Unknown"),
-                })
-
-        return unique_articles
+        return _unique_articles(_search(TODAY_NEWS_QUERY, page_size))
 
     except Exception as e:
         print(f"[ERROR] Failed to fetch today’s news: {e}")
         return []
-
-
-print(fetch_today_news())
\ No newline at end of file
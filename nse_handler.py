@@ -0,0 +1,93 @@
+# nse_handler.py
+# nsepython is imported inside each fetcher: it is slow to import and only the poller thread needs it
+import numpy as np
+import pandas as pd
+
+FNO_POSITIONS_URL = 'https://www.nseindia.com/api/equity-stockIndices?index=SECURITIES%20IN%20F%26O'
+
+# Indices shown on the sidebar "Indices Snapshot" cards
+SNAPSHOT_INDICES = ['NIFTY 50', 'NIFTY IT', 'INDIA VIX']
+
+# The market snapshot is two bulk requests per refresh; everything else is derived from them locally:
+# - fetch_nse_positions_data(): the whole F&O universe -> ticker tape, gainers / losers
+# - fetch_all_indices(): every NSE index -> snapshot cards, indices heatmap
+
+
+def fetch_nse_positions_data() -> pd.DataFrame:
+    """Fetch the full F&O securities table (symbol, lastPrice, pChange, ...) from NSE."""
+    from nsepython import nsefetch
+
+    positions = nsefetch(FNO_POSITIONS_URL)
+    return pd.DataFrame(positions['data'])
+
+
+def fetch_all_indices() -> pd.DataFrame:
+    """
+    Fetch every NSE index in one request: indexName, indexOrder, indexType, last, percChange.
+
+    Values are numeric and rows with missing values are dropped.
+    """
+    from nsepython import nse_index
+
+    df = nse_index()
+
+    # Select only required columns
+    df_cleaned = df[['indexName', 'indexOrder', 'indexType', 'last', 'percChange']].copy()
+
+    # Remove commas and convert to numeric
+    df_cleaned['last'] = pd.to_numeric(df_cleaned['last'].astype(str).str.replace(',', ''), errors='coerce')
+    df_cleaned['percChange'] = pd.to_numeric(df_cleaned['percChange'].astype(str).str.replace(',', ''), errors='coerce')
+
+    # Drop any rows with NaNs in any column
+    df_cleaned.dropna(inplace=True)
+
+    return df_cleaned.reset_index(drop=True)
+
+
+def indices_summary(all_indices: pd.DataFrame, index_names=tuple(SNAPSHOT_INDICES)) -> pd.DataFrame:
+    """
+    Last value and % change for each index name, looked up in the `fetch_all_indices` table.
+
+    Indices missing from the table are reported as 'N/A' rows.
+    """
+    by_name = all_indices.set_index(all_indices['indexName'].str.upper()) if not all_indices.empty else None
+
+    summaries = []
+    for name in index_names:
+        if by_name is not None and name.upper() in by_name.index:
+            row = by_name.loc[name.upper()]
+            summaries.append({"Index": name, "Value": row['last'], "% Change": row['percChange']})
+        else:
+            summaries.append({"Index": name, "Value": "N/A", "% Change": "-"})
+    return pd.DataFrame(summaries)
+
+
+def top_gainers_losers(positions: pd.DataFrame, top_k: int = 5):
+    """
+    Top-k gainers and losers of the F&O universe by pChange.
+
+    Uses a partial sort (argpartition) so only the k winners and k losers are ever sorted.
+
+    Returns:
+    - (gainers, losers): DataFrames with symbol, open, lastPrice, pChange, best first.
+    """
+    columns = ['symbol', 'open', 'lastPrice', 'pChange']
+    if positions.empty:
+        return pd.DataFrame(columns=columns), pd.DataFrame(columns=columns)
+
+    # The index summary row (priority 1) is not a stock
+    stocks = positions[positions['priority'] == 0] if 'priority' in positions.columns else positions
+    change = pd.to_numeric(stocks['pChange'], errors='coerce').to_numpy(dtype=float)
+    valid = np.flatnonzero(~np.isnan(change))
+    k = min(top_k, len(valid))
+    if k == 0:
+        return pd.DataFrame(columns=columns), pd.DataFrame(columns=columns)
+
+    gainers = valid[np.argpartition(-change[valid], k - 1)[:k]]
+    gainers = gainers[np.argsort(-change[gainers])]
+    losers = valid[np.argpartition(change[valid], k - 1)[:k]]
+    losers = losers[np.argsort(change[losers])]
+
+    return (stocks.iloc[gainers][columns].reset_index(drop=True),
+            stocks.iloc[losers][columns].reset_index(drop=True))
+
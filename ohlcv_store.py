@@ -0,0 +1,93 @@
+# ohlcv_store.py
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_STORE_DIR = os.path.join("data", "ohlcv")
+
+# Parquet schema metadata key recording the earliest window start fetched in full
+_COVERED_FROM_KEY = b"stockzy.covered_from"
+
+
+class OHLCVStore:
+    """
+    Local columnar OHLCV history, one Parquet file per (interval, symbol):
+
+        <root>/<interval>/<symbol>.parquet
+
+    Files are read memory-mapped and rewritten atomically on append, so concurrent
+    Streamlit sessions never observe a half-written file.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        self.root = root
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, interval, f"{symbol}.parquet")
+
+    def read(self, symbol: str, interval: str):
+        """
+        Return (bars, covered_from) for a symbol, or (empty DataFrame, None) if nothing is stored.
+
+        `covered_from` is the earliest timestamp from which the stored history is known to be complete.
+        """
+        path = self._path(symbol, interval)
+        if not os.path.exists(path):
+            return pd.DataFrame(), None
+
+        try:
+            table = pq.read_table(path, memory_map=True)
+        except Exception as e:
+            print(f"[ERROR] Corrupt OHLCV file {path}, ignoring it: {e}")
+            return pd.DataFrame(), None
+
+        metadata = table.schema.metadata or {}
+        covered_from = metadata.get(_COVERED_FROM_KEY)
+        covered_from = pd.Timestamp(covered_from.decode()) if covered_from else None
+        return table.to_pandas(), covered_from
+
+    def append(self, symbol: str, interval: str, bars: pd.DataFrame, covered_from=None) -> pd.DataFrame:
+        """
+        Merge new bars into the stored history and persist it.
+
+        Bars sharing a timestamp with stored ones replace them (the last, still-forming bar
+        gets refreshed). Passing `covered_from` marks the history complete from that point on.
+
+        Returns:
+        - The merged history.
+        """
+        stored, stored_covered_from = self.read(symbol, interval)
+
+        merged = pd.concat([stored, bars]) if not stored.empty else bars.copy()
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+
+        if covered_from is not None and stored_covered_from is not None:
+            covered_from = min(pd.Timestamp(covered_from), stored_covered_from)
+        elif covered_from is None:
+            covered_from = stored_covered_from
+
+        return self.write(symbol, interval, merged, covered_from)
+
+    def write(self, symbol: str, interval: str, bars: pd.DataFrame, covered_from=None) -> pd.DataFrame:
+        """
+        Replace the stored history with `bars`, e.g. after the provider restated past prices.
+
+        Returns:
+        - The stored history.
+        """
+        bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+        table = pa.Table.from_pandas(bars)
+        if covered_from is not None:
+            metadata = dict(table.schema.metadata or {})
+            metadata[_COVERED_FROM_KEY] = pd.Timestamp(covered_from).isoformat().encode()
+            table = table.replace_schema_metadata(metadata)
+
+        path = self._path(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+        return bars
@@ -0,0 +1,126 @@
+# portfolio_engine.py
+import numpy as np
+import pandas as pd
+
+# Column order of the valuation frame rendered by the Portfolio tab
+VALUATION_COLUMNS = ['Stock', 'Quantity', 'Avg Price', 'Current Price', 'Invested', 'Current Value',
+                     'P&L', 'P&L %', 'Weight %', 'Symbol']
+
+
+def positions_from_holdings(portfolio: dict):
+    """
+    Convert the {symbol: {'quantity', 'avg_price'}} session portfolio into position arrays.
+
+    Returns:
+    - Tuple of (symbols, quantities, avg_prices) NumPy arrays, aligned by position.
+    """
+    symbols = np.array(list(portfolio.keys()), dtype=object)
+    quantities = np.fromiter((h['quantity'] for h in portfolio.values()), dtype=float, count=len(portfolio))
+    avg_prices = np.fromiter((h['avg_price'] for h in portfolio.values()), dtype=float, count=len(portfolio))
+    return symbols, quantities, avg_prices
+
+
+def latest_prices(closes: pd.DataFrame) -> pd.Series:
+    """Last known close per symbol from a symbol-column close frame."""
+    if closes.empty:
+        return pd.Series(dtype=float)
+    return closes.ffill().iloc[-1].dropna()
+
+
+def value_portfolio(portfolio: dict, last_prices: pd.Series) -> pd.DataFrame:
+    """
+    Value every holding against the latest prices in one vectorized pass.
+
+    Parameters:
+    - portfolio (dict): Session portfolio, {symbol: {'quantity': ..., 'avg_price': ...}}.
+    - last_prices (pd.Series): Latest price per symbol. Holdings without a price are left out.
+
+    Returns:
+    - DataFrame with one row per priced holding and the columns in VALUATION_COLUMNS.
+    """
+    symbols, quantities, avg_prices = positions_from_holdings(portfolio)
+    prices = last_prices.reindex(symbols).to_numpy(dtype=float) if len(symbols) else np.array([])
+
+    priced = ~np.isnan(prices)
+    symbols, quantities, avg_prices, prices = symbols[priced], quantities[priced], avg_prices[priced], prices[priced]
+
+    invested = quantities * avg_prices
+    current_value = quantities * prices
+    pnl = current_value - invested
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pnl_pct = np.where(invested > 0, pnl / invested * 100, 0.0)
+        total_value = current_value.sum()
+        weight_pct = current_value / total_value * 100 if total_value > 0 else np.zeros_like(current_value)
+
+    return pd.DataFrame({
+        'Stock': pd.Series(symbols, dtype=str).str.replace('.NS', '', regex=False),
+        'Quantity': quantities,
+        'Avg Price': avg_prices,
+        'Current Price': prices,
+        'Invested': invested,
+        'Current Value': current_value,
+        'P&L': pnl,
+        'P&L %': pnl_pct,
+        'Weight %': weight_pct,
+        'Symbol': symbols,
+    }, columns=VALUATION_COLUMNS)
+
+
+def summarize_portfolio(valuation: pd.DataFrame) -> dict:
+    """Aggregate totals plus best / worst performer from a `value_portfolio` frame."""
+    total_invested = float(valuation['Invested'].sum())
+    total_current_value = float(valuation['Current Value'].sum())
+    total_pnl = total_current_value - total_invested
+
+    pnl_pct = valuation['P&L %'].to_numpy()
+    return {
+        'total_invested': total_invested,
+        'total_current_value': total_current_value,
+        'total_pnl': total_pnl,
+        'total_pnl_pct': (total_pnl / total_invested) * 100 if total_invested > 0 else 0,
+        'best_performer': valuation.iloc[int(np.argmax(pnl_pct))],
+        'worst_performer': valuation.iloc[int(np.argmin(pnl_pct))],
+    }
+
+
+def portfolio_nav(history: pd.DataFrame, portfolio: dict) -> pd.Series:
+    """
+    Portfolio value over time from already-fetched price histories.
+
+    Every holding's close series is aligned on a common index (forward-filling gaps such as
+    differing trading halts) and the whole matrix is multiplied with the quantity vector once.
+
+    Parameters:
+    - history (pd.DataFrame): Either a batched OHLCV frame with (symbol, field) columns or a
+      close frame with one column per symbol.
+    - portfolio (dict): Session portfolio, {symbol: {'quantity': ..., 'avg_price': ...}}.
+
+    Returns:
+    - Series of portfolio value per bar. Holdings without any history are left out.
+    """
+    if history.empty or not portfolio:
+        return pd.Series(dtype=float)
+
+    closes = history.xs('Close', axis=1, level=1) if isinstance(history.columns, pd.MultiIndex) else history
+    symbols, quantities, _ = positions_from_holdings(portfolio)
+
+    closes = closes.reindex(columns=symbols)
+    has_history = closes.notna().any().to_numpy()
+    closes = closes.loc[:, has_history].ffill().dropna()
+    if closes.empty:
+        return pd.Series(dtype=float)
+
+    return pd.Series(closes.to_numpy() @ quantities[has_history], index=closes.index, name='NAV')
+
+
+def nav_change(nav: pd.Series):
+    """
+    Change between the last two points of a NAV series.
+
+    Returns:
+    - Tuple of (absolute change, percent change); zeros if there are fewer than two points.
+    """
+    if len(nav) < 2 or nav.iloc[-2] == 0:
+        return 0.0, 0.0
+    change = float(nav.iloc[-1] - nav.iloc[-2])
+    return change, change / float(nav.iloc[-2]) * 100
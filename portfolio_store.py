@@ -0,0 +1,306 @@
+# portfolio_store.py
+import os
+import threading
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from sqlalchemy import (Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table,
+                        UniqueConstraint, create_engine, delete, event, insert, select)
+
+DEFAULT_DB_PATH = os.path.join("data", "stockzy.db")
+DEFAULT_USER = "default"
+# Tradebooks print exchange-local times without an offset
+BROKER_TIMEZONE = "Asia/Kolkata"
+
+metadata = MetaData()
+
+users = Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False, unique=True),
+    Column("created_at", DateTime, nullable=False),
+)
+
+watchlist = Table(
+    "watchlist", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("symbol", String, nullable=False),
+    Column("added_at", DateTime, nullable=False),
+    UniqueConstraint("user_id", "symbol"),
+)
+
+# The trade ledger: holdings are never stored, they are aggregated from the trades
+trades = Table(
+    "trades", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("symbol", String, nullable=False),
+    Column("side", String(4), nullable=False),  # 'BUY' or 'SELL'
+    Column("quantity", Float, nullable=False),
+    Column("price", Float, nullable=False),
+    Column("traded_at", DateTime, nullable=False),  # Naive UTC, like every timestamp in the store
+    Column("broker_trade_id", String),  # Trade id or row key of imported trades, so re-importing adds nothing
+    Column("source", String, nullable=False),
+    # Covers the per-user holdings scan, in (symbol, trade time) order, without touching the table
+    Index("ix_trades_user_symbol_time", "user_id", "symbol", "traded_at", "side", "quantity", "price"),
+    Index("ux_trades_user_broker_trade", "user_id", "broker_trade_id", unique=True),
+)
+
+# Normalized CSV header -> ledger column, for the tradebook / contract-note exports of common brokers
+COLUMN_ALIASES = {
+    'symbol': 'symbol', 'scrip': 'symbol', 'scrip_code': 'symbol', 'tradingsymbol': 'symbol',
+    'stock': 'symbol', 'security': 'symbol',
+    'trade_type': 'side', 'buy/sell': 'side', 'buy_sell': 'side', 'side': 'side', 'transaction_type': 'side',
+    'type': 'side', 'action': 'side',
+    'quantity': 'quantity', 'qty': 'quantity', 'trade_quantity': 'quantity', 'traded_qty': 'quantity',
+    'price': 'price', 'rate': 'price', 'trade_price': 'price', 'traded_price': 'price', 'avg_price': 'price',
+    'trade_date': 'traded_at', 'date': 'traded_at', 'order_execution_time': 'traded_at',
+    'trade_time': 'traded_at', 'execution_time': 'traded_at',
+    'trade_id': 'broker_trade_id', 'trade_no': 'broker_trade_id', 'trade_number': 'broker_trade_id',
+    'segment': 'segment',
+}
+REQUIRED_COLUMNS = ['symbol', 'side', 'quantity', 'price', 'traded_at']
+SIDE_ALIASES = {'BUY': 'BUY', 'B': 'BUY', 'BOUGHT': 'BUY', 'SELL': 'SELL', 'S': 'SELL', 'SOLD': 'SELL'}
+EQUITY_SEGMENTS = {'EQ', 'EQUITY', 'CASH', 'NSE_EQ', 'BSE_EQ'}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _to_utc_naive(times: pd.Series) -> pd.Series:
+    """Naive UTC times; times without an offset are taken to be BROKER_TIMEZONE wall-clock times."""
+    if times.dt.tz is None:
+        times = times.dt.tz_localize(BROKER_TIMEZONE, ambiguous='NaT', nonexistent='NaT')
+    return times.dt.tz_convert('UTC').dt.tz_localize(None)
+
+
+def _to_nse_symbol(symbols: pd.Series) -> pd.Series:
+    """'tcs', 'TCS-EQ', 'TCS.NS' -> 'TCS.NS', the form used by the app's portfolio and watchlist."""
+    symbols = symbols.astype(str).str.strip().str.upper()
+    symbols = symbols.str.replace(r'(-EQ|\.NS)$', '', regex=True)
+    return symbols + '.NS'
+
+
+def _row_keys(ledger: pd.DataFrame) -> pd.Series:
+    """
+    'row:<hash>' of each trade's symbol, side, quantity, price and time plus its occurrence among
+    identical trades, standing in for the broker's trade id: re-exporting the same trades (in any
+    row order) gives the same keys, while two identical fills in one file still get distinct ones.
+    """
+    fields = ['symbol', 'side', 'quantity', 'price', 'traded_at']
+    keyed = ledger[fields].assign(occurrence=ledger.groupby(fields, sort=False).cumcount())
+    hashes = pd.util.hash_pandas_object(keyed, index=False).to_numpy()
+    return pd.Series([f"row:{value:016x}" for value in hashes], index=ledger.index, dtype=object)
+
+
+def parse_tradebook(source) -> tuple:
+    """
+    Read a broker tradebook / contract-note CSV into ledger rows in one vectorized pass.
+
+    Headers are matched case-insensitively through COLUMN_ALIASES. Non-equity segments (F&O,
+    currency, ...) and rows with an unknown side, a non-positive quantity or price, or an
+    unparseable date are dropped. Trade times are converted to naive UTC (times without an offset
+    are Indian wall-clock times), the same basis as manually added trades. Rows without a trade id get a key built from the trade itself
+    (see `_row_keys`), so re-importing any file adds nothing.
+
+    Parameters:
+    - source: Path or file-like object of the CSV.
+
+    Returns:
+    - (ledger, skipped): DataFrame with symbol, side, quantity, price, traded_at and broker_trade_id,
+      and the number of rows dropped.
+    """
+    raw = pd.read_csv(source, dtype=str, skipinitialspace=True)
+    normalized = raw.columns.str.strip().str.lower().str.replace(r'[\s\-\.]+', '_', regex=True)
+    mapped = normalized.map(lambda column: COLUMN_ALIASES.get(column))
+    # First matching column wins when a file has two candidates (e.g. 'trade_date' and 'order_execution_time')
+    keep = ~pd.Series(mapped).duplicated().to_numpy() & pd.notna(mapped)
+    df = raw.loc[:, keep]
+    df.columns = mapped[keep]
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"tradebook is missing columns: {', '.join(missing)}")
+
+    valid = np.ones(len(df), dtype=bool)
+    if 'segment' in df.columns:
+        valid &= df['segment'].fillna('EQ').str.strip().str.upper().isin(EQUITY_SEGMENTS).to_numpy()
+
+    side = df['side'].str.strip().str.upper().map(SIDE_ALIASES)
+    quantity = pd.to_numeric(df['quantity'].str.replace(',', ''), errors='coerce').abs()
+    price = pd.to_numeric(df['price'].str.replace(',', ''), errors='coerce')
+    traded_at = pd.to_datetime(df['traded_at'], errors='coerce', dayfirst=True, format='mixed')
+    valid &= (side.notna() & (quantity > 0) & (price > 0) & traded_at.notna()).to_numpy()
+
+    broker_trade_id = (df['broker_trade_id'].str.strip() if 'broker_trade_id' in df.columns
+                       else pd.Series(None, index=df.index, dtype=object))
+    ledger = pd.DataFrame({
+        'symbol': _to_nse_symbol(df['symbol']),
+        'side': side,
+        'quantity': quantity,
+        'price': price,
+        'traded_at': _to_utc_naive(traded_at),
+        'broker_trade_id': broker_trade_id.where(broker_trade_id.notna() & (broker_trade_id != ''), None),
+    })[valid].reset_index(drop=True)
+
+    no_id = ledger['broker_trade_id'].isna()
+    if no_id.any():
+        ledger.loc[no_id, 'broker_trade_id'] = _row_keys(ledger[no_id])
+    return ledger, int((~valid).sum())
+
+
+class PortfolioStore:
+    """
+    Durable users, watchlists and trade ledger in a single SQLite file (WAL mode, so Streamlit
+    sessions can read while another one writes).
+
+    A user's portfolio is rebuilt from the ledger by `load_portfolio`, one ordered query served
+    from the (user_id, symbol, traded_at, ...) covering index.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.engine = create_engine(f"sqlite:///{path}")
+        event.listen(self.engine, "connect", self._configure_connection)
+        metadata.create_all(self.engine)
+
+    @staticmethod
+    def _configure_connection(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+    def ensure_user(self, name: str = DEFAULT_USER) -> int:
+        """Id of the named user, created on first use."""
+        with self.engine.begin() as conn:
+            user_id = conn.execute(select(users.c.id).where(users.c.name == name)).scalar()
+            if user_id is None:
+                conn.execute(insert(users).prefix_with("OR IGNORE").values(name=name, created_at=_utcnow()))
+                user_id = conn.execute(select(users.c.id).where(users.c.name == name)).scalar_one()
+        return user_id
+
+    # ---- Watchlist ----
+
+    def load_watchlist(self, user_id: int) -> list:
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(watchlist.c.symbol).where(watchlist.c.user_id == user_id)
+                                .order_by(watchlist.c.added_at, watchlist.c.id))
+            return [symbol for (symbol,) in rows]
+
+    def add_to_watchlist(self, user_id: int, symbol: str):
+        with self.engine.begin() as conn:
+            conn.execute(insert(watchlist).prefix_with("OR IGNORE")
+                         .values(user_id=user_id, symbol=symbol, added_at=_utcnow()))
+
+    def remove_from_watchlist(self, user_id: int, symbol: str):
+        with self.engine.begin() as conn:
+            conn.execute(delete(watchlist).where(watchlist.c.user_id == user_id, watchlist.c.symbol == symbol))
+
+    # ---- Trades and holdings ----
+
+    def add_trade(self, user_id: int, symbol: str, side: str, quantity: float, price: float,
+                  traded_at: datetime = None, source: str = "manual"):
+        """Record one trade; `traded_at` is naive UTC and defaults to now."""
+        with self.engine.begin() as conn:
+            conn.execute(insert(trades).values(
+                user_id=user_id, symbol=symbol, side=side, quantity=quantity, price=price,
+                traded_at=traded_at or _utcnow(), source=source,
+            ))
+
+    def delete_holding(self, user_id: int, symbol: str):
+        """Remove every trade of `symbol` from the user's ledger."""
+        with self.engine.begin() as conn:
+            conn.execute(delete(trades).where(trades.c.user_id == user_id, trades.c.symbol == symbol))
+
+    def load_positions(self, user_id: int) -> dict:
+        """
+        Net position of every symbol in the user's ledger, replayed in trade order in one query.
+
+        The average price is the moving average cost of the open position: buys that add to it
+        move the average, sells leave it unchanged, and it starts over once the position is
+        closed (or turns short), so shares that were already sold never count towards it.
+
+        Returns:
+        - {symbol: {'quantity', 'avg_price'}}, including closed (0) and net short (< 0) symbols,
+          which have an avg_price of 0.
+        """
+        query = (select(trades.c.symbol, trades.c.side, trades.c.quantity, trades.c.price)
+                 .where(trades.c.user_id == user_id)
+                 .order_by(trades.c.symbol, trades.c.traded_at, trades.c.id))
+
+        positions = {}
+        with self.engine.connect() as conn:
+            for symbol, side, quantity, price in conn.execute(query):
+                position = positions.setdefault(symbol, {'quantity': 0.0, 'avg_price': 0.0})
+                held = position['quantity']
+                if side == 'BUY':
+                    if held > 0:
+                        position['avg_price'] = (held * position['avg_price'] + quantity * price) / (held + quantity)
+                    else:
+                        # Covering a short first; whatever is left over is a new position bought at `price`
+                        position['avg_price'] = price if held + quantity > 0 else 0.0
+                    position['quantity'] = held + quantity
+                else:
+                    position['quantity'] = held - quantity
+                    if position['quantity'] <= 0:
+                        position['avg_price'] = 0.0
+        return positions
+
+    def load_portfolio(self, user_id: int) -> dict:
+        """
+        Current holdings: the `load_positions` symbols with a positive net quantity.
+
+        Returns:
+        - {symbol: {'quantity', 'avg_price'}}
+        """
+        return {symbol: position for symbol, position in self.load_positions(user_id).items()
+                if position['quantity'] > 0}
+
+    def import_tradebook(self, user_id: int, source, source_name: str = "tradebook") -> dict:
+        """
+        Bulk-load a broker tradebook CSV into the user's ledger.
+
+        Rows are parsed in one vectorized pass (`parse_tradebook`) and inserted with a single
+        executemany inside one transaction. Trades whose broker trade id (or, for files without
+        one, row key) is already in the ledger are ignored, so importing the same file twice is
+        harmless.
+
+        Returns:
+        - {'rows': rows read, 'imported': trades added, 'duplicates': already in the ledger,
+           'skipped': rows that were not valid equity trades,
+           'net_short': symbols in the file whose ledger now sells more than it buys, e.g. because
+           the file starts after their original buy; they are left out of the portfolio}
+        """
+        ledger, skipped = parse_tradebook(source)
+        ledger['user_id'] = user_id
+        ledger['source'] = source_name
+        records = ledger.astype(object).where(ledger.notna(), None).to_dict('records')
+
+        imported = 0
+        if records:
+            with self.engine.begin() as conn:
+                imported = conn.execute(insert(trades).prefix_with("OR IGNORE"), records).rowcount
+
+        positions = self.load_positions(user_id)
+        net_short = sum(positions[symbol]['quantity'] < 0 for symbol in ledger['symbol'].unique())
+
+        return {'rows': len(ledger) + skipped, 'imported': imported,
+                'duplicates': len(ledger) - imported, 'skipped': skipped, 'net_short': int(net_short)}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_portfolio_store() -> PortfolioStore:
+    """Process-wide store; SQLAlchemy's pool hands each session thread its own connection."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PortfolioStore()
+        return _store
@@ -0,0 +1,143 @@
+# quote_cache.py
+import threading
+import time
+
+
+class _Entry:
+    """One cached value plus the bookkeeping needed for refreshes."""
+
+    def __init__(self):
+        self.value = None
+        self.has_value = False
+        self.fetched_at = 0.0
+        self.last_error = None
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+
+class QuoteCache:
+    """
+    Process-wide cache for market quotes shared by every Streamlit session.
+
+    - Fresh values (younger than the TTL) are served straight from memory.
+    - Stale values are served immediately while a single background thread refreshes them
+      (stale-while-revalidate with single-flight: concurrent callers never trigger duplicate fetches).
+    - If a refresh fails, the last good value keeps being served.
+    - Only the very first load of a key blocks, and concurrent first loads share one fetch.
+
+    Cached objects are shared between sessions, so callers must treat them as read-only.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._entries_lock = threading.Lock()
+        self._metrics = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'errors': 0}
+        self._metrics_lock = threading.Lock()
+
+    def _entry(self, key) -> _Entry:
+        with self._entries_lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            return entry
+
+    def _count(self, metric: str):
+        with self._metrics_lock:
+            self._metrics[metric] += 1
+
+    def _load(self, key, entry: _Entry, loader) -> bool:
+        """Run the loader and store its result; keeps the last good value on failure."""
+        try:
+            value = loader()
+        except Exception as e:
+            self._count('errors')
+            entry.last_error = str(e)
+            print(f"[ERROR] Quote refresh failed for {key}: {e}")
+            return False
+        finally:
+            entry.refreshing = False
+
+        entry.value = value
+        entry.has_value = True
+        entry.fetched_at = time.time()
+        entry.last_error = None
+        return True
+
+    def get(self, key, loader, ttl: float):
+        """
+        Return the cached value for `key`, loading it with `loader()` when needed.
+
+        Raises:
+        - Whatever `loader` raises, but only if no value has ever been loaded for `key`.
+        """
+        entry = self._entry(key)
+
+        if entry.has_value:
+            if time.time() - entry.fetched_at < ttl:
+                self._count('hits')
+                return entry.value
+
+            self._count('stale_hits')
+            with entry.lock:
+                start_refresh = not entry.refreshing
+                entry.refreshing = True
+            if start_refresh:
+                self._count('refreshes')
+                threading.Thread(target=self._load, args=(key, entry, loader), daemon=True).start()
+            return entry.value
+
+        # Cold key: one caller loads, the others wait on the same lock and reuse its result
+        with entry.lock:
+            if not entry.has_value:
+                self._count('misses')
+                entry.refreshing = True
+                self._load(key, entry, loader)
+                if not entry.has_value:
+                    raise RuntimeError(entry.last_error or f"Failed to load {key}")
+            else:
+                self._count('hits')
+            return entry.value
+
+    def refresh(self, key, loader) -> bool:
+        """
+        Synchronously reload `key` (used by background pollers); keeps the last good value on failure.
+
+        Returns:
+        - True if a new value was stored.
+        """
+        entry = self._entry(key)
+        with entry.lock:
+            entry.refreshing = True
+        self._count('refreshes')
+        return self._load(key, entry, loader)
+
+    def peek(self, key, default=None):
+        """Return whatever is cached for `key` without ever loading it."""
+        entry = self._entry(key)
+        if entry.has_value:
+            self._count('hits')
+            return entry.value
+        self._count('misses')
+        return default
+
+    def stats(self) -> dict:
+        """Hit / miss / refresh / error counters plus per-key age and last error."""
+        now = time.time()
+        with self._metrics_lock:
+            stats = dict(self._metrics)
+        with self._entries_lock:
+            entries = list(self._entries.items())
+
+        stats['keys'] = {
+            key: {
+                'age_seconds': round(now - entry.fetched_at, 1) if entry.has_value else None,
+                'refreshing': entry.refreshing,
+                'last_error': entry.last_error,
+            }
+            for key, entry in entries
+        }
+        return stats
+
+
+# Single instance shared by every session in this Streamlit process
+quote_cache = QuoteCache()
@@ -0,0 +1,272 @@
+# quote_hub.py
+import asyncio
+import json
+import os
+import random
+import threading
+import numpy as np
+import pandas as pd
+from nse_handler import SNAPSHOT_INDICES, indices_summary
+
+# Loopback only by default; set STOCKZY_LIVE_FEED_HOST=0.0.0.0 to serve quotes to other machines
+LIVE_FEED_HOST = os.getenv('STOCKZY_LIVE_FEED_HOST', '127.0.0.1')
+LIVE_FEED_PORT = int(os.getenv('STOCKZY_LIVE_FEED_PORT', 8765))
+# Websocket URL browsers connect to when the feed is published elsewhere, e.g. wss://host/live or
+# just /live behind a reverse proxy; empty means the page's host on LIVE_FEED_PORT
+LIVE_FEED_URL = os.getenv('STOCKZY_LIVE_FEED_URL', '')
+SUBSCRIBER_QUEUE_SIZE = 64   # Pending diffs per browser before it is resynced with a snapshot
+
+# Poller job -> hub topics it feeds
+TOPICS_FOR_JOB = {
+    'fno_positions': ['ticker'],
+    'all_indices': ['indices', 'market_indices'],
+}
+
+
+def _numeric(values) -> np.ndarray:
+    return pd.to_numeric(pd.Series(values).astype(str).str.replace(',', ''), errors='coerce').to_numpy(dtype=float)
+
+
+def quote_rows(keys, prices, changes) -> dict:
+    """{key: {'price', 'change'}} rounded to 2 decimals, skipping non-numeric rows."""
+    prices, changes = _numeric(prices).round(2), _numeric(changes).round(2)
+    valid = ~(np.isnan(prices) | np.isnan(changes))
+    return {
+        str(key): {'price': float(price), 'change': float(change)}
+        for key, price, change in zip(np.asarray(keys)[valid], prices[valid], changes[valid])
+    }
+
+
+def rows_for_topic(topic: str, value) -> dict:
+    """Convert a poller snapshot into hub rows for one of its topics."""
+    if topic == 'ticker':
+        return quote_rows(value['symbol'], value['lastPrice'], value['pChange'])
+    if topic == 'indices':
+        summary = indices_summary(value, SNAPSHOT_INDICES)
+        return quote_rows(summary['Index'], summary['Value'], summary['% Change'])
+    if topic == 'market_indices':
+        return quote_rows(value['indexName'], value['last'], value['percChange'])
+    raise KeyError(topic)
+
+
+class _Subscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop, topics: set):
+        self.loop = loop
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.resync = False
+
+    def offer(self, message: dict):
+        """Runs on the subscriber's loop; a client too slow to keep up gets a fresh snapshot instead."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.resync = True
+
+
+class QuoteHub:
+    """
+    In-process publish/subscribe hub for live quotes.
+
+    Publishers replace a topic's rows ({key: {'price', 'change'}}); the hub works out what changed
+    and pushes only that diff to subscribers. New subscribers start from a full snapshot, and
+    every message carries the topic's version so clients can tell if they missed one.
+    """
+
+    def __init__(self):
+        self._topics = {}
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, topic: str, rows: dict):
+        """Replace the rows of `topic` and push the diff to subscribers. Returns the diff, or None."""
+        with self._lock:
+            state = self._topics.setdefault(topic, {'version': 0, 'rows': {}})
+            old_rows = state['rows']
+            changed = {key: row for key, row in rows.items() if old_rows.get(key) != row}
+            removed = [key for key in old_rows if key not in rows]
+            if not changed and not removed:
+                return None
+
+            state['rows'] = rows
+            state['version'] += 1
+            diff = {'type': 'diff', 'topic': topic, 'version': state['version'],
+                    'changed': changed, 'removed': removed}
+            subscribers = [sub for sub in self._subscribers if topic in sub.topics]
+
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, diff)
+            except RuntimeError:
+                pass  # Subscriber's loop is closed; it unsubscribes on its way out
+        return diff
+
+    def snapshot(self, topic: str) -> dict:
+        """Full state of a topic as a 'snapshot' message."""
+        with self._lock:
+            state = self._topics.get(topic, {'version': 0, 'rows': {}})
+            return {'type': 'snapshot', 'topic': topic, 'version': state['version'], 'rows': dict(state['rows'])}
+
+    def subscribe(self, topics, loop: asyncio.AbstractEventLoop) -> _Subscription:
+        sub = _Subscription(loop, set(topics))
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: _Subscription):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+class LiveFeedServer:
+    """
+    Websocket server streaming hub messages to browsers, on its own event loop thread.
+
+    Protocol: the client sends {"subscribe": [topics]}, then receives a 'snapshot' message per
+    topic followed by 'diff' messages as quotes change.
+    """
+
+    def __init__(self, hub: QuoteHub, host: str = LIVE_FEED_HOST, port: int = LIVE_FEED_PORT,
+                 url: str = LIVE_FEED_URL):
+        self.hub = hub
+        self.host = host
+        self.port = port
+        self.url = url  # What browsers connect to, if not the page's host on `port`
+        self._ready = threading.Event()
+        self._error = None
+
+    def start(self, timeout: float = 5) -> bool:
+        """Start serving in a daemon thread. Returns False if the server could not be started."""
+        threading.Thread(target=self._run, name="live-feed", daemon=True).start()
+        self._ready.wait(timeout)
+        if self._error is not None:
+            print(f"[ERROR] Live feed server failed to start on port {self.port}: {self._error}")
+        return self._ready.is_set() and self._error is None
+
+    def _run(self):
+        try:
+            asyncio.run(self._serve())
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+
+    async def _serve(self):
+        from websockets.asyncio.server import serve
+
+        async with serve(self._handle, self.host, self.port):
+            self._ready.set()
+            await asyncio.Future()  # Serve forever
+
+    async def _handle(self, websocket):
+        from websockets.exceptions import ConnectionClosed
+
+        try:
+            request = json.loads(await websocket.recv())
+            topics = [topic for topic in request.get('subscribe', []) if isinstance(topic, str)]
+        except (ValueError, AttributeError, ConnectionClosed):
+            return
+
+        sub = self.hub.subscribe(topics, asyncio.get_running_loop())
+        try:
+            for topic in topics:
+                await websocket.send(json.dumps(self.hub.snapshot(topic)))
+            while True:
+                message = await sub.queue.get()
+                if sub.resync:
+                    sub.resync = False
+                    while not sub.queue.empty():
+                        sub.queue.get_nowait()
+                    for topic in topics:
+                        await websocket.send(json.dumps(self.hub.snapshot(topic)))
+                    continue
+                await websocket.send(json.dumps(message))
+        except ConnectionClosed:
+            pass
+        finally:
+            self.hub.unsubscribe(sub)
+
+
+class FakeFeed:
+    """
+    Random-walk quotes published into a hub, standing in for NSE in tests and offline development.
+
+    Call `tick()` for one deterministic step, or `start()` to publish every `interval` seconds.
+    """
+
+    def __init__(self, hub: QuoteHub, symbols=None, indices=None, interval: float = 0.5, seed: int = None):
+        self.hub = hub
+        self.interval = interval
+        self._rng = random.Random(seed)
+        self._stop = threading.Event()
+        symbols = symbols or ['RELIANCE', 'TCS', 'INFY', 'HDFCBANK', 'ICICIBANK', 'SBIN', 'ITC', 'LT']
+        indices = indices or SNAPSHOT_INDICES
+        self._quotes = {
+            'ticker': {symbol: [self._rng.uniform(100, 4000), 0.0] for symbol in symbols},
+            'indices': {name: [self._rng.uniform(10, 25000), 0.0] for name in indices},
+        }
+        self._opens = {topic: {key: quote[0] for key, quote in quotes.items()} for topic, quotes in self._quotes.items()}
+
+    def tick(self):
+        """Move a few quotes by a small random step and publish every topic."""
+        for topic, quotes in self._quotes.items():
+            for key in self._rng.sample(sorted(quotes), k=max(1, len(quotes) // 3)):
+                price = quotes[key][0] * (1 + self._rng.gauss(0, 0.002))
+                quotes[key] = [price, (price / self._opens[topic][key] - 1) * 100]
+            keys = list(quotes)
+            self.hub.publish(topic, quote_rows(keys, [quotes[k][0] for k in keys], [quotes[k][1] for k in keys]))
+
+    def start(self):
+        threading.Thread(target=self._run, name="fake-feed", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.tick()
+
+
+def publish_poller_update(hub: QuoteHub, name: str, value):
+    """MarketPoller listener: forward snapshots of the jobs that feed live topics."""
+    for topic in TOPICS_FOR_JOB.get(name, []):
+        hub.publish(topic, rows_for_topic(topic, value))
+
+
+_live_feed = None
+_live_feed_lock = threading.Lock()
+
+
+def get_live_feed():
+    """
+    Process-wide hub and websocket server, fed by the market poller, or by a FakeFeed when
+    STOCKZY_FAKE_FEED=1. Returns None if the server could not be started (the app then falls back
+    to rendering quotes on reruns).
+    """
+    global _live_feed
+    with _live_feed_lock:
+        if _live_feed is None:
+            hub = QuoteHub()
+            server = LiveFeedServer(hub)
+            if not server.start():
+                _live_feed = False
+                return None
+
+            if os.getenv('STOCKZY_FAKE_FEED') == '1':
+                FakeFeed(hub).start()
+            else:
+                from market_poller import get_market_poller
+
+                poller = get_market_poller()
+                # Seed the hub with whatever the poller already has, then follow its refreshes
+                for name in TOPICS_FOR_JOB:
+                    value = poller.snapshot(name)
+                    if value is not None:
+                        publish_poller_update(hub, name, value)
+                poller.add_listener(lambda name, value: publish_poller_update(hub, name, value))
+            _live_feed = server
+        return _live_feed or None
@@ -1,83 +1,181 @@
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from content_cache import ContentCache, article_cache
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+REQUEST_TIMEOUT = 10  # seconds, per URL
+SCRAPE_DEADLINE = 15  # seconds, for a whole scrape_multiple_articles call
+MAX_SCRAPE_WORKERS = 8
+PER_HOST_CONCURRENCY = 2
+
+HTML_PARSER = 'lxml'
+CONTAINER_TAGS = {'article', 'main', 'div'}
+RICH_CONTENT_LENGTH = 10000
+
+# Cached article text is served without revalidation for this long, then re-checked with ETag/Last-Modified
+ARTICLE_FRESH_FOR = 60 * 60  # seconds
+
+# One pooled keep-alive session shared by every scrape
+_session = requests.Session()
+_session.headers.update(HEADERS)
+_session.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=MAX_SCRAPE_WORKERS))
+_session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=MAX_SCRAPE_WORKERS))
+
+_host_slots = defaultdict(lambda: threading.BoundedSemaphore(PER_HOST_CONCURRENCY))
+_host_slots_lock = threading.Lock()
+
+
+def _fetch(url: str, headers: dict = None) -> requests.Response:
+    """GET a URL over the shared session, respecting the per-host concurrency limit."""
+    with _host_slots_lock:
+        slot = _host_slots[urlparse(url).netloc]
+    with slot:
+        return _session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+
+
+def extract_main_text(soup: BeautifulSoup, min_length: int = 1000) -> str:
+    """
+    Extract the main article text from a parsed page.
+
+    Every <article>/<main>/<div> is scored by the paragraph text it contains, computed in a single
+    bottom-up pass: nodes are visited in reverse document order (children before parents) and each
+    one adds its paragraph length and count to its parent, so no paragraph is re-walked per ancestor.
+    The richest container wins, stopping early at the first one with more than
+    RICH_CONTENT_LENGTH characters; if the winner has fewer than `min_length` characters,
+    all <p> text on the page is used instead.
+    """
+    paragraph_text = {}
+    text_len = defaultdict(int)
+    para_count = defaultdict(int)
+
+    nodes = soup.find_all(True)
+    for node in reversed(nodes):
+        key = id(node)
+        if node.name == 'p':
+            text = node.get_text(strip=True)
+            paragraph_text[key] = text
+            text_len[key] += len(text)
+            para_count[key] += 1
+
+        parent = node.parent
+        if parent is not None and para_count[key]:
+            text_len[id(parent)] += text_len[key]
+            para_count[id(parent)] += para_count[key]
+
+    best_node = None
+    max_len = 0
+    for node in nodes:
+        if node.name not in CONTAINER_TAGS:
+            continue
+        key = id(node)
+        # Length of ' '.join(paragraph texts) without building the string
+        content_len = text_len[key] + para_count[key] - 1 if para_count[key] else 0
+        if content_len > max_len:
+            best_node = node
+            max_len = content_len
+
+        if max_len > RICH_CONTENT_LENGTH:  # Early exit if we already have rich content
+            break
+
+    best_text = ' '.join(paragraph_text[id(p)] for p in best_node.find_all('p')) if best_node else ''
+
+    # Fallback: if no good candidate found, get all <p> tags from entire page
+    if len(best_text.strip()) < min_length:
+        best_text = ' '.join(paragraph_text[id(p)] for p in nodes if p.name == 'p')
+
+    return best_text.strip()
 
 
 def scrape_article(url: str) -> str:
     """Recursively extract the main text content from a news article URL."""
-    headers = {"User-Agent": "Mozilla/5.0"}
-    response = requests.get(url, headers=headers, timeout=10)
+    response = _fetch(url)
 
     if response.status_code != 200:
         raise Exception(f"Failed to fetch article. Status code: {response.status_code}")
 
-    soup = BeautifulSoup(response.text, 'html.parser')
+    soup = BeautifulSoup(response.text, HTML_PARSER)
 
-    # Try heuristically likely content containers
-    candidates = soup.find_all(['article', 'main', 'div'], recursive=True)
-
-    best_text = ''
-    max_len = 0
+    return extract_main_text(soup, min_length=10000)
 
-    for candidate in candidates:
-        paragraphs = candidate.find_all('p')
-        content = ' '.join(p.get_text(strip=True) for p in paragraphs)
-        if len(content) > max_len:
-            best_text = content
-            max_len = len(content)
 
-        if max_len > 10000:  # Early exit if we already have rich content
-            break
+def _scrape_one(url: str) -> str:
+    """
+    Fetch one article and return it as '<title> - <main text>'.
 
-    # Fallback: if no good candidate found, get all <p> tags from entire page
-    if len(best_text.strip()) < 10000:
-        paragraphs = soup.find_all('p')
-        best_text = ' '.join(p.get_text(strip=True) for p in paragraphs)
+    Extracted text is kept in the persistent article cache. Recent entries are returned without
+    any request; older ones are revalidated with a conditional GET and reused on 304 Not Modified.
+    """
+    cache_key = ContentCache.key(url)
+    cached = article_cache.get(cache_key)
+    if cached and time.time() - cached['fetched_at'] < ARTICLE_FRESH_FOR:
+        return cached['text']
 
-    return best_text.strip()
+    validators = {}
+    if cached and cached.get('etag'):
+        validators['If-None-Match'] = cached['etag']
+    if cached and cached.get('last_modified'):
+        validators['If-Modified-Since'] = cached['last_modified']
 
-def scrape_multiple_articles(urls: list[str]) -> str:
-    """Scrape and concatenate multiple news articles from a list of URLs."""
-    combined_result = []
+    response = _fetch(url, headers=validators)
 
-    for url in urls:
-        try:
-            headers = {"User-Agent": "Mozilla/5.0"}
-            response = requests.get(url, headers=headers, timeout=10)
+    if response.status_code == 304 and cached:
+        cached['fetched_at'] = time.time()
+        article_cache.put(cache_key, cached)
+        return cached['text']
 
-            if response.status_code != 200:
-                print(f"Skipping {url} - failed to fetch.")
-                continue
+    if response.status_code != 200:
+        raise Exception(f"Skipping {url} - failed to fetch.")
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+    soup = BeautifulSoup(response.text, HTML_PARSER)
 
-            # Extract title
-            title = soup.title.string.strip() if soup.title else "Untitled Article"
+    # Extract title
+    title = soup.title.string.strip() if soup.title and soup.title.string else "Untitled Article"
 
-            # Extract content using existing logic
-            candidates = soup.find_all(['article', 'main', 'div'], recursive=True)
+    best_text = extract_main_text(soup, min_length=1000)
+    text = f"{title} - {best_text}"
 
-            best_text = ''
-            max_len = 0
+    article_cache.put(cache_key, {
+        'url': url,
+        'text': text,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'fetched_at': time.time(),
+    })
+    return text
 
-            for candidate in candidates:
-                paragraphs = candidate.find_all('p')
-                content = ' '.join(p.get_text(strip=True) for p in paragraphs)
-                if len(content) > max_len:
-                    best_text = content
-                    max_len = len(content)
 
-                if max_len > 10000:
-                    break
+def scrape_multiple_articles(urls: list[str], deadline: float = SCRAPE_DEADLINE) -> str:
+    """
+    Scrape and concatenate multiple news articles from a list of URLs.
 
-            if len(best_text.strip()) < 1000:
-                paragraphs = soup.find_all('p')
-                best_text = ' '.join(p.get_text(strip=True) for p in paragraphs)
+    Articles are fetched concurrently over a shared keep-alive session, at most
+    PER_HOST_CONCURRENCY at a time per publisher. Whatever has finished when `deadline`
+    seconds have passed is returned; slower URLs are dropped.
+    """
+    if not urls:
+        return ""
 
-            combined_result.append(f"{title} - {best_text.strip()}")
+    executor = ThreadPoolExecutor(max_workers=min(MAX_SCRAPE_WORKERS, len(urls)), thread_name_prefix="scraper")
+    futures = [executor.submit(_scrape_one, url) for url in urls]
+    done, not_done = wait(futures, timeout=deadline)
+    # Don't block on stragglers; their sockets time out on their own
+    executor.shutdown(wait=False, cancel_futures=True)
 
+    combined_result = []
+    for url, future in zip(urls, futures):
+        if future not in done:
+            print(f"Skipping {url} - deadline of {deadline}s exceeded.")
+            continue
+        try:
+            combined_result.append(future.result())
         except Exception as e:
             print(f"Error processing {url}: {e}")
-            continue
 
     return "\n\n".join(combined_result)
 
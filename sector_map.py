@@ -0,0 +1,118 @@
+# sector_map.py
+import json
+import os
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+from content_cache import DEFAULT_CACHE_DIR
+
+SECTOR_MAP_PATH = os.path.join(DEFAULT_CACHE_DIR, "fno_sectors.json")
+UNKNOWN_SECTOR = "Others"
+
+
+def industries_from_positions(positions: pd.DataFrame) -> dict:
+    """{symbol: industry} from the 'meta' dicts of an NSE positions frame, skipping rows without one."""
+    if positions.empty or 'meta' not in positions.columns:
+        return {}
+    industry = positions['meta'].map(lambda meta: meta.get('industry') if isinstance(meta, dict) else None)
+    known = industry.notna() & (industry != '')
+    return dict(zip(positions.loc[known, 'symbol'].astype(str), industry[known].astype(str)))
+
+
+class SectorMap:
+    """
+    Symbol -> sector map persisted as JSON, so sector grouping never needs a request of its own.
+
+    NSE includes each stock's industry in the F&O positions payload; `update_from_positions` merges
+    those into the map and rewrites the file only when something changed.
+    """
+
+    def __init__(self, path: str = SECTOR_MAP_PATH):
+        self.path = path
+        self._sectors = None  # Loaded from disk on first use
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if self._sectors is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._sectors = json.load(f)
+            except FileNotFoundError:
+                self._sectors = {}
+            except (OSError, ValueError) as e:
+                print(f"[ERROR] Unreadable sector map {self.path}: {e}")
+                self._sectors = {}
+        return self._sectors
+
+    def _save(self, sectors: dict):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(sectors, f, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[ERROR] Failed to write sector map {self.path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def update_from_positions(self, positions: pd.DataFrame) -> bool:
+        """Merge the industries found in a positions frame. Returns True if the map changed."""
+        found = industries_from_positions(positions)
+        with self._lock:
+            sectors = self._load()
+            changed = {symbol: sector for symbol, sector in found.items() if sectors.get(symbol) != sector}
+            if not changed:
+                return False
+            self._sectors = {**sectors, **changed}
+            self._save(self._sectors)
+        return True
+
+    def lookup(self, symbols) -> np.ndarray:
+        """Sector of every symbol at once; symbols not in the map get UNKNOWN_SECTOR."""
+        with self._lock:
+            sectors = self._load()
+        return pd.Series(symbols, dtype=object).map(sectors).fillna(UNKNOWN_SECTOR).to_numpy()
+
+
+# Shared by the poller (writer) and every session (readers)
+sector_map = SectorMap()
+
+
+def sector_rollup(positions: pd.DataFrame, size_by: str = 'totalTradedValue', sectors: SectorMap = sector_map):
+    """
+    Stocks of an F&O positions frame tagged with their sector, plus per-sector totals.
+
+    Parameters:
+    - positions (pd.DataFrame): The `fetch_nse_positions_data` frame.
+    - size_by (str): Column that sizes each stock, e.g. 'totalTradedValue' or 'ffmc' (free-float market cap).
+    - sectors (SectorMap): Where sectors are looked up.
+
+    Returns:
+    - (stocks, sector_totals):
+      stocks has symbol, sector, size, lastPrice and pChange, one row per stock with a positive size;
+      sector_totals is indexed by sector with size, pChange (size-weighted), stocks and advances.
+    """
+    columns = ['symbol', 'sector', 'size', 'lastPrice', 'pChange']
+    totals_columns = ['size', 'pChange', 'stocks', 'advances']
+    if positions.empty or size_by not in positions.columns:
+        return pd.DataFrame(columns=columns), pd.DataFrame(columns=totals_columns)
+
+    # The index summary row (priority 1) is not a stock
+    rows = positions[positions['priority'] == 0] if 'priority' in positions.columns else positions
+    stocks = pd.DataFrame({
+        'symbol': rows['symbol'].astype(str).to_numpy(),
+        'sector': sectors.lookup(rows['symbol'].astype(str)),
+        'size': pd.to_numeric(rows[size_by], errors='coerce').to_numpy(dtype=float),
+        'lastPrice': pd.to_numeric(rows['lastPrice'], errors='coerce').to_numpy(dtype=float),
+        'pChange': pd.to_numeric(rows['pChange'], errors='coerce').to_numpy(dtype=float),
+    })
+    stocks = stocks[(stocks['size'] > 0) & stocks['pChange'].notna()].reset_index(drop=True)
+
+    totals = (stocks.assign(weighted=stocks['size'] * stocks['pChange'], advancing=stocks['pChange'] > 0)
+              .groupby('sector', sort=False)
+              .agg(size=('size', 'sum'), weighted=('weighted', 'sum'),
+                   stocks=('symbol', 'size'), advances=('advancing', 'sum')))
+    totals['pChange'] = totals['weighted'] / totals['size']
+    return stocks, totals[totals_columns].sort_values('size', ascending=False)
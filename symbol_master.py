@@ -0,0 +1,247 @@
+# symbol_master.py
+"""
+Local NSE equity symbol master: instant symbol validation and type-ahead search without network calls.
+
+The master is NSE's EQUITY_L.csv. A copy under data/cache is refreshed in the background once a
+day; until the first download succeeds, the snapshot bundled under res/data is used. The bundled
+file is currently a seed list of the most traded stocks (see `SymbolMaster.is_complete`); run the
+command below with network access to replace it with the full list.
+
+Regenerate the bundled snapshot (from the repo root):
+    python symbol_master.py --refresh-bundled
+"""
+import argparse
+import difflib
+import io
+import os
+import re
+import threading
+import time
+import uuid
+import pandas as pd
+import requests
+from content_cache import DEFAULT_CACHE_DIR
+
+EQUITY_LIST_URL = 'https://nsearchives.nseindia.com/content/equities/EQUITY_L.csv'
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+REQUEST_TIMEOUT = 15  # seconds
+
+CACHED_MASTER_PATH = os.path.join(DEFAULT_CACHE_DIR, "EQUITY_L.csv")
+BUNDLED_MASTER_PATH = os.path.join("res", "data", "EQUITY_L.csv")
+REFRESH_AFTER = 24 * 60 * 60  # seconds
+RETRY_AFTER = 15 * 60         # seconds, after a failed refresh
+
+MAX_SUGGESTIONS = 8
+FUZZY_CUTOFF = 0.6
+# NSE lists well over 2000 equities; anything smaller is a seed list, not the full master
+COMPLETE_MIN_SYMBOLS = 1500
+
+_WORD = re.compile(r'[A-Z0-9&]+')
+# Company-name words too common to be worth indexing for prefix search
+_NAME_STOPWORDS = {'LIMITED', 'LTD', 'THE', 'OF', 'AND', '&'}
+
+
+class _TrieNode:
+    __slots__ = ('children', 'entries')
+
+    def __init__(self):
+        self.children = {}
+        self.entries = []  # Indexes of the symbols whose key ends at this node
+
+
+class SymbolMaster:
+    """
+    Immutable index over the NSE equity list.
+
+    - `is_valid` is a hash-set lookup.
+    - `search` walks a trie keyed by each symbol and each word of its company name, so "TATA" finds
+      TCS and TATAMOTORS alike; symbol matches rank ahead of company-name matches.
+    - `suggest` adds difflib fuzzy matches for typos ("RELAINCE" -> RELIANCE).
+    """
+
+    def __init__(self, symbols, names):
+        self.symbols = list(symbols)
+        self.names = dict(zip(self.symbols, names))
+        self._symbol_set = frozenset(self.symbols)
+        self._upper_names = {name.upper(): symbol for symbol, name in self.names.items()}
+        self._root = _TrieNode()
+        for index, (symbol, name) in enumerate(zip(self.symbols, names)):
+            self._insert(symbol, (0, index))
+            for word in set(_WORD.findall(name.upper())) - _NAME_STOPWORDS:
+                self._insert(word, (1, index))
+
+    def _insert(self, key: str, entry):
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+        node.entries.append(entry)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @property
+    def is_complete(self) -> bool:
+        """False for a seed list, where a symbol missing from the master may still be listed."""
+        return len(self.symbols) >= COMPLETE_MIN_SYMBOLS
+
+    def is_valid(self, symbol: str) -> bool:
+        """True if `symbol` (e.g. 'TCS', 'TCS.NS') is a listed NSE equity."""
+        return normalize_symbol(symbol) in self._symbol_set
+
+    def company_name(self, symbol: str) -> str:
+        return self.names.get(normalize_symbol(symbol), '')
+
+    def search(self, prefix: str, limit: int = MAX_SUGGESTIONS) -> list:
+        """Symbols whose symbol or a company-name word starts with `prefix`, best matches first."""
+        prefix = prefix.strip().upper()
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        # Every entry under the prefix node; rank by (symbol match first, shorter symbol, symbol)
+        entries, stack = [], [node]
+        while stack:
+            current = stack.pop()
+            entries.extend(current.entries)
+            stack.extend(current.children.values())
+
+        best = {}
+        for kind, index in entries:
+            best[index] = min(kind, best.get(index, kind))
+        ranked = sorted(best, key=lambda index: (best[index], len(self.symbols[index]), self.symbols[index]))
+        return [self.symbols[index] for index in ranked[:limit]]
+
+    def suggest(self, query: str, limit: int = MAX_SUGGESTIONS) -> list:
+        """`search` results, topped up with fuzzy matches on symbol and company name."""
+        query = normalize_symbol(query)
+        if not query:
+            return []
+        matches = self.search(query, limit)
+        if len(matches) < limit:
+            for symbol in difflib.get_close_matches(query, self.symbols, n=limit, cutoff=FUZZY_CUTOFF):
+                if symbol not in matches:
+                    matches.append(symbol)
+            for name in difflib.get_close_matches(query, self._upper_names, n=limit, cutoff=FUZZY_CUTOFF):
+                symbol = self._upper_names[name]
+                if symbol not in matches:
+                    matches.append(symbol)
+        return matches[:limit]
+
+
+def normalize_symbol(symbol: str) -> str:
+    symbol = symbol.strip().upper()
+    return symbol[:-3] if symbol.endswith('.NS') else symbol
+
+
+def parse_equity_list(text: str) -> pd.DataFrame:
+    """SYMBOL and NAME OF COMPANY columns of an EQUITY_L.csv (whose headers carry stray spaces)."""
+    df = pd.read_csv(io.StringIO(text), dtype=str)
+    df.columns = df.columns.str.strip()
+    df = df[['SYMBOL', 'NAME OF COMPANY']].dropna(subset=['SYMBOL'])
+    df['SYMBOL'] = df['SYMBOL'].str.strip().str.upper()
+    df['NAME OF COMPANY'] = df['NAME OF COMPANY'].fillna('').str.strip()
+    return df.drop_duplicates('SYMBOL').reset_index(drop=True)
+
+
+def download_equity_list() -> str:
+    """Fetch the current EQUITY_L.csv from NSE and check that it parses."""
+    response = requests.get(EQUITY_LIST_URL, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    if parse_equity_list(response.text).empty:
+        raise ValueError("equity list is empty")
+    return response.text
+
+
+def _write_atomic(path: str, text: str):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def load_master(path: str) -> SymbolMaster:
+    with open(path, encoding='utf-8') as f:
+        df = parse_equity_list(f.read())
+    return SymbolMaster(df['SYMBOL'], df['NAME OF COMPANY'])
+
+
+def _cache_age(path: str = CACHED_MASTER_PATH) -> float:
+    try:
+        return time.time() - os.path.getmtime(path)
+    except OSError:
+        return float('inf')
+
+
+_master = None
+_master_lock = threading.Lock()
+_refreshing = False
+_next_refresh_at = 0.0
+
+
+def _local_master() -> SymbolMaster:
+    """The cached download if there is one, else the bundled snapshot, else an empty master."""
+    for path in (CACHED_MASTER_PATH, BUNDLED_MASTER_PATH):
+        if os.path.exists(path):
+            try:
+                return load_master(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[ERROR] Unreadable symbol master {path}: {e}")
+    return SymbolMaster([], [])
+
+
+def _refresh():
+    global _master, _refreshing, _next_refresh_at
+    try:
+        text = download_equity_list()
+        _write_atomic(CACHED_MASTER_PATH, text)
+        master = load_master(CACHED_MASTER_PATH)
+        with _master_lock:
+            _master = master
+            _next_refresh_at = time.monotonic() + REFRESH_AFTER
+    except Exception as e:
+        print(f"[ERROR] Symbol master refresh failed: {e}")
+        with _master_lock:
+            _next_refresh_at = time.monotonic() + RETRY_AFTER
+    finally:
+        with _master_lock:
+            _refreshing = False
+
+
+def get_symbol_master() -> SymbolMaster:
+    """
+    Process-wide symbol master. Never blocks on the network: a stale or missing download is
+    refreshed on a background thread while the best local copy keeps being served.
+    """
+    global _master, _refreshing, _next_refresh_at
+    with _master_lock:
+        if _master is None:
+            _master = _local_master()
+            _next_refresh_at = time.monotonic() + max(0.0, REFRESH_AFTER - _cache_age())
+        if not _refreshing and time.monotonic() >= _next_refresh_at:
+            _refreshing = True
+            threading.Thread(target=_refresh, name="symbol-master", daemon=True).start()
+        return _master
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NSE equity symbol master")
+    parser.add_argument('--refresh-bundled', action='store_true',
+                        help=f"download EQUITY_L.csv into {BUNDLED_MASTER_PATH}")
+    parser.add_argument('--search', help="print suggestions for a query")
+    args = parser.parse_args()
+
+    if args.refresh_bundled:
+        text = download_equity_list()
+        _write_atomic(BUNDLED_MASTER_PATH, text)
+        print(f"Wrote {len(parse_equity_list(text))} symbols to {BUNDLED_MASTER_PATH}")
+    if args.search:
+        master = _local_master()
+        for symbol in master.suggest(args.search):
+            print(f"{symbol:<15}{master.company_name(symbol)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import glob
+import os
+import pytest
+from bs4 import BeautifulSoup
+from benchmarks.bench_extractor import FIXTURES_DIR, legacy_extract, synthetic_page
+from scrapper import HTML_PARSER, extract_main_text
+
+FIXTURE_PAGES = sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html')))
+
+
+def load(path: str) -> BeautifulSoup:
+    with open(path, encoding='utf-8') as f:
+        return BeautifulSoup(f.read(), HTML_PARSER)
+
+
+def test_fixture_pages_are_present():
+    assert len(FIXTURE_PAGES) >= 4
+
+
+# 0 and 1000 keep the best container; 5000 forces the whole-page fallback on the shorter pages
+@pytest.mark.parametrize('min_length', [0, 1000, 5000])
+@pytest.mark.parametrize('path', FIXTURE_PAGES, ids=os.path.basename)
+def test_single_pass_extractor_matches_legacy_on_saved_pages(path, min_length):
+    soup = load(path)
+    text = extract_main_text(soup, min_length)
+    assert text
+    assert text == legacy_extract(soup, min_length)
+
+
+@pytest.mark.parametrize('depth', [1, 50, 400])
+def test_single_pass_extractor_matches_legacy_on_nested_pages(depth):
+    soup = BeautifulSoup(synthetic_page(depth), HTML_PARSER)
+    assert extract_main_text(soup) == legacy_extract(soup)
+
+
+def test_empty_page_extracts_nothing():
+    soup = BeautifulSoup("<html><body><div><span>No paragraphs</span></div></body></html>", HTML_PARSER)
+    assert extract_main_text(soup) == legacy_extract(soup) == ''
@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+import pytest
+import indicators
+from indicators import INDICATORS, IndicatorEngine, frame_to_bars
+
+PARAMS = {
+    'sma': {'window': 20},
+    'ema': {'span': 20},
+    'rsi': {'period': 14},
+    'macd': {'fast': 12, 'slow': 26, 'signal': 9},
+    'bollinger': {'window': 20, 'num_std': 2},
+    'vwap': {},
+    'atr': {'period': 14},
+}
+
+
+def ohlcv_frame(length: int = 300, seed: int = 0, freq: str = 'B') -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, length)))
+    spread = np.abs(rng.normal(0, 0.01, length))
+    return pd.DataFrame({
+        'Open': close,
+        'High': close * (1 + spread),
+        'Low': close * (1 - spread),
+        'Close': close,
+        'Volume': rng.integers(10_000, 1_000_000, length).astype(float),
+    }, index=pd.date_range('2024-01-01 09:15', periods=length, freq=freq))
+
+
+def wilder(values: pd.Series, period: int) -> pd.Series:
+    return values.ewm(alpha=1 / period, adjust=False).mean()
+
+
+def pandas_reference(frame: pd.DataFrame, name: str) -> dict:
+    """The textbook pandas formula of each indicator."""
+    close, high, low = frame['Close'], frame['High'], frame['Low']
+    if name == 'sma':
+        return {'sma': close.rolling(20).mean()}
+    if name == 'ema':
+        return {'ema': close.ewm(span=20, adjust=False).mean()}
+    if name == 'rsi':
+        delta = close.diff()
+        gain, loss = wilder(delta.clip(lower=0), 14), wilder((-delta).clip(lower=0), 14)
+        return {'rsi': 100 - 100 / (1 + gain / loss)}
+    if name == 'macd':
+        line = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+        signal = line.ewm(span=9, adjust=False).mean()
+        return {'macd': line, 'signal': signal, 'histogram': line - signal}
+    if name == 'bollinger':
+        mean, std = close.rolling(20).mean(), close.rolling(20).std(ddof=0)
+        return {'middle': mean, 'upper': mean + 2 * std, 'lower': mean - 2 * std}
+    if name == 'vwap':
+        typical = (high + low + close) / 3
+        return {'vwap': (typical * frame['Volume']).cumsum() / frame['Volume'].cumsum()}
+    if name == 'atr':
+        previous = close.shift()
+        true_range = pd.concat([high - low, (high - previous).abs(), (low - previous).abs()], axis=1).max(axis=1)
+        return {'atr': wilder(true_range, 14)}
+    raise KeyError(name)
+
+
+def compute_in_chunks(bars: dict, name: str, cuts) -> dict:
+    """Run an indicator over consecutive slices of `bars`, carrying its state between them."""
+    state, chunks = None, []
+    bounds = [0, *cuts, len(bars['close'])]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        outputs, state = INDICATORS[name]({field: values[start:end] for field, values in bars.items()},
+                                          state, **PARAMS[name])
+        chunks.append(outputs)
+    return {column: np.concatenate([chunk[column] for chunk in chunks]) for column in chunks[0]}
+
+
+@pytest.mark.parametrize('name', INDICATORS)
+def test_indicator_matches_pandas(name):
+    frame = ohlcv_frame()
+    outputs, _ = INDICATORS[name](frame_to_bars(frame), None, **PARAMS[name])
+    for column, reference in pandas_reference(frame, name).items():
+        np.testing.assert_allclose(outputs[column], reference.to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_rsi_first_bars_are_not_pulled_towards_50():
+    # Steady gains with one loss: the early RSI must reflect the real moves, not a fake flat seed
+    close = np.array([100, 101, 102, 103, 102.5, 104, 105], dtype=float)
+    values = INDICATORS['rsi']({'close': close})[0]['rsi']
+    assert np.isnan(values[0])
+    assert values[1] == 100
+    assert values[4] < 100 and values[5] > 80
+
+
+# A single first bar, uneven chunks and one-bar appends all have to line up with the full pass
+@pytest.mark.parametrize('cuts', [[1], [1, 2], [30, 31, 200], [150]])
+@pytest.mark.parametrize('name', INDICATORS)
+def test_chunked_computation_matches_full_recompute(name, cuts):
+    bars = frame_to_bars(ohlcv_frame())
+    full, _ = INDICATORS[name](bars, None, **PARAMS[name])
+    chunked = compute_in_chunks(bars, name, cuts)
+    for column in full:
+        np.testing.assert_allclose(chunked[column], full[column], rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_vwap_resets_at_each_session():
+    frame = ohlcv_frame(length=3 * 75, freq='5min')
+    # 75 five-minute bars per session, one session per day
+    frame.index = pd.DatetimeIndex(np.concatenate(
+        [pd.date_range(f'2024-01-0{day} 09:15', periods=75, freq='5min') for day in (1, 2, 3)]))
+    outputs, _ = INDICATORS['vwap'](frame_to_bars(frame, '5m'))
+
+    typical = (frame['High'] + frame['Low'] + frame['Close']) / 3
+    day = frame.index.normalize()
+    reference = (typical * frame['Volume']).groupby(day).cumsum() / frame['Volume'].groupby(day).cumsum()
+    np.testing.assert_allclose(outputs['vwap'], reference.to_numpy(), rtol=1e-12)
+    # First bar of each session is just its own typical price
+    starts = [0, 75, 150]
+    np.testing.assert_allclose(outputs['vwap'][starts], typical.to_numpy()[starts], rtol=1e-12)
+
+    # Same result when the bars arrive one session (and a partial one) at a time
+    chunked = compute_in_chunks(frame_to_bars(frame, '5m'), 'vwap', [75, 160])
+    np.testing.assert_allclose(chunked['vwap'], outputs['vwap'], rtol=1e-12)
+
+
+class SpyIndicator:
+    """Wraps an indicator and records the length of bars and whether a state was passed."""
+
+    def __init__(self, function):
+        self.function = function
+        self.calls = []
+
+    def __call__(self, bars, state=None, **params):
+        self.calls.append((len(bars['close']), state is not None))
+        return self.function(bars, state, **params)
+
+
+@pytest.fixture
+def spy(monkeypatch):
+    spy = SpyIndicator(indicators.rsi)
+    monkeypatch.setitem(indicators.INDICATORS, 'rsi', spy)
+    return spy
+
+
+def test_engine_serves_an_unchanged_history_from_cache(spy):
+    engine = IndicatorEngine()
+    frame = ohlcv_frame(100)
+    first = engine.compute(frame, 'TCS.NS', '1d', 'rsi', period=14)
+    second = engine.compute(frame.copy(), 'TCS.NS', '1d', 'rsi', period=14)
+
+    assert spy.calls == [(100, False)]
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_engine_extends_an_appended_history_from_saved_state(spy):
+    engine = IndicatorEngine()
+    frame = ohlcv_frame(105)
+    engine.compute(frame.iloc[:100], 'TCS.NS', '1d', 'rsi', period=14)
+    extended = engine.compute(frame, 'TCS.NS', '1d', 'rsi', period=14)
+
+    assert spy.calls == [(100, False), (5, True)]
+    full = indicators.rsi(frame_to_bars(frame), None, period=14)[0]['rsi']
+    np.testing.assert_allclose(extended['rsi'], full, rtol=1e-9, equal_nan=True)
+
+
+def test_engine_recomputes_when_the_last_close_is_revised(spy):
+    engine = IndicatorEngine()
+    frame = ohlcv_frame(100)
+    engine.compute(frame, 'TCS.NS', '1d', 'rsi', period=14)
+
+    revised = frame.copy()
+    revised.iloc[-1, revised.columns.get_loc('Close')] *= 1.02
+    result = engine.compute(revised, 'TCS.NS', '1d', 'rsi', period=14)
+
+    assert spy.calls == [(100, False), (100, False)]
+    full = indicators.rsi(frame_to_bars(revised), None, period=14)[0]['rsi']
+    np.testing.assert_allclose(result['rsi'], full, rtol=1e-9, equal_nan=True)
+
+
+def test_engine_keys_by_symbol_and_params(spy):
+    engine = IndicatorEngine()
+    frame = ohlcv_frame(50)
+    engine.compute(frame, 'TCS.NS', '1d', 'rsi', period=14)
+    engine.compute(frame, 'INFY.NS', '1d', 'rsi', period=14)
+    engine.compute(frame, 'TCS.NS', '1d', 'rsi', period=7)
+    assert len(spy.calls) == 3
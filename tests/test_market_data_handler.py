@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+import market_data_handler
+from market_data_handler import fetch_ohlcv_history
+from ohlcv_store import OHLCVStore
+
+SYMBOL = 'TCS.NS'
+LAST_SESSION = pd.offsets.BDay().rollback(pd.Timestamp.now().normalize())
+
+
+def daily_bars(closes, end=None) -> pd.DataFrame:
+    end = end if end is not None else LAST_SESSION
+    index = pd.bdate_range(end=end, periods=len(closes))
+    closes = np.asarray(closes, dtype=float)
+    return pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes, 'Close': closes,
+                         'Volume': np.full(len(closes), 1000.0)}, index=index)
+
+
+class FakeYahoo:
+    """Serves `fetch_ohlcv_batch` from in-memory histories and records every request."""
+
+    def __init__(self, histories: dict):
+        self.histories = histories
+        self.requests = []
+
+    def __call__(self, symbols, period, interval, start=None):
+        symbols = sorted(set(symbols))
+        self.requests.append((tuple(symbols), 'start' if start is not None else period))
+        frames = {}
+        for symbol in symbols:
+            bars = self.histories[symbol]
+            frames[symbol] = bars[bars.index >= start] if start is not None else bars
+        return pd.concat(frames, axis=1)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OHLCVStore(str(tmp_path))
+
+
+def test_incremental_fetch_appends_only_new_bars(store, monkeypatch):
+    closes = np.linspace(3000, 3200, 60)
+    yahoo = FakeYahoo({SYMBOL: daily_bars(closes[:-1], end=LAST_SESSION - pd.offsets.BDay())})
+    monkeypatch.setattr(market_data_handler, 'fetch_ohlcv_batch', yahoo)
+    fetch_ohlcv_history([SYMBOL], '1mo', '1d', store=store)
+
+    yahoo.histories[SYMBOL] = daily_bars(closes)
+    history = fetch_ohlcv_history([SYMBOL], '1mo', '1d', store=store)
+
+    assert yahoo.requests == [((SYMBOL,), '1mo'), ((SYMBOL,), 'start')]
+    stored, _ = store.read(SYMBOL, '1d')
+    assert stored['Close'].to_numpy() == pytest.approx(closes)
+    assert history[SYMBOL]['Close'].iloc[-1] == pytest.approx(closes[-1])
+
+
+def test_split_restatement_rewrites_the_stored_history(store, monkeypatch):
+    # 40 sessions at ~3000, then a 1:2 split: Yahoo restates every earlier adjusted bar to ~1500
+    before = np.linspace(2900, 3100, 40)
+    yahoo = FakeYahoo({SYMBOL: daily_bars(before, end=LAST_SESSION - pd.offsets.BDay(5))})
+    monkeypatch.setattr(market_data_handler, 'fetch_ohlcv_batch', yahoo)
+    fetch_ohlcv_history([SYMBOL], '3mo', '1d', store=store)
+
+    after_split = np.concatenate([before / 2, np.linspace(1560, 1600, 5)])
+    yahoo.histories[SYMBOL] = daily_bars(after_split)
+    history = fetch_ohlcv_history([SYMBOL], '3mo', '1d', store=store)
+
+    # The overlap check spotted the restatement and the whole period was downloaded again
+    assert yahoo.requests[-2:] == [((SYMBOL,), 'start'), ((SYMBOL,), '3mo')]
+    stored, _ = store.read(SYMBOL, '1d')
+    assert stored['Close'].to_numpy() == pytest.approx(after_split)
+    # No fake crash: the largest day-over-day move is the ordinary drift, not -50%
+    assert history[SYMBOL]['Close'].pct_change().abs().max() < 0.05
+
+
+def test_small_float_noise_is_not_a_restatement(store, monkeypatch):
+    closes = np.linspace(100, 110, 30)
+    yahoo = FakeYahoo({SYMBOL: daily_bars(closes)})
+    monkeypatch.setattr(market_data_handler, 'fetch_ohlcv_batch', yahoo)
+    fetch_ohlcv_history([SYMBOL], '1mo', '1d', store=store)
+
+    yahoo.histories[SYMBOL] = daily_bars(closes * (1 + 1e-6))
+    fetch_ohlcv_history([SYMBOL], '1mo', '1d', store=store)
+
+    assert [kind for _, kind in yahoo.requests] == ['1mo', 'start']
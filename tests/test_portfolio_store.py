@@ -0,0 +1,137 @@
+import io
+from datetime import datetime
+import pandas as pd
+import pytest
+from portfolio_store import PortfolioStore, parse_tradebook
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PortfolioStore(str(tmp_path / "stockzy.db"))
+    yield store
+    store.engine.dispose()
+
+
+def import_csv(store, user_id, text):
+    return store.import_tradebook(user_id, io.StringIO(text))
+
+
+def ist(text: str) -> pd.Timestamp:
+    """Naive UTC timestamp of an Indian wall-clock time, as the ledger stores it."""
+    return pd.Timestamp(text, tz='Asia/Kolkata').tz_convert('UTC').tz_localize(None)
+
+
+def test_average_cost_restarts_after_a_full_sell_out(store):
+    user_id = store.ensure_user()
+    import_csv(store, user_id, """symbol,trade_type,quantity,price,trade_date,trade_id
+TCS,buy,100,100,2024-01-02,1
+TCS,sell,100,150,2024-02-01,2
+TCS,buy,10,200,2024-03-01,3
+""")
+    assert store.load_portfolio(user_id) == {'TCS.NS': {'quantity': 10.0, 'avg_price': 200.0}}
+
+
+def test_average_cost_follows_trade_order_not_file_order(store):
+    user_id = store.ensure_user()
+    import_csv(store, user_id, """symbol,trade_type,quantity,price,trade_date,trade_id
+INFY,buy,10,120,2024-03-01,3
+INFY,buy,10,100,2024-01-02,1
+INFY,sell,5,110,2024-02-01,2
+""")
+    # 10 @ 100, sell 5 (avg stays 100), then 10 @ 120 -> (5 * 100 + 10 * 120) / 15
+    position = store.load_portfolio(user_id)['INFY.NS']
+    assert position['quantity'] == 15.0
+    assert position['avg_price'] == pytest.approx(1700 / 15)
+
+
+def test_import_reports_symbols_left_net_short(store):
+    user_id = store.ensure_user()
+    result = import_csv(store, user_id, """symbol,trade_type,quantity,price,trade_date,trade_id
+SBIN,sell,20,600,2024-01-02,1
+SBIN,buy,5,580,2024-01-03,2
+ITC,buy,10,400,2024-01-02,3
+""")
+    assert result['net_short'] == 1
+    assert list(store.load_portfolio(user_id)) == ['ITC.NS']
+    assert store.load_positions(user_id)['SBIN.NS']['quantity'] == -15.0
+
+
+ZERODHA_TRADEBOOK = """symbol,isin,trade_date,exchange,segment,series,trade_type,quantity,price,trade_id,order_id,order_execution_time
+TCS,INE467B01029,2024-01-02,NSE,EQ,EQ,buy,10,3500.50,1001,2001,2024-01-02T09:20:11
+INFY,INE009A01021,2024-01-03,NSE,EQ,EQ,sell,5,1520,1002,2002,2024-01-03T10:01:45
+NIFTY24JANFUT,,2024-01-03,NFO,FO,,buy,50,21500,1003,2003,2024-01-03T11:00:00
+"""
+
+CONTRACT_NOTE = """Scrip, Buy/Sell, Qty, Rate, Trade Date, Segment
+reliance-eq, B, "1,000", "2,450.25", 05/02/2024, Cash
+HDFCBANK.NS, Sold, 20, 1450, 06/02/2024, CASH
+SBIN, X, 10, 600, 07/02/2024, CASH
+ITC, B, 0, 440, 07/02/2024, CASH
+BANKNIFTY, S, 15, 45000, 08/02/2024, Derivatives
+"""
+
+
+def test_parse_tradebook_reads_a_zerodha_tradebook():
+    ledger, skipped = parse_tradebook(io.StringIO(ZERODHA_TRADEBOOK))
+
+    assert skipped == 1  # The futures trade
+    assert ledger['symbol'].tolist() == ['TCS.NS', 'INFY.NS']
+    assert ledger['side'].tolist() == ['BUY', 'SELL']
+    assert ledger['price'].tolist() == [3500.50, 1520.0]
+    assert ledger['broker_trade_id'].tolist() == ['1001', '1002']
+    # trade_date comes first, so it wins over order_execution_time
+    assert ledger['traded_at'].tolist() == [ist('2024-01-02'), ist('2024-01-03')]
+
+
+def test_parse_tradebook_reads_a_contract_note_without_trade_ids():
+    ledger, skipped = parse_tradebook(io.StringIO(CONTRACT_NOTE))
+
+    assert skipped == 3  # Unknown side, zero quantity, derivatives segment
+    assert ledger['symbol'].tolist() == ['RELIANCE.NS', 'HDFCBANK.NS']
+    assert ledger['side'].tolist() == ['BUY', 'SELL']
+    assert ledger['quantity'].tolist() == [1000.0, 20.0]
+    assert ledger['price'].tolist() == [2450.25, 1450.0]
+    # Day-first dates
+    assert ledger['traded_at'].tolist() == [ist('2024-02-05'), ist('2024-02-06')]
+    assert ledger['broker_trade_id'].str.startswith('row:').all()
+
+
+def test_reimporting_a_file_without_trade_ids_adds_nothing(store):
+    user_id = store.ensure_user()
+    tradebook = """date,symbol,side,qty,price
+2024-01-02,TCS,BUY,10,3500
+2024-01-02,TCS,BUY,10,3500
+2024-01-03,INFY,BUY,5,1500
+"""
+    first = import_csv(store, user_id, tradebook)
+    assert first['imported'] == 3  # Identical fills in one file are separate trades
+
+    # Same trades re-exported in another order, plus one new fill
+    again = import_csv(store, user_id, """date,symbol,side,qty,price
+2024-01-03,INFY,BUY,5,1500
+2024-01-02,TCS,BUY,10,3500
+2024-01-02,TCS,BUY,10,3500
+2024-01-02,TCS,BUY,10,3500
+""")
+    assert (again['imported'], again['duplicates']) == (1, 3)
+    assert store.load_portfolio(user_id)['TCS.NS']['quantity'] == 30.0
+
+
+def test_parse_tradebook_converts_offset_times_to_utc():
+    ledger, _ = parse_tradebook(io.StringIO("""symbol,side,qty,price,order_execution_time
+TCS,BUY,1,3500,2024-01-02T09:20:00+05:30
+"""))
+    assert ledger['traded_at'].tolist() == [pd.Timestamp('2024-01-02 03:50')]
+
+
+def test_manual_and_imported_trades_replay_in_real_time_order(store):
+    user_id = store.ensure_user()
+    # Bought and fully sold in the morning, Indian time
+    import_csv(store, user_id, """symbol,side,qty,price,order_execution_time,trade_id
+INFY,BUY,10,100,2024-01-02 10:00:00,1
+INFY,SELL,10,110,2024-01-02 11:00:00,2
+""")
+    # Bought again at 11:30 IST (06:00 UTC), after the position was closed
+    store.add_trade(user_id, 'INFY.NS', 'BUY', 5, 200, traded_at=datetime(2024, 1, 2, 6, 0))
+
+    assert store.load_portfolio(user_id) == {'INFY.NS': {'quantity': 5.0, 'avg_price': 200.0}}
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import socket
+from quote_hub import QuoteHub, FakeFeed, LiveFeedServer
+
+SYMBOLS = ['RELIANCE', 'TCS', 'INFY', 'HDFCBANK', 'ICICIBANK', 'SBIN']
+INDICES = ['NIFTY 50', 'NIFTY BANK', 'INDIA VIX']
+
+
+def drain(queue: asyncio.Queue) -> list:
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+def test_fake_feed_diffs_carry_only_changed_quotes():
+    hub = QuoteHub()
+    feed = FakeFeed(hub, symbols=SYMBOLS, indices=INDICES, seed=7)
+    feed.tick()
+    before = hub.snapshot('ticker')
+
+    async def next_tick():
+        sub = hub.subscribe(['ticker'], asyncio.get_running_loop())
+        feed.tick()
+        await asyncio.sleep(0)  # Let the loop run the offers queued by publish()
+        hub.unsubscribe(sub)
+        return drain(sub.queue)
+
+    messages = asyncio.run(next_tick())
+    after = hub.snapshot('ticker')
+
+    assert len(messages) == 1
+    diff = messages[0]
+    assert diff['type'] == 'diff' and diff['version'] == before['version'] + 1 == after['version']
+    moved = {key for key, row in after['rows'].items() if before['rows'][key] != row}
+    # A tick moves a third of the quotes; only those are sent
+    assert set(diff['changed']) == moved
+    assert 0 < len(moved) < len(SYMBOLS)
+    assert diff['removed'] == []
+
+
+def test_subscriber_only_receives_its_topics():
+    hub = QuoteHub()
+    feed = FakeFeed(hub, symbols=SYMBOLS, indices=INDICES, seed=7)
+
+    async def ticks():
+        sub = hub.subscribe(['indices'], asyncio.get_running_loop())
+        for _ in range(3):
+            feed.tick()
+        await asyncio.sleep(0)
+        hub.unsubscribe(sub)
+        return drain(sub.queue)
+
+    messages = asyncio.run(ticks())
+    assert [message['topic'] for message in messages] == ['indices'] * 3
+    assert [message['version'] for message in messages] == [1, 2, 3]
+
+
+def test_new_subscriber_starts_from_the_full_snapshot():
+    hub = QuoteHub()
+    feed = FakeFeed(hub, symbols=SYMBOLS, indices=INDICES, seed=7)
+    for _ in range(5):
+        feed.tick()
+
+    snapshot = hub.snapshot('ticker')
+    assert snapshot['type'] == 'snapshot'
+    assert snapshot['version'] == 5
+    assert sorted(snapshot['rows']) == sorted(SYMBOLS)
+    assert sorted(hub.snapshot('indices')['rows']) == sorted(INDICES)
+
+
+def test_republishing_unchanged_rows_sends_nothing():
+    hub = QuoteHub()
+    FakeFeed(hub, symbols=SYMBOLS, indices=INDICES, seed=7).tick()
+    rows = hub.snapshot('ticker')['rows']
+
+    assert hub.publish('ticker', dict(rows)) is None
+    assert hub.snapshot('ticker')['version'] == 1
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_websocket_client_gets_snapshot_then_diffs():
+    from websockets.asyncio.client import connect
+
+    hub = QuoteHub()
+    feed = FakeFeed(hub, symbols=SYMBOLS, indices=INDICES, seed=7)
+    feed.tick()
+    expected_snapshot = hub.snapshot('ticker')
+    server = LiveFeedServer(hub, host='127.0.0.1', port=free_port())
+    assert server.start()
+
+    async def client():
+        async with connect(f"ws://127.0.0.1:{server.port}") as websocket:
+            await websocket.send(json.dumps({'subscribe': ['ticker']}))
+            snapshot = json.loads(await asyncio.wait_for(websocket.recv(), 5))
+            # The server subscribes before sending the snapshot, so the diff below can't be missed
+            while hub.subscriber_count() == 0:
+                await asyncio.sleep(0.01)
+            diff = hub.publish('ticker', {**snapshot['rows'], 'TCS': {'price': 1.0, 'change': -1.0}})
+            return snapshot, diff, json.loads(await asyncio.wait_for(websocket.recv(), 5))
+
+    snapshot, published, received = asyncio.run(client())
+    assert snapshot == expected_snapshot
+    assert received == published
+    assert received['changed'] == {'TCS': {'price': 1.0, 'change': -1.0}}
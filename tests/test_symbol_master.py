@@ -0,0 +1,31 @@
+import os
+from symbol_master import SymbolMaster, COMPLETE_MIN_SYMBOLS, BUNDLED_MASTER_PATH, load_master
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SYMBOLS = ['TCS', 'TATAMOTORS', 'RELIANCE', 'INFY']
+NAMES = ['Tata Consultancy Services Limited', 'Tata Motors Limited', 'Reliance Industries Limited',
+         'Infosys Limited']
+
+
+def test_validation_accepts_the_ns_suffix():
+    master = SymbolMaster(SYMBOLS, NAMES)
+    assert master.is_valid('tcs.ns')
+    assert not master.is_valid('TCSX')
+
+
+def test_search_matches_symbols_before_company_names():
+    master = SymbolMaster(SYMBOLS, NAMES)
+    assert master.search('TATA') == ['TATAMOTORS', 'TCS']
+    assert master.suggest('RELAINCE') == ['RELIANCE']
+
+
+def test_bundled_seed_list_is_not_treated_as_complete():
+    assert not SymbolMaster(SYMBOLS, NAMES).is_complete
+    assert SymbolMaster([f'S{i}' for i in range(COMPLETE_MIN_SYMBOLS)], [''] * COMPLETE_MIN_SYMBOLS).is_complete
+
+
+def test_bundled_master_parses():
+    bundled = load_master(os.path.join(REPO_ROOT, BUNDLED_MASTER_PATH))
+    assert bundled.is_valid('RELIANCE')
+    assert bundled.company_name('RELIANCE.NS')